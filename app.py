@@ -1,15 +1,27 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, g, Response, send_file, abort
 from datetime import datetime, date, timedelta
 import cv2
 import numpy as np
 import base64
 import os
 import json
+import time
+import threading
 from werkzeug.utils import secure_filename
 import database
 import config
 import face_utils
-import report_analyzer
+import attendance_tracker
+import attendance_buffer
+import enrollment_jobs
+import plan_analysis
+import reanalyze_plans
+import plan_search
+import report_rollups
+import membership_numbers
+import metrics
+import profiling
+import db_metrics
 from functools import wraps
 import sys
 
@@ -28,11 +40,17 @@ app = Flask(__name__)
 app.config.from_object(config)
 app.secret_key = app.config['SECRET_KEY']
 
-# Initialize MySQL database if available
-if mysql_available:
-    mysql_db = AttendanceMySQL()
-else:
-    mysql_db = None
+# MySQL attendance database, connected on first use (tables: python setup_mysql.py or python mysql_integration.py)
+mysql_db = None
+mysql_db_lock = threading.Lock()
+
+def get_mysql_db():
+    global mysql_db
+    if mysql_db is None:
+        with mysql_db_lock:
+            if mysql_db is None:
+                mysql_db = AttendanceMySQL()
+    return mysql_db
 
 # Configure upload folders
 UPLOAD_FOLDER = 'static/uploads'
@@ -42,6 +60,72 @@ for folder in ['plans', 'reports', 'profiles']:
 os.makedirs('known_faces', exist_ok=True)
 os.makedirs('models', exist_ok=True)
 
+def start_background_services():
+    """Start this process's background threads; the production server calls it in each worker after fork"""
+    # Face uploads are encoded off the request thread
+    enrollment_jobs.start_worker()
+    
+    # Uploaded plans are analyzed off the request thread
+    plan_analysis.start_worker()
+    
+    # Replay attendance journals left by a crash without waiting for the next recognition
+    if attendance_buffer.enabled():
+        attendance_buffer.get_buffer()
+    
+    # Models and gallery otherwise load on the first recognition request
+    if config.Config.FACE_WARMUP:
+        face_utils.warm_up()
+
+# Request instrumentation
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    metrics.begin_request()
+    db_metrics.begin_request()
+    profiling.begin_request(wants_profile())
+
+@app.after_request
+def add_timing_headers(response):
+    g.request_elapsed = time.perf_counter() - g.request_started
+    query_stats = db_metrics.current_request()
+    if query_stats and query_stats.count:
+        response.headers['Server-Timing'] = f'db;dur={query_stats.seconds * 1000:.1f};desc="{query_stats.count} queries"'
+    profile_name = profiling.capture_name(request.endpoint, g.request_elapsed * 1000)
+    if profile_name:
+        response.headers['X-Profile-Id'] = profile_name
+    return response
+
+@app.teardown_request
+def record_request_metrics(exception):
+    # Runs even when a view raised, so no per-thread request state leaks into the thread's next request
+    if 'request_started' not in g:
+        return
+    elapsed = g.get('request_elapsed', time.perf_counter() - g.request_started)
+    metrics.end_request()
+    db_metrics.end_request(request.endpoint)
+    if request.endpoint:
+        metrics.request_seconds.observe(elapsed, endpoint=request.endpoint)
+    profiling.end_request(request.endpoint, elapsed * 1000)
+
+def wants_timings():
+    """Clients opt into per-stage timings with ?timings=1"""
+    return request.args.get('timings') in ('1', 'true')
+
+def wants_profile():
+    """Profile every request by config, or on request via the admin-only header"""
+    if config.Config.PROFILE_ALL_REQUESTS:
+        return True
+    header = request.headers.get(config.Config.PROFILE_HEADER)
+    if not header:
+        return False
+    if config.Config.PROFILE_TOKEN and header == config.Config.PROFILE_TOKEN:
+        return True
+    return session.get('user_role') == 'admin'
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 # Role-based access control
 def role_required(required_roles):
     def decorator(f):
@@ -168,7 +252,7 @@ def dashboard():
 def attendance():
     """Simple attendance page with MySQL integration"""
     if mysql_available:
-        today_attendance = mysql_db.get_daily_report()
+        today_attendance = get_mysql_db().get_daily_report()
     else:
         today_attendance = []
     
@@ -184,7 +268,7 @@ def mysql_health():
     if mysql_available:
         try:
             # Test MySQL connection
-            result = mysql_db.get_today_attendance()
+            result = get_mysql_db().get_today_attendance()
             return jsonify({
                 "status": "success", 
                 "message": "MySQL connection is working",
@@ -215,10 +299,10 @@ def clock_in():
         
         if user_id and user_name:
             # Register user if not exists
-            mysql_db.register_user(user_id, user_name)
+            get_mysql_db().register_user(user_id, user_name)
             
             # Log attendance
-            success = mysql_db.log_attendance(user_id, user_name, confidence)
+            success = get_mysql_db().log_attendance(user_id, user_name, confidence)
             if success:
                 return jsonify({'status': 'success', 'message': 'Clocked in successfully'})
         
@@ -238,7 +322,7 @@ def clock_out():
         user_id = data.get('user_id')
         
         if user_id:
-            success = mysql_db.clock_out_user(user_id)
+            success = get_mysql_db().clock_out_user(user_id)
             if success:
                 return jsonify({'status': 'success', 'message': 'Clocked out successfully'})
         
@@ -254,7 +338,7 @@ def get_today_attendance():
         return jsonify({'status': 'error', 'message': 'MySQL not available', 'data': []})
     
     try:
-        attendance_data = mysql_db.get_daily_report()
+        attendance_data = get_mysql_db().get_daily_report()
         return jsonify({'status': 'success', 'data': attendance_data})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e), 'data': []})
@@ -267,7 +351,7 @@ def mysql_reports():
         return redirect(url_for('dashboard'))
     
     try:
-        monthly_report = mysql_db.get_monthly_report()
+        monthly_report = get_mysql_db().get_monthly_report()
         return render_template('mysql_reports.html', report=monthly_report)
     except Exception as e:
         flash(f'Error loading MySQL reports: {str(e)}', 'error')
@@ -284,7 +368,7 @@ def export_csv():
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=30)
         
-        filename = mysql_db.export_to_csv(start_date, end_date)
+        filename = get_mysql_db().export_to_csv(start_date, end_date)
         if filename:
             return jsonify({'status': 'success', 'file': filename})
         else:
@@ -351,10 +435,8 @@ def register_member():
         cursor = conn.cursor()
         
         try:
-            # Generate membership number
-            cursor.execute("SELECT COUNT(*) as count FROM members")
-            member_count = cursor.fetchone()[0]
-            membership_number = f"MEM{member_count + 1:06d}"
+            # Generate membership number from the counter (no count of members, safe under concurrency)
+            membership_number = membership_numbers.next_membership_number(cursor)
             
             cursor.execute("""
                 INSERT INTO members (
@@ -369,6 +451,7 @@ def register_member():
             ))
             
             member_id = cursor.lastrowid
+            report_rollups.add_members(cursor, date.today())
             conn.commit()
             
             flash('Member registration submitted for approval!', 'success')
@@ -459,7 +542,12 @@ def reject_member(member_id):
     cursor = conn.cursor()
     
     try:
-        cursor.execute("DELETE FROM members WHERE id = %s", (member_id,))
+        cursor.execute("SELECT join_date FROM members WHERE id = %s FOR UPDATE", (member_id,))
+        member = cursor.fetchone()
+        if member:
+            # Attendance and the member's rollup row go with the member (ON DELETE CASCADE)
+            report_rollups.member_removed(cursor, member_id, member[0])
+            cursor.execute("DELETE FROM members WHERE id = %s", (member_id,))
         conn.commit()
         flash('Member registration rejected and deleted', 'success')
     
@@ -525,37 +613,46 @@ def register_face(member_id):
             return render_template('register_face.html', member=member)
         
         files = request.files.getlist('face_images')
-        success_count = 0
+        file_paths = []
         
         for file in files:
             if file and file.filename != '' and face_utils.allowed_file(file.filename):
                 filename = secure_filename(f"member_{member_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}")
                 filepath = os.path.join(app.config['UPLOAD_FOLDER'], 'profiles', filename)
                 file.save(filepath)
-                
-                try:
-                    face_encoding_path = face_utils.encode_and_save_face(filepath, member_id)
-                    if face_encoding_path:
-                        conn = database.get_db_connection()
-                        cursor = conn.cursor()
-                        cursor.execute("UPDATE members SET face_encoding_path = %s WHERE id = %s", (face_encoding_path, member_id))
-                        conn.commit()
-                        cursor.close()
-                        conn.close()
-                        success_count += 1
-                    else:
-                        os.remove(filepath)
-                except Exception as e:
-                    flash(f'Error processing face image: {str(e)}', 'error')
-        
-        if success_count > 0:
-            flash(f'Successfully registered {success_count} face image(s)!', 'success')
-            return redirect(url_for('member_profile', member_id=member_id))
-        else:
-            flash('No valid face images were processed.', 'error')
+                file_paths.append(filepath)
+        
+        if not file_paths:
+            flash('No valid face images were uploaded.', 'error')
+            return render_template('register_face.html', member=member)
+        
+        try:
+            job_id = enrollment_jobs.create_job(member_id, file_paths, session['user_id'])
+        except Exception as e:
+            flash(f'Error queuing face images: {str(e)}', 'error')
+            return render_template('register_face.html', member=member)
+        
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify({'success': True, 'job_id': job_id,
+                            'status_url': url_for('enrollment_job_status', job_id=job_id)}), 202
+        
+        flash(f'{len(file_paths)} face image(s) queued for processing (job #{job_id}).', 'success')
+        return redirect(url_for('member_profile', member_id=member_id))
     
     return render_template('register_face.html', member=member)
 
+@app.route('/api/enrollment_jobs/<int:job_id>')
+@role_required(['admin', 'manager'])
+def enrollment_job_status(job_id):
+    """Report progress of a queued face enrollment"""
+    try:
+        job = enrollment_jobs.get_job(job_id)
+        if not job:
+            return jsonify({'success': False, 'message': 'Job not found'}), 404
+        return jsonify({'success': True, 'job': job})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error loading job: {str(e)}'})
+
 # === EVENT MANAGEMENT ===
 @app.route('/events')
 @role_required(['admin', 'manager', 'user'])
@@ -643,8 +740,36 @@ def video_attendance(event_id):
         cursor.close()
         conn.close()
     
+    attendance_tracker.open_event(event_id)
     return render_template('video_attendance.html', event=event)
 
+@app.route('/api/events/<int:event_id>/roster', methods=['POST'])
+@role_required(['admin', 'manager'])
+def set_event_roster(event_id):
+    """Replace the expected attendee list used to narrow face matching"""
+    data = request.get_json() or {}
+    member_ids = data.get('member_ids', [])
+    
+    conn = database.get_db_connection()
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("DELETE FROM event_roster WHERE event_id = %s", (event_id,))
+        # Tells every worker's cached roster gallery that it is stale
+        cursor.execute("UPDATE events SET roster_version = roster_version + 1 WHERE id = %s", (event_id,))
+        if member_ids:
+            cursor.executemany("INSERT INTO event_roster (event_id, member_id) VALUES (%s, %s)",
+                               [(event_id, member_id) for member_id in member_ids])
+        conn.commit()
+        face_utils.invalidate_event_gallery(event_id)
+        return jsonify({'success': True, 'count': len(member_ids)})
+    except Exception as e:
+        conn.rollback()
+        return jsonify({'success': False, 'message': f'Error saving roster: {str(e)}'})
+    finally:
+        cursor.close()
+        conn.close()
+
 @app.route('/api/process_attendance', methods=['POST'])
 @role_required(['admin', 'manager'])
 def process_attendance():
@@ -656,46 +781,59 @@ def process_attendance():
         if not event_id or not image_data:
             return jsonify({'success': False, 'message': 'Missing data'})
         
-        image_bytes = base64.b64decode(image_data.split(',')[1])
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        with metrics.timed('base64_decode'):
+            image_bytes = base64.b64decode(image_data.partition(',')[2])
+        image = face_utils.decode_image(image_bytes)
+        if image is None:
+            return jsonify({'success': False, 'message': 'Invalid image data'})
         
-        recognized_members = face_utils.recognize_faces(image)
+        return record_recognized_attendance(event_id, face_utils.recognize_rgb_faces(image, event_id))
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error processing attendance: {str(e)}'})
+
+@app.route('/api/process_attendance/frame', methods=['POST'])
+@role_required(['admin', 'manager'])
+def process_attendance_frame():
+    """Process a raw image/jpeg body or a multipart 'image' upload without base64"""
+    try:
+        # Read the body before touching request.form so raw bodies are not parsed as forms
+        if request.mimetype.startswith('image/'):
+            image_buffer = request.get_data(cache=False)
+        elif 'image' in request.files:
+            image_buffer = request.files['image'].stream.read()
+        else:
+            image_buffer = None
+        
+        event_id = request.args.get('event_id', type=int) or request.form.get('event_id', type=int)
+        
+        if not event_id or not image_buffer:
+            return jsonify({'success': False, 'message': 'Missing data'})
+        
+        image = face_utils.decode_image(image_buffer, config.Config.FRAME_DECODE_REDUCTION)
+        if image is None:
+            return jsonify({'success': False, 'message': 'Invalid image data'})
         
+        return record_recognized_attendance(event_id, face_utils.recognize_rgb_faces(image, event_id))
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error processing attendance: {str(e)}'})
+
+def record_recognized_attendance(event_id, recognized_members):
+    """Write attendance for recognized (member_id, confidence) pairs and build the JSON response"""
+    try:
         if recognized_members:
-            conn = database.get_db_connection()
-            cursor = conn.cursor()
-            recognized_at = datetime.now()
-            success_count = 0
-            recognized_details = []
+            success_count, recognized_details = attendance_tracker.record_attendance(event_id, recognized_members)
+            already_marked = sum(1 for member in recognized_details if member['already_marked'])
             
-            for member_id, confidence in recognized_members:
-                try:
-                    cursor.execute("SELECT id FROM attendance WHERE member_id = %s AND event_id = %s", (member_id, event_id))
-                    existing_record = cursor.fetchone()
-                    
-                    if existing_record:
-                        cursor.execute("UPDATE attendance SET status = 'present', recognized_at = %s, confidence = %s WHERE id = %s", (recognized_at, confidence, existing_record[0]))
-                    else:
-                        cursor.execute("INSERT INTO attendance (member_id, event_id, status, recognized_at, confidence) VALUES (%s, %s, %s, %s, %s)", (member_id, event_id, 'present', recognized_at, confidence))
-                    
-                    success_count += 1
-                    cursor.execute("SELECT fullname FROM members WHERE id = %s", (member_id,))
-                    member_name = cursor.fetchone()[0]
-                    recognized_details.append({'name': member_name, 'confidence': round(confidence * 100, 2)})
-                except Exception as e:
-                    print(f"Error recording attendance: {e}")
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-            return jsonify({
+            result = {
                 'success': True,
-                'message': f'Attendance recorded for {success_count} member(s)',
+                'message': f'Attendance recorded for {success_count} member(s), {already_marked} already marked',
                 'recognized_members': recognized_details,
                 'count': success_count
-            })
+            }
+            if wants_timings():
+                result['timings'] = metrics.current_timings()
+                result['db'] = db_metrics.current_stats()
+            return jsonify(result)
         else:
             return jsonify({'success': False, 'message': 'No recognized faces found'})
     except Exception as e:
@@ -727,14 +865,23 @@ def upload_plan():
             try:
                 cursor.execute("INSERT INTO annual_plans (title, description, plan_type, year, file_path, uploaded_by, uploaded_at) VALUES (%s, %s, %s, %s, %s, %s, %s)", (title, description, plan_type, year, filepath, session['user_id'], datetime.now()))
                 conn.commit()
-                flash('Plan uploaded successfully!', 'success')
-                return redirect(url_for('view_plans'))
+                plan_id = cursor.lastrowid
             except Exception as e:
                 conn.rollback()
                 flash(f'Error uploading plan: {str(e)}', 'error')
+                return render_template('upload_plan.html', current_year=datetime.now().year)
             finally:
                 cursor.close()
                 conn.close()
+            
+            try:
+                if plan_analysis.queue_analysis(plan_id, filepath) == 'cached':
+                    flash('Plan uploaded successfully! An identical file was already analyzed, so its results were reused.', 'success')
+                else:
+                    flash('Plan uploaded successfully! Analysis is running in the background.', 'success')
+            except Exception as e:
+                flash(f'Plan uploaded, but analysis could not be queued: {str(e)}', 'error')
+            return redirect(url_for('view_plans'))
         else:
             flash('Invalid file type.', 'error')
     
@@ -744,20 +891,48 @@ def upload_plan():
 @app.route('/plans')
 @role_required(['admin', 'manager', 'user'])
 def view_plans():
+    """List plans, optionally filtered by year and type; with a search query, matches in relevance order"""
+    search_query = request.args.get('q', '').strip()
+    year = request.args.get('year', type=int)
+    plan_type = request.args.get('plan_type') or None
     conn = database.get_db_connection()
     cursor = conn.cursor(dictionary=True)
     
     try:
-        cursor.execute("""
+        conditions = []
+        params = []
+        matches = None
+        if search_query:
+            matches = {match['id']: match for match in plan_search.search(search_query, year, plan_type, limit=50)}
+            conditions.append(f"p.id IN ({', '.join(['%s'] * len(matches)) or 'NULL'})")
+            params.extend(matches)
+        else:
+            if year:
+                conditions.append("p.year = %s")
+                params.append(year)
+            if plan_type:
+                conditions.append("p.plan_type = %s")
+                params.append(plan_type)
+        
+        cursor.execute(f"""
             SELECT p.id, p.title, p.description, p.plan_type, p.year,
                    p.file_path, p.uploaded_at, u.fullname as uploaded_by,
-                   p.analysis_data
+                   p.analysis_data IS NOT NULL AS analyzed, p.analysis_status,
+                   p.content_hash, p.analysis_hash, p.analyzer_version
             FROM annual_plans p
             JOIN users u ON p.uploaded_by = u.id
+            {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
             ORDER BY p.year DESC, p.uploaded_at DESC
-        """)
+        """, params)
         
         plans = cursor.fetchall()
+        for plan in plans:
+            plan['stale'] = plan['analyzed'] and plan_analysis.is_stale(plan)
+        if matches is not None:
+            for plan in plans:
+                plan['score'] = matches[plan['id']]['score']
+                plan['matched_terms'] = matches[plan['id']]['matched_terms']
+            plans.sort(key=lambda plan: plan['score'], reverse=True)
     
     except Exception as e:
         flash(f'Error loading plans: {str(e)}', 'error')
@@ -767,31 +942,80 @@ def view_plans():
         cursor.close()
         conn.close()
     
-    return render_template('view_plans.html', plans=plans)
+    reanalysis = reanalyze_plans.current_run() if session.get('user_role') == 'admin' else None
+    return render_template('view_plans.html', plans=plans, reanalysis=reanalysis,
+                           search_query=search_query, year=year, plan_type=plan_type)
 
-@app.route('/plans/<int:plan_id>/analyze')
+@app.route('/api/plans/search')
+@role_required(['admin', 'manager', 'user'])
+def search_plans():
+    """Ranked (BM25) full-text search over analyzed plans"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'success': False, 'message': 'Query parameter q is required'}), 400
+    
+    try:
+        results, took_ms = plan_search.timed_search(query, request.args.get('year', type=int),
+                                                    request.args.get('plan_type') or None,
+                                                    min(request.args.get('limit', 20, type=int), 100))
+        return jsonify({'success': True, 'query': query, 'results': results, 'took_ms': took_ms})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error searching plans: {str(e)}'}), 500
+
+@app.route('/admin/plans/reanalyze', methods=['POST'])
+@role_required(['admin'])
+def reanalyze_all_plans():
+    """Re-analyze every plan (optionally one year or type) in a background process pool"""
+    year = request.form.get('year', type=int)
+    plan_type = request.form.get('plan_type') or None
+    force = request.form.get('force') == '1'
+    if reanalyze_plans.start_background(year, plan_type, force):
+        flash('Re-analysis started. Reload this page to follow its progress.', 'success')
+    else:
+        flash('A re-analysis is already running.', 'error')
+    return redirect(url_for('view_plans'))
+
+@app.route('/plans/<int:plan_id>/analyze', methods=['GET', 'POST'])
 @role_required(['admin', 'manager'])
 def analyze_plan(plan_id):
+    """Show the stored analysis; POST (or a never-analyzed plan) queues a fresh one"""
     conn = database.get_db_connection()
     cursor = conn.cursor(dictionary=True)
     
     try:
-        cursor.execute("SELECT title, file_path, analysis_data FROM annual_plans WHERE id = %s", (plan_id,))
+        cursor.execute("""
+            SELECT title, file_path, analysis_data, analyzed_at, analysis_status, analysis_error,
+                   content_hash, analysis_hash, analyzer_version
+            FROM annual_plans WHERE id = %s
+        """, (plan_id,))
         plan = cursor.fetchone()
-        if not plan:
-            flash('Plan not found', 'error')
-            return redirect(url_for('view_plans'))
-        
-        analysis_results = report_analyzer.analyze_document(plan['file_path'])
-        cursor.execute("UPDATE annual_plans SET analysis_data = %s, analyzed_at = %s WHERE id = %s", (json.dumps(analysis_results), datetime.now(), plan_id))
-        conn.commit()
-        return render_template('plan_analysis.html', plan_title=plan['title'], analysis=analysis_results)
     except Exception as e:
-        flash(f'Error analyzing plan: {str(e)}', 'error')
+        flash(f'Error loading plan analysis: {str(e)}', 'error')
         return redirect(url_for('view_plans'))
     finally:
         cursor.close()
         conn.close()
+    
+    if not plan:
+        flash('Plan not found', 'error')
+        return redirect(url_for('view_plans'))
+    
+    # Plans uploaded before background analysis have never been queued
+    if request.method == 'POST' or plan['analysis_status'] == 'pending':
+        try:
+            if plan_analysis.queue_analysis(plan_id, plan['file_path']) == 'cached':
+                flash('The file and analyzer are unchanged; the stored analysis is current.', 'success')
+            else:
+                flash('Analysis queued. This page refreshes when it is done.', 'success')
+        except Exception as e:
+            flash(f'Error analyzing plan: {str(e)}', 'error')
+            return redirect(url_for('view_plans'))
+        return redirect(url_for('analyze_plan', plan_id=plan_id))
+    
+    analysis = json.loads(plan['analysis_data']) if plan['analysis_data'] else None
+    return render_template('plan_analysis.html', plan_id=plan_id, plan_title=plan['title'], analysis=analysis,
+                           status=plan['analysis_status'], error=plan['analysis_error'], analyzed_at=plan['analyzed_at'],
+                           stale=analysis is not None and plan_analysis.is_stale(plan))
 
 @app.route('/reports')
 @role_required(['admin', 'manager'])
@@ -800,30 +1024,26 @@ def view_reports():
     cursor = conn.cursor(dictionary=True)
     
     try:
-        # Membership growth report with MySQL date functions
+        # Membership growth report from the monthly rollup (see report_rollups.py)
         cursor.execute("""
-            SELECT 
-                DATE_FORMAT(join_date, '%Y-%m-01') as month, 
-                COUNT(*) as new_members
-            FROM members 
-            WHERE join_date >= %s
-            GROUP BY DATE_FORMAT(join_date, '%Y-%m-01')
+            SELECT month, new_members
+            FROM member_growth_monthly
+            WHERE month >= %s AND new_members > 0
             ORDER BY month
-        """, (date.today() - timedelta(days=365),))
+        """, ((date.today() - timedelta(days=365)).replace(day=1),))
         
         membership_growth = cursor.fetchall()
         
-        # Attendance statistics
+        # Attendance statistics from the per-event rollup
         cursor.execute("""
             SELECT 
                 e.title, 
                 e.event_date, 
-                COUNT(a.id) as attendance_count,
-                COUNT(DISTINCT a.member_id) as unique_members
+                COALESCE(r.total_attendance, 0) as attendance_count,
+                COALESCE(r.unique_members, 0) as unique_members
             FROM events e
-            LEFT JOIN attendance a ON e.id = a.event_id
+            LEFT JOIN event_attendance_rollup r ON e.id = r.event_id
             WHERE e.event_date >= %s
-            GROUP BY e.id, e.title, e.event_date
             ORDER BY e.event_date DESC
         """, (date.today() - timedelta(days=90),))
         
@@ -840,6 +1060,85 @@ def view_reports():
                          membership_growth=membership_growth,
                          attendance_stats=attendance_stats)
 
+# === ATTENDANCE ANALYTICS API (see attendance_analytics.py; charts in chart_utils.js) ===
+def analytics_response(report, compute):
+    """compute(attendance_analytics) as JSON; the module is imported here so pandas stays out of app start-up"""
+    try:
+        import attendance_analytics
+        return jsonify({'success': True, 'report': report, 'data': compute(attendance_analytics)})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error computing {report}: {str(e)}'}), 500
+
+def bounded_arg(name, default, low, high):
+    return max(low, min(request.args.get(name, default, type=int), high))
+
+def analytics_source():
+    return 'clock' if request.args.get('source') == 'clock' else 'events'
+
+@app.route('/api/analytics/member_rates')
+@role_required(['admin', 'manager'])
+def analytics_member_rates():
+    """Attendance rate of each active member since joining; ?lowest=1 lists the least active first"""
+    limit = bounded_arg('limit', 50, 1, 1000)
+    lowest = request.args.get('lowest') == '1'
+    return analytics_response('member_rates', lambda analytics: analytics.member_attendance_rates(limit, lowest))
+
+@app.route('/api/analytics/department_rates')
+@role_required(['admin', 'manager'])
+def analytics_department_rates():
+    """Workday clock-in rate per department over ?days"""
+    days = bounded_arg('days', 30, 1, 366)
+    return analytics_response('department_rates', lambda analytics: analytics.department_attendance_rates(days))
+
+@app.route('/api/analytics/event_types')
+@role_required(['admin', 'manager'])
+def analytics_event_types():
+    """Events, attendance and turnout per event type over ?days"""
+    days = bounded_arg('days', 365, 1, 3660)
+    return analytics_response('event_types', lambda analytics: analytics.event_type_attendance_rates(days))
+
+@app.route('/api/analytics/streaks')
+@role_required(['admin', 'manager'])
+def analytics_streaks():
+    """Members with the longest current runs of consecutive events attended"""
+    limit = bounded_arg('limit', 20, 1, 1000)
+    return analytics_response('streaks', lambda analytics: analytics.attendance_streaks(limit))
+
+@app.route('/api/analytics/lateness')
+@role_required(['admin', 'manager'])
+def analytics_lateness():
+    """Lateness distribution of event check-ins, or of clock-ins with ?source=clock"""
+    source = analytics_source()
+    days = bounded_arg('days', 90, 1, 3660)
+    grouped = request.args.get('grouped') == '1'
+    return analytics_response('lateness', lambda analytics: analytics.lateness_distribution(source, days, grouped))
+
+@app.route('/api/analytics/weekly_trends')
+@role_required(['admin', 'manager'])
+def analytics_weekly_trends():
+    """Weekly attendance with week-over-week change, for events or (?source=clock) clock-ins"""
+    source = analytics_source()
+    weeks = bounded_arg('weeks', 12, 2, 104)
+    return analytics_response('weekly_trends', lambda analytics: analytics.weekly_trends(source, weeks))
+
+# === ADMIN: REQUEST PROFILES ===
+@app.route('/admin/profiles')
+@role_required(['admin'])
+def request_profiles():
+    return render_template('request_profiles.html', profiles=profiling.list_profiles(),
+                           slow_request_ms=config.Config.PROFILE_SLOW_REQUEST_MS,
+                           profile_all=config.Config.PROFILE_ALL_REQUESTS)
+
+@app.route('/admin/profiles/<name>')
+@role_required(['admin'])
+def request_profile(name):
+    path = profiling.profile_path(name)
+    if path is None:
+        abort(404)
+    if request.args.get('download'):
+        return send_file(os.path.abspath(path), as_attachment=True, download_name=name)
+    return Response(profiling.summarize(path), mimetype='text/plain')
+
 def allowed_document_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in {'pdf', 'doc', 'docx', 'xlsx', 'xls'}
 
@@ -853,6 +1152,7 @@ if __name__ == '__main__':
             print("✅ MySQL integration enabled")
         else:
             print("⚠️  MySQL integration not available")
+        start_background_services()
         app.run(debug=True, host='127.0.0.1 ', port=3306)
     else:
         print("❌ Cannot start application: MySQL connection failed!")
\ No newline at end of file
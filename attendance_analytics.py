@@ -0,0 +1,366 @@
+"""Attendance analytics computed with pandas.
+
+The tables behind the reports are loaded once per process into typed
+DataFrames:
+
+- members, events and event attendance from the membership database
+- users and clock-ins from the clock in/out database (mysql_integration.py)
+
+Ids are int32 and repeated strings (status, event type, department) are
+categoricals, so the frames stay small and group-bys run on integer codes.
+
+Later reads pick up new rows incrementally. After ANALYTICS_REFRESH_INTERVAL
+seconds, each table is re-read from its watermark, which is the newest
+recognized_at, clock_in or updated_at seen so far, minus
+ANALYTICS_WATERMARK_OVERLAP seconds to catch rows committed late. Rows that
+were read again replace their old copies. Deleted rows go away at the next
+full reload, every ANALYTICS_FULL_RELOAD seconds.
+
+Every report is answered from the cached frames with vectorized operations
+and returned as JSON-ready lists and dicts for chart_utils.js.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import database
+import config
+
+FETCH_BATCH = 50000
+
+# name: where the rows come from, the key that identifies a row, the watermark column and the column dtypes
+SOURCES = {
+    'members': {
+        'database': None, 'table': 'members', 'key': 'id', 'watermark': 'updated_at', 'where': '1 = 1',
+        'columns': {'id': 'int32', 'fullname': 'object', 'membership_type': 'category', 'status': 'category',
+                    'join_date': 'datetime64[ns]', 'updated_at': 'datetime64[ns]'}
+    },
+    'events': {
+        'database': None, 'table': 'events', 'key': 'id', 'watermark': 'updated_at', 'where': '1 = 1',
+        'columns': {'id': 'int32', 'event_date': 'datetime64[ns]', 'start_time': 'timedelta64[ns]',
+                    'event_type': 'category', 'status': 'category', 'updated_at': 'datetime64[ns]'}
+    },
+    'attendance': {
+        'database': None, 'table': 'attendance', 'key': 'id', 'watermark': 'recognized_at',
+        'where': 'member_id IS NOT NULL AND event_id IS NOT NULL',
+        'columns': {'id': 'int32', 'member_id': 'int32', 'event_id': 'int32', 'recognized_at': 'datetime64[ns]'}
+    },
+    'clock_users': {
+        'database': 'clock', 'table': 'users', 'key': 'user_id', 'watermark': 'updated_at', 'where': '1 = 1',
+        'columns': {'user_id': 'category', 'department': 'category', 'updated_at': 'datetime64[ns]'}
+    },
+    'clock_ins': {
+        'database': 'clock', 'table': 'attendance', 'key': 'id', 'watermark': 'clock_in', 'where': 'clock_in IS NOT NULL',
+        'columns': {'id': 'int32', 'user_id': 'category', 'clock_in': 'datetime64[ns]'}
+    }
+}
+
+# Minutes after the start time; the first bucket is everyone on time or early
+LATENESS_BINS = [-np.inf, 0, 5, 15, 30, 60, np.inf]
+LATENESS_LABELS = ['On time', '1-5 min', '6-15 min', '16-30 min', '31-60 min', 'Over 60 min']
+
+def typed_frame(rows, columns):
+    """DataFrame of query rows with the dtypes of columns"""
+    frame = pd.DataFrame.from_records(rows, columns=list(columns))
+    for name, dtype in columns.items():
+        if dtype.startswith('datetime64'):
+            frame[name] = pd.to_datetime(frame[name])
+        elif dtype.startswith('timedelta64'):
+            frame[name] = pd.to_timedelta(frame[name])
+        elif dtype != 'object':
+            frame[name] = frame[name].astype(dtype)
+    return frame
+
+def categorize(frame, columns):
+    """Re-encode categoricals that concat turned back into objects"""
+    for name, dtype in columns.items():
+        if dtype == 'category' and frame[name].dtype != 'category':
+            frame[name] = frame[name].astype('category')
+    return frame
+
+class CachedFrame:
+    """One table held as a DataFrame and refreshed from its watermark"""
+
+    def __init__(self, source):
+        self.source = source
+        self.frame = None
+        self.refreshed_at = 0
+        self.reloaded_at = 0
+
+    def connect(self):
+        if self.source['database'] == 'clock':
+            return database.get_db_connection(config.Config.CLOCK_DB_NAME)
+        return database.get_db_connection()
+
+    def load(self, since=None):
+        source = self.source
+        query = f"SELECT {', '.join(source['columns'])} FROM {source['table']} WHERE {source['where']}"
+        params = ()
+        if since is not None:
+            query += f" AND {source['watermark']} >= %s"
+            params = (since,)
+
+        conn = self.connect()
+        if conn is None:
+            raise RuntimeError(f"no database connection for {source['table']}")
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(query, params)
+            chunks = []
+            while True:
+                rows = cursor.fetchmany(FETCH_BATCH)
+                if not rows:
+                    break
+                chunks.append(typed_frame(rows, source['columns']))
+        finally:
+            cursor.close()
+            conn.close()
+
+        if not chunks:
+            return typed_frame([], source['columns'])
+        return categorize(pd.concat(chunks, ignore_index=True), source['columns'])
+
+    def get(self):
+        """The current frame, re-read in full or from the watermark when it is due"""
+        now = time.time()
+        if self.frame is not None and now - self.refreshed_at < config.Config.ANALYTICS_REFRESH_INTERVAL:
+            return self.frame
+
+        latest = self.frame[self.source['watermark']].max() if self.frame is not None else pd.NaT
+        if pd.isna(latest) or now - self.reloaded_at >= config.Config.ANALYTICS_FULL_RELOAD:
+            frame = self.load()
+            self.reloaded_at = now
+        else:
+            since = latest - timedelta(seconds=config.Config.ANALYTICS_WATERMARK_OVERLAP)
+            changed = self.load(since.to_pydatetime())
+            key = self.source['key']
+            kept = self.frame[~self.frame[key].isin(changed[key])]
+            frame = categorize(pd.concat([kept, changed], ignore_index=True), self.source['columns'])
+
+        self.frame = frame
+        self.refreshed_at = now
+        return frame
+
+def today():
+    return pd.Timestamp(datetime.now().date())
+
+def held_events(events, start=None):
+    """Events that have taken place (not cancelled), oldest first"""
+    held = events[(events['event_date'] <= today()) & (events['status'] != 'cancelled')]
+    if start is not None:
+        held = held[held['event_date'] >= start]
+    return held.sort_values(['event_date', 'start_time', 'id'])
+
+def joined_by(join_dates, dates):
+    """For each of dates, how many of join_dates are on or before it"""
+    sorted_joins = np.sort(join_dates.fillna(pd.Timestamp('1970-01-01')).to_numpy())
+    return np.searchsorted(sorted_joins, dates.to_numpy(), side='right')
+
+def week_start(timestamps):
+    """Monday 00:00 of each timestamp's week"""
+    return timestamps.dt.normalize() - pd.to_timedelta(timestamps.dt.weekday, unit='D')
+
+def with_label(series, missing):
+    """A categorical's values as strings, with missing values named"""
+    return series.astype(object).where(series.notna(), missing)
+
+def records(frame):
+    """Rows as dicts of plain Python values, missing values as None"""
+    frame = frame.astype(object)
+    return frame.where(frame.notna(), None).to_dict('records')
+
+def lateness_summary(minutes):
+    counts = pd.cut(minutes, LATENESS_BINS, labels=LATENESS_LABELS).value_counts(sort=False)
+    return {
+        'counts': [int(count) for count in counts.to_numpy()],
+        'total': int(minutes.size),
+        'late_share': round(float((minutes > 0).mean()), 4) if minutes.size else None,
+        'median_minutes': round(float(minutes.median()), 1) if minutes.size else None,
+        'p90_minutes': round(float(minutes.quantile(0.9)), 1) if minutes.size else None
+    }
+
+class AttendanceAnalytics:
+    """Attendance reports over cached, incrementally refreshed DataFrames"""
+
+    def __init__(self):
+        self.cache = {name: CachedFrame(source) for name, source in SOURCES.items()}
+        self.lock = threading.Lock()
+
+    def frames(self, *names):
+        # Loads are serialized; callers then compute on their own references to the frames
+        with self.lock:
+            return [self.cache[name].get() for name in names]
+
+    def member_rates(self, limit=50, lowest=False):
+        """Share of the events held since they joined that each active member attended"""
+        members, events, attendance = self.frames('members', 'events', 'attendance')
+        held = held_events(events)
+        active = members[members['status'] == 'active']
+        join_dates = active['join_date'].fillna(pd.Timestamp('1970-01-01'))
+
+        # Events held on or after each member's join date
+        held_dates = np.sort(held['event_date'].to_numpy())
+        eligible = len(held_dates) - np.searchsorted(held_dates, join_dates.to_numpy(), side='left')
+
+        attended = attendance[['member_id', 'event_id']].merge(
+            held[['id', 'event_date']], left_on='event_id', right_on='id').merge(
+            pd.DataFrame({'member_id': active['id'], 'join_date': join_dates}), on='member_id')
+        attended = attended[attended['event_date'] >= attended['join_date']]
+        counts = attended['member_id'].value_counts()
+
+        result = pd.DataFrame({
+            'member_id': active['id'].to_numpy(),
+            'fullname': active['fullname'].to_numpy(),
+            'membership_type': with_label(active['membership_type'], None).to_numpy(),
+            'attended': counts.reindex(active['id'], fill_value=0).to_numpy(),
+            'eligible': eligible
+        })
+        result['rate'] = (result['attended'] / result['eligible'].replace(0, np.nan)).round(4)
+        result = result.sort_values(['rate', 'attended'], ascending=lowest, na_position='last')
+        return records(result.head(limit))
+
+    def department_rates(self, days=30):
+        """Share of workdays in the last days that each department's users clocked in"""
+        users, clock_ins = self.frames('clock_users', 'clock_ins')
+        end = today()
+        start = end - pd.Timedelta(days=days - 1)
+        workdays = int(np.busday_count(start.date(), (end + pd.Timedelta(days=1)).date()))
+
+        departments = pd.DataFrame({'user_id': users['user_id'].astype(object),
+                                    'department': with_label(users['department'], 'Unassigned')})
+        window = clock_ins[clock_ins['clock_in'] >= start]
+        present = pd.DataFrame({'user_id': window['user_id'].astype(object),
+                                'day': window['clock_in'].dt.normalize()})
+        present = present[present['day'].dt.weekday < 5].drop_duplicates().merge(departments, on='user_id')
+
+        result = pd.DataFrame({
+            'users': departments.groupby('department').size(),
+            'present_users': present.groupby('department')['user_id'].nunique(),
+            'present_days': present.groupby('department').size()
+        }).fillna(0).astype(int)
+        result['workdays'] = workdays
+        result['rate'] = (result['present_days'] / (result['users'] * workdays).replace(0, np.nan)).round(4)
+        result = result.rename_axis('department').reset_index().sort_values('rate', ascending=False)
+        return records(result)
+
+    def event_type_rates(self, days=365):
+        """Events held, attendance and turnout (attendees per active member) by event type"""
+        members, events, attendance = self.frames('members', 'events', 'attendance')
+        held = held_events(events, today() - pd.Timedelta(days=days - 1))
+        active = members[members['status'] == 'active']
+
+        per_event = pd.DataFrame({
+            'event_type': with_label(held['event_type'], 'Unspecified').to_numpy(),
+            'attended': attendance['event_id'].value_counts().reindex(held['id'], fill_value=0).to_numpy(),
+            'eligible': joined_by(active['join_date'], held['event_date'])
+        })
+        result = per_event.groupby('event_type').agg(
+            events=('attended', 'size'), attendance=('attended', 'sum'), eligible=('eligible', 'sum'))
+        result['avg_attendance'] = (result['attendance'] / result['events']).round(1)
+        result['rate'] = (result['attendance'] / result['eligible'].replace(0, np.nan)).round(4)
+        result = result.drop(columns='eligible').reset_index().sort_values('attendance', ascending=False)
+        return records(result)
+
+    def streaks(self, limit=20):
+        """Members' current and longest runs of consecutive events attended"""
+        members, events, attendance = self.frames('members', 'events', 'attendance')
+        held = held_events(events)
+        if held.empty:
+            return []
+        rank = pd.Series(np.arange(len(held)), index=held['id'].to_numpy())
+
+        attended = pd.DataFrame({'member_id': attendance['member_id'].to_numpy(),
+                                 'rank': attendance['event_id'].map(rank).to_numpy()})
+        attended = attended.dropna().astype('int64').sort_values(['member_id', 'rank'])
+        if attended.empty:
+            return []
+
+        # A run starts at each member's first event and wherever an event was missed
+        new_run = (attended['member_id'].diff() != 0) | (attended['rank'].diff() != 1)
+        runs = attended.groupby(new_run.cumsum()).agg(
+            member_id=('member_id', 'first'), length=('rank', 'size'), last=('rank', 'max'))
+        runs['current'] = runs['length'].where(runs['last'] == len(held) - 1, 0)
+
+        result = runs.groupby('member_id').agg(current_streak=('current', 'max'), longest_streak=('length', 'max'))
+        result['fullname'] = result.index.map(members.set_index('id')['fullname'])
+        result = result.rename_axis('member_id').reset_index()
+        result = result.sort_values(['current_streak', 'longest_streak'], ascending=False)
+        return records(result.head(limit)[['member_id', 'fullname', 'current_streak', 'longest_streak']])
+
+    def lateness(self, source='events', days=90, grouped=False):
+        """How long after the start time attendance was recorded, in LATENESS_LABELS buckets
+
+        source 'events' measures recognition against each event's start time,
+        'clock' measures clock-ins against ANALYTICS_WORKDAY_START. grouped adds
+        the buckets per event type or department.
+        """
+        start = today() - pd.Timedelta(days=days - 1)
+        if source == 'clock':
+            users, clock_ins = self.frames('clock_users', 'clock_ins')
+            window = clock_ins[clock_ins['clock_in'] >= start]
+            hours, minutes = config.Config.ANALYTICS_WORKDAY_START.split(':')
+            starts = window['clock_in'].dt.normalize() + pd.Timedelta(hours=int(hours), minutes=int(minutes))
+            late = (window['clock_in'] - starts).dt.total_seconds() / 60
+            groups = window['user_id'].astype(object).map(
+                pd.Series(with_label(users['department'], 'Unassigned').to_numpy(), index=users['user_id'].astype(object)))
+        else:
+            events, attendance = self.frames('events', 'attendance')
+            timed = held_events(events, start)
+            timed = timed[timed['start_time'].notna()]
+            window = attendance[['event_id', 'recognized_at']].merge(
+                timed[['id', 'event_date', 'start_time', 'event_type']], left_on='event_id', right_on='id')
+            late = (window['recognized_at'] - (window['event_date'] + window['start_time'])).dt.total_seconds() / 60
+            groups = with_label(window['event_type'], 'Unspecified')
+
+        result = {'source': source, 'days': days, 'labels': LATENESS_LABELS}
+        result.update(lateness_summary(late))
+        if grouped:
+            frame = pd.DataFrame({'group': groups.fillna('Unassigned').to_numpy(), 'minutes': late.to_numpy()})
+            result['groups'] = {group: lateness_summary(part['minutes'])
+                                for group, part in frame.groupby('group')}
+        return result
+
+    def weekly_trends(self, source='events', weeks=12):
+        """Attendance per week (Monday to Sunday) and the change from the week before"""
+        if source == 'clock':
+            clock_ins, = self.frames('clock_ins')
+            timestamps, attendees = clock_ins['clock_in'], clock_ins['user_id'].astype(object)
+        else:
+            attendance, = self.frames('attendance')
+            timestamps, attendees = attendance['recognized_at'], attendance['member_id']
+
+        first_week = week_start(pd.Series([today()])).iloc[0] - pd.Timedelta(weeks=weeks - 1)
+        recent = timestamps >= first_week
+        frame = pd.DataFrame({'week': week_start(timestamps[recent]), 'attendee': attendees[recent]})
+        all_weeks = pd.date_range(first_week, periods=weeks, freq='7D')
+
+        result = frame.groupby('week').agg(attendance=('attendee', 'size'), unique_attendees=('attendee', 'nunique'))
+        result = result.reindex(all_weeks, fill_value=0).astype(int)
+        previous = result['attendance'].shift(1).replace(0, np.nan)
+        result['change_pct'] = ((result['attendance'] - previous) / previous * 100).round(1)
+        result = result.rename_axis('week').reset_index()
+        result['week'] = result['week'].dt.strftime('%Y-%m-%d')
+        return records(result)
+
+# Global analytics instance
+analytics = AttendanceAnalytics()
+
+def member_attendance_rates(limit=50, lowest=False):
+    return analytics.member_rates(limit, lowest)
+
+def department_attendance_rates(days=30):
+    return analytics.department_rates(days)
+
+def event_type_attendance_rates(days=365):
+    return analytics.event_type_rates(days)
+
+def attendance_streaks(limit=20):
+    return analytics.streaks(limit)
+
+def lateness_distribution(source='events', days=90, grouped=False):
+    return analytics.lateness(source, days, grouped)
+
+def weekly_trends(source='events', weeks=12):
+    return analytics.weekly_trends(source, weeks)
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""Write-behind buffer for recognized attendance.
+
+With ATTENDANCE_WRITE_BEHIND on, record_attendance() hands rows to this
+buffer instead of writing them itself. A flusher thread writes them every
+ATTENDANCE_FLUSH_INTERVAL_MS, or as soon as ATTENDANCE_FLUSH_ROWS are
+waiting, as multi-row inserts (see attendance_tracker.write_attendance).
+
+Each row is appended to a per-process journal in ATTENDANCE_JOURNAL_DIR
+before it is acknowledged. While a batch is being written its journal is
+renamed to *.flushing and is deleted only after the commit. On startup, a
+process adopts the journals of processes that are no longer running and
+replays them. A row only changes when it is new or its confidence improves,
+so replaying rows that were already committed is harmless.
+"""
+import atexit
+import glob
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+import database
+import config
+import metrics
+import attendance_tracker
+
+JOURNAL_NAME = re.compile(r'^attendance-(\d+)\.jsonl(\.flushing|\.replay-\d+)?$')
+
+flush_seconds = metrics.registry.register(metrics.Histogram(
+    'attendance_flush_seconds', 'Time to write one batch of buffered attendance'))
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+class AttendanceBuffer(threading.Thread):
+    def __init__(self, journal_dir=None, flush_interval_ms=None, flush_rows=None, fsync=None):
+        super().__init__(name='attendance-flusher', daemon=True)
+        self.journal_dir = journal_dir or config.Config.ATTENDANCE_JOURNAL_DIR
+        self.flush_interval = (flush_interval_ms or config.Config.ATTENDANCE_FLUSH_INTERVAL_MS) / 1000
+        self.flush_rows = flush_rows or config.Config.ATTENDANCE_FLUSH_ROWS
+        self.fsync = config.Config.ATTENDANCE_JOURNAL_FSYNC if fsync is None else fsync
+        self.journal_path = os.path.join(self.journal_dir, f"attendance-{os.getpid()}.jsonl")
+        self.flushing_path = self.journal_path + '.flushing'
+
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.pending = {}
+        self.stopped = False
+
+        os.makedirs(self.journal_dir, exist_ok=True)
+        self.recover()
+
+    def add(self, member_id, event_id, recognized_at, confidence):
+        """Journal one row and queue it for the next flush"""
+        with self.lock:
+            self.append_journal(member_id, event_id, recognized_at, confidence)
+            self.merge(member_id, event_id, recognized_at, confidence)
+            if len(self.pending) >= self.flush_rows:
+                self.wakeup.notify()
+
+    def append_journal(self, member_id, event_id, recognized_at, confidence):
+        self.journal.write(json.dumps({'member_id': member_id, 'event_id': event_id,
+                                       'recognized_at': recognized_at.isoformat(), 'confidence': confidence}) + '\n')
+        self.journal.flush()
+        if self.fsync:
+            os.fsync(self.journal.fileno())
+
+    def merge(self, member_id, event_id, recognized_at, confidence):
+        """Coalesce repeats the way the upsert would: first sighting, best confidence"""
+        key = (member_id, event_id)
+        previous = self.pending.get(key)
+        if previous:
+            recognized_at = min(recognized_at, previous[0])
+            confidence = max(confidence, previous[1])
+        self.pending[key] = (recognized_at, confidence)
+
+    def recover(self):
+        """Adopt journals left by crashed processes, then open this process's journal"""
+        claimed = []
+        for path in sorted(glob.glob(os.path.join(self.journal_dir, 'attendance-*.jsonl*'))):
+            match = JOURNAL_NAME.match(os.path.basename(path))
+            if not match:
+                continue
+            # Our own pid here means a previous process that crashed with the same pid
+            if int(match.group(1)) != os.getpid() and process_alive(int(match.group(1))):
+                continue
+
+            # Renaming first means only one process replays a given journal
+            replay_path = f"{self.journal_path}.replay-{time.time_ns()}"
+            try:
+                os.rename(path, replay_path)
+            except OSError:
+                continue
+            claimed.append(replay_path)
+            self.read_journal(replay_path)
+
+        self.journal = open(self.journal_path, 'a', encoding='utf-8')
+        if claimed:
+            # Carry the rows over before dropping the adopted files
+            for (member_id, event_id), (recognized_at, confidence) in self.pending.items():
+                self.append_journal(member_id, event_id, recognized_at, confidence)
+            for path in claimed:
+                os.remove(path)
+            print(f"📒 Replaying {len(self.pending)} buffered attendance rows from {len(claimed)} journal(s)")
+
+    def read_journal(self, path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    # A crash can leave a half-written last line
+                    continue
+                self.merge(row['member_id'], row['event_id'],
+                           datetime.fromisoformat(row['recognized_at']), row['confidence'])
+
+    def run(self):
+        while True:
+            with self.lock:
+                if not self.stopped and len(self.pending) < self.flush_rows:
+                    self.wakeup.wait(self.flush_interval)
+                if self.stopped:
+                    return
+            self.flush()
+
+    def flush(self):
+        """Write everything queued so far; failed batches stay queued"""
+        with self.flush_lock:
+            with self.lock:
+                if not self.pending:
+                    return 0
+                batch, self.pending = self.pending, {}
+                self.journal.close()
+                os.replace(self.journal_path, self.flushing_path)
+                self.journal = open(self.journal_path, 'a', encoding='utf-8')
+
+            try:
+                started = time.perf_counter()
+                self.write(batch)
+                flush_seconds.observe(time.perf_counter() - started)
+                metrics.attendance_rows_written.inc(len(batch))
+                os.remove(self.flushing_path)
+                return len(batch)
+            except Exception as e:
+                print(f"❌ Error flushing {len(batch)} attendance rows: {e}")
+                with self.lock:
+                    for (member_id, event_id), (recognized_at, confidence) in batch.items():
+                        self.append_journal(member_id, event_id, recognized_at, confidence)
+                        self.merge(member_id, event_id, recognized_at, confidence)
+                os.remove(self.flushing_path)
+                return 0
+
+    def write(self, batch):
+        rows = [(member_id, event_id, recognized_at, confidence)
+                for (member_id, event_id), (recognized_at, confidence) in batch.items()]
+        conn = database.get_db_connection()
+        if conn is None:
+            raise RuntimeError("no database connection")
+        cursor = conn.cursor()
+
+        try:
+            # Rollup deltas go in the same transaction, so the reports never count a batch that was rolled back
+            attendance_tracker.write_attendance(conn, cursor, rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    def depth(self):
+        with self.lock:
+            return len(self.pending)
+
+    def stop(self):
+        """Flush what is left and close the journal (runs at exit)"""
+        with self.lock:
+            self.stopped = True
+            self.wakeup.notify()
+        self.flush()
+        with self.lock:
+            self.journal.close()
+            if not self.pending and os.path.getsize(self.journal_path) == 0:
+                os.remove(self.journal_path)
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+def get_buffer():
+    """Start this process's buffer on first use, replaying any orphaned journals"""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = AttendanceBuffer()
+                _buffer.start()
+                atexit.register(_buffer.stop)
+    return _buffer
+
+def enabled():
+    return config.Config.ATTENDANCE_WRITE_BEHIND
+
+def add(member_id, event_id, recognized_at, confidence):
+    get_buffer().add(member_id, event_id, recognized_at, confidence)
+
+def flush():
+    return _buffer.flush() if _buffer is not None else 0
+
+metrics.register_gauge('attendance_buffer_depth', 'Attendance rows waiting to be flushed',
+                       lambda: _buffer.depth() if _buffer is not None else 0)
\ No newline at end of file
@@ -0,0 +1,184 @@
+import threading
+import time
+from datetime import datetime
+import database
+import config
+import attendance_buffer
+import face_utils
+import metrics
+import report_rollups
+
+class AttendanceTracker:
+    """In-memory record of who is already marked present at each open event"""
+    
+    def __init__(self, ttl=None, min_improvement=None):
+        self.ttl = ttl if ttl is not None else config.Config.ATTENDANCE_DEDUP_TTL
+        self.min_improvement = min_improvement if min_improvement is not None else config.Config.ATTENDANCE_MIN_CONFIDENCE_GAIN
+        self.events = {}
+        self.lock = threading.Lock()
+    
+    def open_event(self, event_id):
+        """Load the members already marked for an event from the database"""
+        conn = database.get_db_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("SELECT member_id, confidence FROM attendance WHERE event_id = %s", (event_id,))
+            marked = {member_id: float(confidence or 0) for member_id, confidence in cursor.fetchall()}
+        except Exception as e:
+            print(f"❌ Error loading attendance for event {event_id}: {e}")
+            marked = {}
+        finally:
+            cursor.close()
+            conn.close()
+        
+        with self.lock:
+            self.events[event_id] = {'members': marked, 'expires_at': time.monotonic() + self.ttl}
+            self.expire()
+        return marked
+    
+    def expire(self):
+        """Forget events whose session has been idle longer than the TTL"""
+        now = time.monotonic()
+        for event_id in [event_id for event_id, entry in self.events.items() if entry['expires_at'] < now]:
+            del self.events[event_id]
+    
+    def get_event(self, event_id):
+        with self.lock:
+            entry = self.events.get(event_id)
+            if entry and entry['expires_at'] >= time.monotonic():
+                entry['expires_at'] = time.monotonic() + self.ttl
+                return entry['members']
+        
+        return self.open_event(event_id)
+    
+    def should_record(self, event_id, member_id, confidence):
+        """True when the member is new to the event or recognized with clearly better confidence"""
+        members = self.get_event(event_id)
+        with self.lock:
+            previous = members.get(member_id)
+        return previous is None or confidence - previous >= self.min_improvement
+    
+    def mark(self, event_id, member_id, confidence):
+        members = self.get_event(event_id)
+        with self.lock:
+            members[member_id] = max(confidence, members.get(member_id, 0))
+
+MAX_ROWS_PER_STATEMENT = 1000
+
+def write_attendance(conn, cursor, rows):
+    """Write (member_id, event_id, recognized_at, confidence) rows and their rollup deltas; the caller commits
+
+    Keeps the first recognition and the best confidence of each row. Must be
+    the first thing in the transaction, since a partly new batch is rolled
+    back and written row by row. Returns the rows that were written.
+    """
+    # Sorted, so concurrent writers lock attendance rows in the same order
+    rows = sorted(((member_id, event_id, recognized_at, round(float(confidence), 4))
+                   for member_id, event_id, recognized_at, confidence in rows),
+                  key=lambda row: (row[1], row[0]))
+
+    # Usually every row is new: insert them all and count each as a new row
+    inserted = 0
+    for start in range(0, len(rows), MAX_ROWS_PER_STATEMENT):
+        chunk = rows[start:start + MAX_ROWS_PER_STATEMENT]
+        cursor.execute("INSERT IGNORE INTO attendance (member_id, event_id, status, recognized_at, confidence) VALUES "
+                       + ', '.join(["(%s, %s, 'present', %s, %s)"] * len(chunk)),
+                       [value for row in chunk for value in row])
+        inserted += cursor.rowcount
+    if inserted == len(rows):
+        report_rollups.attendance_changed(cursor, [(member_id, event_id, recognized_at, 1, confidence, 1)
+                                                   for member_id, event_id, recognized_at, confidence in rows])
+        return rows
+
+    # Some rows already exist: start over and work out each row's delta
+    conn.rollback()
+    changes = []
+    written = []
+    for member_id, event_id, recognized_at, confidence in rows:
+        cursor.execute("""
+            INSERT IGNORE INTO attendance (member_id, event_id, status, recognized_at, confidence)
+            VALUES (%s, %s, 'present', %s, %s)
+        """, (member_id, event_id, recognized_at, confidence))
+        if cursor.rowcount == 1:
+            changes.append((member_id, event_id, recognized_at, 1, confidence, 1))
+            written.append((member_id, event_id, recognized_at, confidence))
+            continue
+
+        cursor.execute("SELECT status, confidence FROM attendance WHERE member_id = %s AND event_id = %s FOR UPDATE",
+                       (member_id, event_id))
+        existing = cursor.fetchone()
+        if existing is None:
+            print(f"⚠️  Skipping attendance of member {member_id} at event {event_id}: member or event no longer exists")
+            continue
+        status, previous = existing
+        previous = None if previous is None else float(previous)
+        best = round(max(previous or 0, confidence), 4)
+        if status != 'present' or best != previous:
+            cursor.execute("UPDATE attendance SET status = 'present', confidence = %s WHERE member_id = %s AND event_id = %s",
+                           (best, member_id, event_id))
+            changes.append((member_id, event_id, None, 0, best - (previous or 0), int(previous is None)))
+        written.append((member_id, event_id, recognized_at, confidence))
+    report_rollups.attendance_changed(cursor, changes)
+    return written
+
+# Global instance
+tracker = AttendanceTracker()
+
+def open_event(event_id):
+    return tracker.open_event(event_id)
+
+def should_record(event_id, member_id, confidence):
+    return tracker.should_record(event_id, member_id, confidence)
+
+def mark(event_id, member_id, confidence):
+    tracker.mark(event_id, member_id, confidence)
+
+def record_attendance(event_id, recognized_members):
+    """Mark recognized (member_id, confidence) pairs present, returning (success_count, recognized_details)"""
+    recognized_at = datetime.now()
+    success_count = 0
+    recognized_details = []
+    pending_writes = []
+    
+    for member_id, confidence in recognized_members:
+        already_marked = not tracker.should_record(event_id, member_id, confidence)
+        if not already_marked:
+            pending_writes.append((member_id, confidence))
+        recognized_details.append({
+            'name': face_utils.get_member_name(member_id),
+            'confidence': round(confidence * 100, 2),
+            'already_marked': already_marked
+        })
+    
+    # Repeat captures of members already present never touch the database
+    if pending_writes and attendance_buffer.enabled():
+        # Acknowledged from memory; the buffer journals the rows and writes them in batches
+        with metrics.timed('db_write'):
+            for member_id, confidence in pending_writes:
+                attendance_buffer.add(member_id, event_id, recognized_at, confidence)
+                tracker.mark(event_id, member_id, confidence)
+        success_count = len(pending_writes)
+    elif pending_writes:
+        with metrics.timed('db_write'):
+            conn = database.get_db_connection()
+            cursor = conn.cursor()
+            
+            try:
+                written = write_attendance(conn, cursor, [(member_id, event_id, recognized_at, confidence)
+                                                          for member_id, confidence in pending_writes])
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+                conn.close()
+        
+        # Cache members only once their rows are committed, so a failed write is retried on the next capture
+        for member_id, _, _, confidence in written:
+            tracker.mark(event_id, member_id, confidence)
+        success_count = len(written)
+        metrics.attendance_rows_written.inc(success_count)
+    
+    return success_count, recognized_details
\ No newline at end of file
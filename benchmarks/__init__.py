@@ -0,0 +1,6 @@
+"""Offline performance benchmarks.
+
+Run from the repository root, e.g.:
+    python -m benchmarks.recognition --stub-models --sizes 1000 10000 100000
+    python benchmarks/frame_decode.py
+"""
\ No newline at end of file
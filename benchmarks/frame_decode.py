@@ -0,0 +1,83 @@
+"""Compare the data-URL frame path with the binary upload path.
+
+Usage:
+    python benchmarks/frame_decode.py [--width 1280 --height 720 --iterations 200]
+
+Reports bytes allocated per frame and milliseconds per frame for:
+  legacy   - data URL -> split -> base64 decode -> imdecode (BGR) -> cvtColor copy
+  binary   - raw JPEG body -> frombuffer -> imdecode -> in-place BGR to RGB
+  reduced2 - binary path decoded at half size with IMREAD_REDUCED_COLOR_2
+"""
+import argparse
+import base64
+import json
+import time
+import cv2
+import numpy as np
+
+def make_frame(width, height, quality=80):
+    """Build a camera-like JPEG: smooth gradient plus sensor noise"""
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = np.stack([np.broadcast_to(x, (height, width)), np.broadcast_to(y, (height, width)),
+                     np.full((height, width), 128, np.float32)], axis=2)
+    frame = np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+    ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return jpeg.tobytes()
+
+def decode_legacy(data_url):
+    """Mirror of the original process_attendance + recognize_faces decode"""
+    encoded = data_url.split(',')[1]
+    image_bytes = base64.b64decode(encoded)
+    image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    return rgb_image, len(encoded) + len(image_bytes) + image.nbytes + rgb_image.nbytes
+
+def decode_binary(image_buffer, flags=cv2.IMREAD_COLOR):
+    """Mirror of face_utils.decode_image"""
+    image = cv2.imdecode(np.frombuffer(image_buffer, np.uint8), flags)
+    cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
+    return image, image.nbytes
+
+def measure(decode, payload, iterations):
+    decode(payload)  # warm up codec tables
+    started = time.perf_counter()
+    for _ in range(iterations):
+        image, copied = decode(payload)
+    elapsed = time.perf_counter() - started
+    return {
+        'ms_per_frame': round(elapsed * 1000 / iterations, 3),
+        'bytes_allocated': copied,
+        'output_shape': list(image.shape)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark frame ingestion decode paths')
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    jpeg = make_frame(args.width, args.height)
+    data_url = 'data:image/jpeg;base64,' + base64.b64encode(jpeg).decode('ascii')
+
+    results = {
+        'frame': {'width': args.width, 'height': args.height, 'jpeg_bytes': len(jpeg)},
+        'legacy': measure(decode_legacy, data_url, args.iterations),
+        'binary': measure(decode_binary, jpeg, args.iterations),
+        'reduced2': measure(lambda buf: decode_binary(buf, cv2.IMREAD_REDUCED_COLOR_2), jpeg, args.iterations)
+    }
+
+    print(f"Frame {args.width}x{args.height}, JPEG {len(jpeg)} bytes, {args.iterations} iterations")
+    for name in ('legacy', 'binary', 'reduced2'):
+        result = results[name]
+        print(f"  {name:9} {result['ms_per_frame']:8.3f} ms/frame  {result['bytes_allocated']:>10} bytes allocated")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
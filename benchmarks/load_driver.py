@@ -0,0 +1,169 @@
+"""Replay a weighted mix of route calls against the app and a local MySQL.
+
+Usage:
+    python -m benchmarks.load_driver --requests 2000 --threads 8
+    python -m benchmarks.load_driver --duration 60 --mix dashboard=5,reports=2,process_attendance=10
+
+Requests go through Flask's test client in-process, so no web server is
+needed, but every query hits the real database configured in config.py.
+process_attendance runs with stub face models (benchmarks.stubs): frames are
+tiny JPEGs and the "recognized" faces are seeded members, so the request
+exercises decode, matching, dedup and the attendance writes.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+import numpy as np
+from benchmarks.recognition import percentiles, git_commit
+from benchmarks.stubs import install_stub_models
+from benchmarks import synthetic
+
+DEFAULT_MIX = {
+    'dashboard': 4,
+    'reports': 1,
+    'reports_mysql': 1,
+    'member_profile': 2,
+    'process_attendance': 8
+}
+
+def parse_mix(text):
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for item in text.split(','):
+        name, weight = item.split('=')
+        mix[name.strip()] = int(weight)
+    return mix
+
+def load_fixture_ids(database, limit):
+    """Active members and recent events to aim requests at"""
+    conn = database.get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("SELECT id FROM members WHERE status = 'active' ORDER BY id DESC LIMIT %s", (limit,))
+        member_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT id FROM events ORDER BY event_date DESC LIMIT 200")
+        event_ids = [row[0] for row in cursor.fetchall()]
+        return member_ids, event_ids
+    finally:
+        cursor.close()
+        conn.close()
+
+def build_requests(member_ids, event_ids, frame):
+    """Map route names to callables taking a test client"""
+    return {
+        'dashboard': lambda client, rng: client.get('/dashboard'),
+        'reports': lambda client, rng: client.get('/reports'),
+        'reports_mysql': lambda client, rng: client.get('/reports_mysql'),
+        'member_profile': lambda client, rng: client.get(f"/members/{rng.choice(member_ids)}"),
+        'process_attendance': lambda client, rng: client.post(
+            f"/api/process_attendance/frame?event_id={rng.choice(event_ids)}",
+            data=frame, content_type='image/jpeg'),
+    }
+
+def run_worker(app, routes, mix, deadline, remaining, lock, samples, errors, seed):
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = 1
+        session['username'] = 'admin'
+        session['fullname'] = 'Load Test'
+        session['user_role'] = 'admin'
+
+    while time.time() < deadline:
+        with lock:
+            if remaining[0] <= 0:
+                return
+            remaining[0] -= 1
+
+        name = rng.choices(names, weights)[0]
+        started = time.perf_counter()
+        try:
+            response = routes[name](client, rng)
+            failed = response.status_code >= 400
+        except Exception:
+            failed = True
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        with lock:
+            samples[name].append(elapsed_ms)
+            if failed:
+                errors[name] += 1
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test app routes against a local MySQL')
+    parser.add_argument('--requests', type=int, default=1000, help='total requests (across threads)')
+    parser.add_argument('--duration', type=float, default=None, help='stop after this many seconds instead')
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--mix', help='route=weight,... (default: %s)' % ','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items()))
+    parser.add_argument('--gallery-members', type=int, default=5000, help='seeded members placed in the stub gallery')
+    parser.add_argument('--output', default='bench_load.json')
+    args = parser.parse_args()
+
+    stub = install_stub_models()
+
+    import cv2
+    import config
+    import database
+    import face_utils
+    from app import app
+
+    # app.config.from_object(config) picks up no SECRET_KEY, and the test client needs sessions
+    app.secret_key = app.secret_key or config.Config.SECRET_KEY
+
+    member_ids, event_ids = load_fixture_ids(database, args.gallery_members)
+    if not member_ids or not event_ids:
+        print("❌ No active members or events found; run benchmarks.seed_data first")
+        return
+
+    _, names, encodings = synthetic.make_gallery(len(member_ids))
+    face_utils.get_face_system().set_gallery(member_ids, names, encodings)
+    probes, _ = synthetic.make_probes(encodings, member_ids, 5000, genuine_ratio=0.9)
+    stub.set_probes(probes)
+    _, frame = cv2.imencode('.jpg', np.zeros((64, 64, 3), dtype=np.uint8))
+
+    mix = parse_mix(args.mix)
+    routes = build_requests(member_ids, event_ids, frame.tobytes())
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    remaining = [args.requests if args.duration is None else float('inf')]
+    deadline = time.time() + (args.duration or float('inf'))
+
+    started = time.time()
+    threads = [threading.Thread(target=run_worker,
+                                args=(app, routes, mix, deadline, remaining, lock, samples, errors, index))
+               for index in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - started
+
+    results = {}
+    print(f"{'route':20} {'count':>7} {'errors':>7} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name in mix:
+        if not samples[name]:
+            continue
+        stats = percentiles(samples[name])
+        results[name] = dict(stats, count=len(samples[name]), errors=errors[name],
+                             requests_per_second=round(len(samples[name]) / elapsed, 2))
+        print(f"{name:20} {len(samples[name]):>7} {errors[name]:>7} {results[name]['requests_per_second']:>8} "
+              f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}")
+
+    total = sum(len(values) for values in samples.values())
+    print(f"Total {total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s) on {args.threads} thread(s)")
+
+    with open(args.output, 'w') as f:
+        json.dump({'benchmark': 'load', 'commit': git_commit(), 'threads': args.threads, 'mix': mix,
+                   'elapsed_seconds': round(elapsed, 2), 'routes': results}, f, indent=2)
+    print(f"📄 Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,154 @@
+"""Recognition throughput and latency benchmark.
+
+Match-only, fully offline (face_recognition is replaced by a stub):
+    python -m benchmarks.recognition --stub-models --sizes 1000 10000 100000 1000000
+
+With the real dlib models and a folder of probe photos (adds detect/encode):
+    python -m benchmarks.recognition --probe-images probes/ --sizes 10000
+
+Results are written as JSON (--output) together with the git commit, so runs
+can be compared across commits.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+import numpy as np
+from benchmarks import synthetic
+
+def percentiles(samples_ms):
+    samples = np.asarray(samples_ms)
+    return {
+        'p50_ms': round(float(np.percentile(samples, 50)), 4),
+        'p95_ms': round(float(np.percentile(samples, 95)), 4),
+        'p99_ms': round(float(np.percentile(samples, 99)), 4),
+        'mean_ms': round(float(samples.mean()), 4)
+    }
+
+def timed_calls(function, arguments):
+    """Call function once per argument, returning per-call latencies in ms"""
+    latencies = []
+    for argument in arguments:
+        started = time.perf_counter()
+        function(argument)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+def bench_match(system, probes, expected, batch_size):
+    """Single-probe and batched matching against the loaded gallery"""
+    single = timed_calls(system.match_face, probes)
+
+    batches = [probes[i:i + batch_size] for i in range(0, len(probes), batch_size)]
+    batched = timed_calls(system.match_faces, batches)
+
+    matches = system.match_faces(probes)
+    correct = sum(1 for match, member_id in zip(matches, expected) if (match[0] if match else None) == member_id)
+
+    return {
+        'match_face': dict(percentiles(single), faces_per_second=round(len(probes) / (sum(single) / 1000), 1)),
+        'match_faces': dict(percentiles(batched), batch_size=batch_size,
+                            faces_per_second=round(len(probes) / (sum(batched) / 1000), 1)),
+        'accuracy': round(correct / len(probes), 4)
+    }
+
+def bench_recognize(system, frames):
+    """End-to-end recognize_rgb_faces, with the per-stage split from metrics"""
+    import metrics
+
+    latencies = []
+    stages = {}
+    for frame in frames:
+        metrics.begin_request()
+        started = time.perf_counter()
+        system.recognize_rgb_faces(frame)
+        latencies.append((time.perf_counter() - started) * 1000)
+        for stage, elapsed_ms in (metrics.end_request() or {}).items():
+            stages.setdefault(stage, []).append(elapsed_ms)
+
+    return dict(percentiles(latencies),
+                frames_per_second=round(len(frames) / (sum(latencies) / 1000), 2),
+                stages={stage: percentiles(samples) for stage, samples in stages.items()})
+
+def load_probe_frames(face_utils, directory, limit):
+    paths = sorted(glob.glob(os.path.join(directory, '*')))[:limit]
+    frames = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            frame = face_utils.decode_image(f.read())
+        if frame is not None:
+            frames.append(frame)
+    return frames
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark face matching and recognition')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='gallery sizes')
+    parser.add_argument('--probes', type=int, default=500, help='probe encodings per gallery size')
+    parser.add_argument('--batch-size', type=int, default=8, help='faces per match_faces call')
+    parser.add_argument('--frames', type=int, default=200, help='frames for the recognize_faces run')
+    parser.add_argument('--faces-per-frame', type=int, default=1, help='faces the stub detector reports per frame')
+    parser.add_argument('--stub-models', action='store_true', help='replace face_recognition with a stub (match-only)')
+    parser.add_argument('--probe-images', help='directory of probe photos for detect/encode timings (real models)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_recognition.json', help='JSON results file')
+    args = parser.parse_args()
+
+    stub = None
+    if args.stub_models:
+        from benchmarks.stubs import install_stub_models
+        stub = install_stub_models(args.faces_per_frame)
+
+    import face_utils
+
+    results = []
+    for size in args.sizes:
+        member_ids, names, encodings = synthetic.make_gallery(size, args.seed)
+        probes, expected = synthetic.make_probes(encodings, member_ids, args.probes, seed=args.seed + 1)
+
+        system = face_utils.AdvancedFaceRecognition(load=False)
+        started = time.perf_counter()
+        system.set_gallery(member_ids, names, encodings)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        result = {'gallery_size': size, 'gallery_build_ms': round(build_ms, 2)}
+        result.update(bench_match(system, probes, expected, args.batch_size))
+
+        if stub is not None:
+            stub.set_probes(probes)
+            blank_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+            result['recognize_faces'] = bench_recognize(system, [blank_frame] * args.frames)
+        elif args.probe_images:
+            frames = load_probe_frames(face_utils, args.probe_images, args.frames)
+            result['recognize_faces'] = bench_recognize(system, frames)
+
+        results.append(result)
+        print(f"gallery {size:>8}: match_face p50 {result['match_face']['p50_ms']} ms, "
+              f"match_faces {result['match_faces']['faces_per_second']} faces/s, accuracy {result['accuracy']}")
+
+    report = {
+        'benchmark': 'recognition',
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'stub_models': bool(stub),
+        'arguments': vars(args),
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"📄 Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""Plan analysis benchmark on generated documents.
+
+    python -m benchmarks.report_analysis --size-mb 50
+    python -m benchmarks.report_analysis --size-mb 5 --format csv
+    python -m benchmarks.report_analysis --size-mb 20 --format numeric   # spreadsheet dump, almost all numbers
+
+Writes a synthetic plan of the requested size, times
+report_analyzer.analyze_document on it and reports MB/s and peak Python
+memory (tracemalloc).
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from benchmarks.recognition import git_commit
+
+VOCABULARY = ("the members event training budget cost goal target objective growth success risk "
+              "challenge issue improve milestone schedule deadline attendance program community "
+              "plan quarter annual review funding report support volunteer outreach").split()
+
+def write_text(path, size_bytes, rng):
+    with open(path, 'w', encoding='utf-8') as f:
+        written = 0
+        while written < size_bytes:
+            sentence = ' '.join(rng.choice(VOCABULARY) for _ in range(rng.randint(8, 20))).capitalize()
+            if rng.random() < 0.2:
+                sentence += f" Goal: reach {rng.randint(10, 5000)} members by Q{rng.randint(1, 4)}"
+            if rng.random() < 0.3:
+                sentence += f" with {rng.randint(1, 99)}% growth and ${rng.randint(1, 900)},{rng.randint(100, 999)} budget"
+            line = sentence + '. '
+            if rng.random() < 0.1:
+                line += '\n'
+            f.write(line)
+            written += len(line)
+
+def write_csv(path, size_bytes, rng):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("quarter,program,target_members,actual_members,budget,spent,growth_pct,notes\n")
+        written = 0
+        while written < size_bytes:
+            line = (f"Q{rng.randint(1, 4)},{rng.choice(VOCABULARY)},{rng.randint(10, 5000)},{rng.randint(10, 5000)},"
+                    f"{rng.randint(1000, 900000)}.{rng.randint(0, 99):02d},{rng.randint(1000, 900000)},"
+                    f"{rng.uniform(-20, 80):.1f}%,{' '.join(rng.choice(VOCABULARY) for _ in range(4))}\n")
+            f.write(line)
+            written += len(line)
+
+def write_numeric_csv(path, size_bytes, rng):
+    """Wide rows of figures with no prose: worst case for metric extraction"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(','.join(f"col{i}" for i in range(20)) + '\n')
+        written = 0
+        while written < size_bytes:
+            line = ','.join(f"{rng.randint(0, 99999)}.{rng.randint(0, 99):02d}" if rng.random() < 0.5 else str(rng.randint(0, 9999999))
+                            for _ in range(20)) + '\n'
+            f.write(line)
+            written += len(line)
+
+WRITERS = {'txt': write_text, 'csv': write_csv, 'numeric': write_numeric_csv}
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ReportAnalyzer on a generated plan')
+    parser.add_argument('--size-mb', type=float, default=10)
+    parser.add_argument('--format', choices=sorted(WRITERS), default='txt')
+    parser.add_argument('--runs', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_report_analysis.json')
+    args = parser.parse_args()
+
+    import report_analyzer
+
+    rng = random.Random(args.seed)
+    fd, path = tempfile.mkstemp(suffix='.txt' if args.format == 'txt' else '.csv')
+    os.close(fd)
+    try:
+        WRITERS[args.format](path, int(args.size_mb * 1024 * 1024), rng)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+
+        timings = []
+        peak_mb = 0
+        for _ in range(args.runs):
+            tracemalloc.start()
+            started = time.perf_counter()
+            analysis = report_analyzer.analyze_document(path)
+            timings.append(time.perf_counter() - started)
+            peak_mb = max(peak_mb, tracemalloc.get_traced_memory()[1] / (1024 * 1024))
+            tracemalloc.stop()
+    finally:
+        os.remove(path)
+
+    best = min(timings)
+    print(f"{args.format} {size_mb:.1f} MB: {best:.2f}s ({size_mb / best:.1f} MB/s), "
+          f"peak {peak_mb:.0f} MB, {analysis['word_count']} words")
+    if 'error' in analysis:
+        print(f"❌ Analysis error: {analysis['error']}")
+
+    with open(args.output, 'w') as f:
+        json.dump({'benchmark': 'report_analysis', 'commit': git_commit(), 'arguments': vars(args),
+                   'size_mb': round(size_mb, 2), 'seconds': [round(t, 3) for t in timings],
+                   'peak_memory_mb': round(peak_mb, 1), 'word_count': analysis['word_count']}, f, indent=2)
+    print(f"📄 Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""Bulk-load realistic data volumes into a local MySQL for load testing.
+
+Usage:
+    python -m benchmarks.seed_data --members 100000 --events 10000 --attendance 10000000
+    python -m benchmarks.seed_data --method load-data ...      # LOAD DATA LOCAL INFILE instead of executemany
+    python -m benchmarks.seed_data --clock-users 2000 --clock-days 365   # attendance_system (clock in/out) tables
+
+Rows use explicit ids above the current maximum, so seeding can be repeated
+on top of existing data. Never point this at a production database.
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+import mysql.connector
+import config
+import report_rollups
+
+MEMBERSHIP_TYPES = ['basic', 'standard', 'premium']
+EVENT_TYPES = ['meeting', 'training', 'workshop', 'conference', 'social']
+DEPARTMENTS = ['IT', 'HR', 'Finance', 'Marketing', 'Operations', 'Sales']
+
+def connect(database_name, allow_local_infile=False):
+    return mysql.connector.connect(
+        host=config.Config.DB_HOST,
+        user=config.Config.DB_USER,
+        password=config.Config.DB_PASSWORD,
+        port=config.Config.DB_PORT,
+        database=database_name,
+        allow_local_infile=allow_local_infile
+    )
+
+def next_id(cursor, table):
+    cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")
+    return cursor.fetchone()[0]
+
+def generate_members(start_id, count, rng):
+    today = date.today()
+    for member_id in range(start_id, start_id + count):
+        join_date = today - timedelta(days=rng.randint(0, 3 * 365))
+        yield (member_id, f"Seed Member {member_id}", f"SEED{member_id:08d}", f"member{member_id}@seed.test",
+               f"555-{member_id % 10000:04d}", rng.choice(MEMBERSHIP_TYPES),
+               'active' if rng.random() < 0.9 else 'pending', join_date)
+
+def generate_events(start_id, count, rng):
+    today = date.today()
+    for event_id in range(start_id, start_id + count):
+        event_date = today - timedelta(days=rng.randint(-30, 2 * 365))
+        start_hour = rng.randint(8, 18)
+        yield (event_id, f"Seed Event {event_id}", event_date, f"{start_hour:02d}:00:00", f"{start_hour + 2:02d}:00:00",
+               rng.choice(EVENT_TYPES), 'completed' if event_date < today else 'scheduled')
+
+def generate_attendance(member_ids, events, total_rows, rng):
+    """Spread total_rows over the events; each event takes a distinct window of members"""
+    per_event = max(1, min(len(member_ids), total_rows // max(1, len(events))))
+    produced = 0
+    for event_id, event_date, start_time in events:
+        if produced >= total_rows:
+            return
+        offset = rng.randrange(len(member_ids))
+        event_start = datetime.combine(event_date, datetime.strptime(start_time, '%H:%M:%S').time())
+        for j in range(min(per_event, total_rows - produced)):
+            member_id = member_ids[(offset + j) % len(member_ids)]
+            recognized_at = event_start + timedelta(minutes=rng.randint(-15, 45))
+            yield (member_id, event_id, 'present', recognized_at, round(rng.uniform(0.61, 0.99), 4))
+        produced += min(per_event, total_rows - produced)
+
+def insert_rows(conn, method, table, columns, rows, chunk_size):
+    """Insert rows with chunked executemany or LOAD DATA LOCAL INFILE; returns row count"""
+    cursor = conn.cursor()
+    total = 0
+
+    try:
+        if method == 'load-data':
+            with tempfile.NamedTemporaryFile('w', newline='', suffix='.csv', delete=False) as f:
+                writer = csv.writer(f)
+                for row in rows:
+                    writer.writerow(row)
+                    total += 1
+                path = f.name
+            try:
+                cursor.execute(f"""
+                    LOAD DATA LOCAL INFILE %s INTO TABLE {table}
+                    FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+                    LINES TERMINATED BY '\\r\\n' ({', '.join(columns)})
+                """, (path,))
+                conn.commit()
+            finally:
+                os.remove(path)
+            return total
+
+        placeholders = ', '.join(['%s'] * len(columns))
+        statement = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                cursor.executemany(statement, chunk)
+                conn.commit()
+                total += len(chunk)
+                chunk = []
+                print(f"   {table}: {total} rows", end='\r')
+        if chunk:
+            cursor.executemany(statement, chunk)
+            conn.commit()
+            total += len(chunk)
+        return total
+    finally:
+        cursor.close()
+
+def seed_membership_system(args, rng):
+    conn = connect(config.Config.DB_NAME, allow_local_infile=args.method == 'load-data')
+    cursor = conn.cursor()
+
+    try:
+        # Checks are re-enabled per session, so this only affects the seeding connection
+        cursor.execute("SET unique_checks = 0")
+        cursor.execute("SET foreign_key_checks = 0")
+        member_start = next_id(cursor, 'members')
+        event_start = next_id(cursor, 'events')
+
+        started = time.time()
+        count = insert_rows(conn, args.method, 'members',
+                            ['id', 'fullname', 'membership_number', 'email', 'phone', 'membership_type', 'status', 'join_date'],
+                            generate_members(member_start, args.members, rng), args.chunk_size)
+        print(f"✅ members: {count} rows in {time.time() - started:.1f}s")
+
+        started = time.time()
+        events = list(generate_events(event_start, args.events, rng))
+        count = insert_rows(conn, args.method, 'events',
+                            ['id', 'title', 'event_date', 'start_time', 'end_time', 'event_type', 'status'],
+                            iter(events), args.chunk_size)
+        print(f"✅ events: {count} rows in {time.time() - started:.1f}s")
+
+        started = time.time()
+        member_ids = list(range(member_start, member_start + args.members))
+        event_keys = [(event[0], event[2], event[3]) for event in events]
+        count = insert_rows(conn, args.method, 'attendance',
+                            ['member_id', 'event_id', 'status', 'recognized_at', 'confidence'],
+                            generate_attendance(member_ids, event_keys, args.attendance, rng), args.chunk_size)
+        print(f"✅ attendance: {count} rows in {time.time() - started:.1f}s")
+
+        # The rows bypassed the application's write paths
+        started = time.time()
+        report_rollups.rebuild_rollups(cursor)
+        conn.commit()
+        print(f"✅ report rollups rebuilt in {time.time() - started:.1f}s")
+    finally:
+        cursor.close()
+        conn.close()
+
+def seed_attendance_system(args, rng):
+    """Users and clock in/out rows for the AttendanceMySQL reports"""
+    conn = connect('attendance_system', allow_local_infile=args.method == 'load-data')
+
+    try:
+        users = [(f"SEED{index:06d}", f"Seed User {index}", f"user{index}@seed.test", rng.choice(DEPARTMENTS))
+                 for index in range(args.clock_users)]
+        count = insert_rows(conn, args.method, 'users', ['user_id', 'user_name', 'email', 'department'],
+                            iter(users), args.chunk_size)
+        print(f"✅ attendance_system users: {count} rows")
+
+        def clock_rows():
+            today = date.today()
+            for day in range(args.clock_days):
+                workday = today - timedelta(days=day)
+                for user_id, user_name, _, _ in users:
+                    if rng.random() < 0.85:
+                        clock_in = datetime.combine(workday, datetime.min.time()) + timedelta(hours=8, minutes=rng.randint(0, 90))
+                        clock_out = clock_in + timedelta(hours=rng.uniform(6, 10))
+                        yield (user_id, user_name, clock_in, clock_out, 'present', round(rng.uniform(0.61, 0.99), 4))
+
+        count = insert_rows(conn, args.method, 'attendance',
+                            ['user_id', 'user_name', 'clock_in', 'clock_out', 'status', 'confidence'],
+                            clock_rows(), args.chunk_size)
+        print(f"✅ attendance_system attendance: {count} rows")
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed a local MySQL with load-test volumes')
+    parser.add_argument('--members', type=int, default=100000)
+    parser.add_argument('--events', type=int, default=10000)
+    parser.add_argument('--attendance', type=int, default=10000000)
+    parser.add_argument('--clock-users', type=int, default=0, help='also seed attendance_system users')
+    parser.add_argument('--clock-days', type=int, default=365, help='days of clock in/out rows per attendance_system user')
+    parser.add_argument('--method', choices=['executemany', 'load-data'], default='executemany')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='rows per executemany batch')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    seed_membership_system(args, rng)
+    if args.clock_users:
+        seed_attendance_system(args, rng)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
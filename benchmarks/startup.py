@@ -0,0 +1,75 @@
+"""Cold-start benchmark: import time and time to first request.
+
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --stub-models      # without the dlib models
+
+Each run starts a fresh interpreter and reports, in ms since process start:
+import of face_utils, import of app, the first plain request (/login), and
+the first recognition request, which pays for lazy model and gallery
+loading unless FACE_WARMUP is on.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+from benchmarks.recognition import git_commit
+
+PROBE = r'''
+import json, sys, time
+started = time.perf_counter()
+def elapsed():
+    return round((time.perf_counter() - started) * 1000, 2)
+
+if {stub_models}:
+    from benchmarks.stubs import install_stub_models
+    install_stub_models().set_probes(__import__('numpy').zeros((1, 128)))
+
+result = {{}}
+import face_utils
+result['import_face_utils'] = elapsed()
+from app import app
+result['import_app'] = elapsed()
+
+import cv2, numpy
+client = app.test_client()
+client.get('/login')
+result['first_request'] = elapsed()
+_, frame = cv2.imencode('.jpg', numpy.zeros((64, 64, 3), dtype=numpy.uint8))
+client.post('/api/process_attendance/frame?event_id=1', data=frame.tobytes(), content_type='image/jpeg')
+result['first_recognition'] = elapsed()
+client.post('/api/process_attendance/frame?event_id=1', data=frame.tobytes(), content_type='image/jpeg')
+result['second_recognition'] = elapsed()
+print('RESULT ' + json.dumps(result))
+'''
+
+def run_once(stub_models, warmup):
+    env = dict(os.environ, FACE_WARMUP='true' if warmup else 'false')
+    output = subprocess.run([sys.executable, '-c', PROBE.format(stub_models=stub_models)],
+                            capture_output=True, text=True, env=env, cwd=os.getcwd())
+    for line in output.stdout.splitlines():
+        if line.startswith('RESULT '):
+            return json.loads(line[len('RESULT '):])
+    raise RuntimeError(f"startup probe failed:\n{output.stderr[-2000:]}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure import time and time to first request')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--stub-models', action='store_true', help='replace face_recognition with a stub')
+    parser.add_argument('--warmup', action='store_true', help='start with FACE_WARMUP=true')
+    parser.add_argument('--output', default='bench_startup.json')
+    args = parser.parse_args()
+
+    runs = [run_once(args.stub_models, args.warmup) for _ in range(args.runs)]
+    summary = {key: round(float(np.median([run[key] for run in runs])), 2) for key in runs[0]}
+    for key, value in summary.items():
+        print(f"{key:20} {value:>10} ms")
+
+    with open(args.output, 'w') as f:
+        json.dump({'benchmark': 'startup', 'commit': git_commit(), 'arguments': vars(args),
+                   'median_ms': summary, 'runs': runs}, f, indent=2)
+    print(f"📄 Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
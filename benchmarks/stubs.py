@@ -0,0 +1,44 @@
+"""Stand-in for the face_recognition package so match-only runs need no dlib models"""
+import sys
+import types
+import numpy as np
+
+def install_stub_models(faces_per_frame=1):
+    """Register a fake face_recognition module that 'detects' faces_per_frame faces
+    per image and hands out the encodings given to set_probes() in rotation.
+
+    Must be called before face_utils is imported.
+    """
+    module = types.ModuleType('face_recognition')
+    state = {'probes': np.empty((0, 128)), 'position': 0}
+
+    def set_probes(probe_encodings):
+        state['probes'] = probe_encodings
+        state['position'] = 0
+
+    def face_locations(img, number_of_times_to_upsample=1, model='hog'):
+        return [(0, 100, 100, 0)] * faces_per_frame
+
+    def face_encodings(face_image, known_face_locations=None, num_jitters=1, model='small'):
+        count = len(known_face_locations) if known_face_locations is not None else faces_per_frame
+        encodings = []
+        for _ in range(count):
+            encodings.append(state['probes'][state['position'] % len(state['probes'])])
+            state['position'] += 1
+        return encodings
+
+    def face_distance(face_encodings, face_to_compare):
+        if len(face_encodings) == 0:
+            return np.empty(0)
+        return np.linalg.norm(face_encodings - face_to_compare, axis=1)
+
+    def load_image_file(file, mode='RGB'):
+        raise NotImplementedError('stub models cannot load images')
+
+    module.set_probes = set_probes
+    module.face_locations = face_locations
+    module.face_encodings = face_encodings
+    module.face_distance = face_distance
+    module.load_image_file = load_image_file
+    sys.modules['face_recognition'] = module
+    return module
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""Synthetic galleries and probes for match benchmarks"""
+import numpy as np
+
+def random_unit_vectors(count, rng, dimensions=128):
+    vectors = rng.standard_normal((count, dimensions))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+def make_gallery(size, seed=0):
+    """Return (member_ids, names, encodings) for a gallery of random unit 128-D vectors"""
+    rng = np.random.default_rng(seed)
+    encodings = random_unit_vectors(size, rng)
+    member_ids = list(range(1, size + 1))
+    names = [f"Member {member_id}" for member_id in member_ids]
+    return member_ids, names, encodings
+
+def make_probes(gallery_encodings, member_ids, count, genuine_ratio=0.8, noise=0.02, seed=1):
+    """Return (probe_encodings, expected_ids).
+
+    Genuine probes are gallery rows plus Gaussian noise (about 0.25 away, well
+    inside the 0.4 distance threshold); impostors are fresh random vectors and
+    expect None.
+    """
+    rng = np.random.default_rng(seed)
+    genuine_count = int(count * genuine_ratio)
+    rows = rng.integers(0, len(gallery_encodings), genuine_count)
+
+    genuine = gallery_encodings[rows] + rng.normal(0, noise, (genuine_count, gallery_encodings.shape[1]))
+    impostors = random_unit_vectors(count - genuine_count, rng, gallery_encodings.shape[1])
+
+    probes = np.vstack([genuine, impostors])
+    expected = [member_ids[row] for row in rows] + [None] * len(impostors)
+    order = rng.permutation(count)
+    return probes[order], [expected[index] for index in order]
\ No newline at end of file
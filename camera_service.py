@@ -0,0 +1,197 @@
+"""Headless attendance ingestion from fixed cameras.
+
+Usage:
+    python camera_service.py cameras.json
+
+cameras.json:
+    {
+        "workers": 2,
+        "cameras": [
+            {"name": "main-entrance", "source": "rtsp://10.0.0.5/stream1", "event_id": 12, "max_fps": 2},
+            {"name": "side-door", "source": 0, "event_id": 12, "max_fps": 1},
+            {"name": "replay", "source": "recordings/door.mp4", "event_id": 12, "max_fps": 2, "loop": true}
+        ]
+    }
+
+Each source gets a reader thread that keeps only its newest frame. A fixed
+pool of recognition workers takes frames round-robin across cameras, so a
+busy camera cannot starve the others, and each camera is held to its own
+max_fps no matter how fast its source delivers.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import cv2
+import attendance_buffer
+import attendance_tracker
+import face_utils
+
+class CameraReader(threading.Thread):
+    """Reads one video source and keeps only the latest frame"""
+
+    def __init__(self, name, source, event_id, max_fps=1.0, loop=False, reconnect_delay=5.0):
+        super().__init__(name=f"camera-{name}", daemon=True)
+        self.camera_name = name
+        self.source = source
+        self.event_id = event_id
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.loop = loop
+        self.reconnect_delay = reconnect_delay
+        self.is_file = isinstance(source, str) and os.path.isfile(source)
+
+        self.lock = threading.Lock()
+        self.frame = None
+        self.frame_seq = 0
+        self.processed_seq = 0
+        self.next_due = 0.0
+        self.in_flight = False
+        self.dropped_frames = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            capture = cv2.VideoCapture(self.source)
+            if not capture.isOpened():
+                print(f"❌ Camera {self.camera_name}: cannot open {self.source}")
+                self.stopped.wait(self.reconnect_delay)
+                continue
+
+            # Files are paced at their native frame rate so they behave like a live feed
+            frame_interval = 0.0
+            if self.is_file:
+                fps = capture.get(cv2.CAP_PROP_FPS)
+                frame_interval = 1.0 / fps if fps and fps > 0 else 1.0 / 25
+
+            while not self.stopped.is_set():
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                with self.lock:
+                    if self.frame_seq > self.processed_seq:
+                        self.dropped_frames += 1
+                    self.frame = frame
+                    self.frame_seq += 1
+                if frame_interval:
+                    time.sleep(frame_interval)
+
+            capture.release()
+            if self.is_file and not self.loop:
+                print(f"📼 Camera {self.camera_name}: end of file")
+                self.stopped.set()
+            elif not self.stopped.is_set():
+                print(f"⚠️  Camera {self.camera_name}: stream lost, reconnecting")
+                self.stopped.wait(self.reconnect_delay)
+
+    def take_frame(self, now):
+        """Return the newest unprocessed frame if this camera is due, else None"""
+        with self.lock:
+            if self.in_flight or self.frame_seq <= self.processed_seq or now < self.next_due:
+                return None
+            self.in_flight = True
+            self.processed_seq = self.frame_seq
+            self.next_due = now + self.min_interval
+            return self.frame
+
+    def release(self):
+        with self.lock:
+            self.in_flight = False
+
+class FrameScheduler:
+    """Hands frames to workers round-robin across cameras"""
+
+    def __init__(self, cameras, idle_wait=0.02):
+        self.cameras = cameras
+        self.idle_wait = idle_wait
+        self.lock = threading.Lock()
+        self.position = 0
+
+    def next_frame(self, stopped):
+        """Block until some camera has a due frame; return (camera, frame) or None once stopped"""
+        while not stopped.is_set():
+            with self.lock:
+                now = time.monotonic()
+                for offset in range(len(self.cameras)):
+                    index = (self.position + offset) % len(self.cameras)
+                    camera = self.cameras[index]
+                    frame = camera.take_frame(now)
+                    if frame is not None:
+                        self.position = index + 1
+                        return camera, frame
+            stopped.wait(self.idle_wait)
+        return None
+
+class RecognitionWorker(threading.Thread):
+    def __init__(self, index, scheduler, stopped):
+        super().__init__(name=f"recognition-{index}", daemon=True)
+        self.scheduler = scheduler
+        self.stopped = stopped
+
+    def run(self):
+        while True:
+            job = self.scheduler.next_frame(self.stopped)
+            if job is None:
+                return
+            camera, frame = job
+            try:
+                recognized_members = face_utils.recognize_faces(frame, camera.event_id)
+                if recognized_members:
+                    _, details = attendance_tracker.record_attendance(camera.event_id, recognized_members)
+                    for member in details:
+                        if not member['already_marked']:
+                            print(f"✅ {camera.camera_name}: {member['name']} ({member['confidence']}%)")
+            except Exception as e:
+                print(f"❌ {camera.camera_name}: recognition error: {e}")
+            finally:
+                camera.release()
+
+def load_cameras(config_path):
+    with open(config_path, encoding='utf-8') as f:
+        settings = json.load(f)
+
+    cameras = [
+        CameraReader(camera['name'], camera['source'], camera['event_id'],
+                     camera.get('max_fps', 1.0), camera.get('loop', False))
+        for camera in settings['cameras']
+    ]
+    return cameras, settings.get('workers', 2)
+
+def run(cameras, workers):
+    """Start readers and workers, returning the stop event"""
+    stopped = threading.Event()
+    scheduler = FrameScheduler(cameras)
+    if attendance_buffer.enabled():
+        attendance_buffer.get_buffer()
+
+    for camera in cameras:
+        attendance_tracker.open_event(camera.event_id)
+        camera.start()
+
+    for index in range(workers):
+        RecognitionWorker(index, scheduler, stopped).start()
+
+    print(f"🎥 Watching {len(cameras)} camera(s) with {workers} recognition worker(s)")
+    return stopped
+
+def main():
+    parser = argparse.ArgumentParser(description='Run attendance recognition on fixed camera streams')
+    parser.add_argument('config', help='JSON file describing cameras and worker count')
+    args = parser.parse_args()
+
+    cameras, workers = load_cameras(args.config)
+    stopped = run(cameras, workers)
+
+    try:
+        while any(camera.is_alive() for camera in cameras):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for camera in cameras:
+            camera.stopped.set()
+        stopped.set()
+        print("🛑 Camera service stopped")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -55,4 +55,116 @@ class ChartUtils {
             }
         });
     }
+    
+    // Fetch one of the /api/analytics/* reports and hand its data to a chart builder
+    static loadAnalytics(url, canvasId, builder) {
+        return fetch(url, { credentials: 'same-origin' })
+            .then(response => response.json())
+            .then(result => {
+                if (!result.success) {
+                    throw new Error(result.message || 'Analytics request failed');
+                }
+                return builder(result.data, canvasId);
+            })
+            .catch(error => {
+                const canvas = document.getElementById(canvasId);
+                const message = document.createElement('p');
+                message.className = 'text-muted';
+                message.textContent = error.message;
+                canvas.replaceWith(message);
+            });
+    }
+    
+    // Rows with a rate (0-1) per label, e.g. /api/analytics/department_rates or event_types
+    static createRateChart(data, canvasId, labelKey, title) {
+        const ctx = document.getElementById(canvasId).getContext('2d');
+        
+        return new Chart(ctx, {
+            type: 'bar',
+            data: {
+                labels: data.map(item => item[labelKey]),
+                datasets: [{
+                    label: 'Attendance Rate (%)',
+                    data: data.map(item => item.rate === null ? 0 : Math.round(item.rate * 1000) / 10),
+                    backgroundColor: 'rgba(75, 192, 192, 0.5)'
+                }]
+            },
+            options: {
+                responsive: true,
+                scales: { y: { beginAtZero: true, max: 100 } },
+                plugins: {
+                    title: {
+                        display: true,
+                        text: title
+                    }
+                }
+            }
+        });
+    }
+    
+    // /api/analytics/weekly_trends: attendance per week, with week-over-week change in the tooltip
+    static createWeeklyTrendChart(data, canvasId) {
+        const ctx = document.getElementById(canvasId).getContext('2d');
+        
+        return new Chart(ctx, {
+            type: 'line',
+            data: {
+                labels: data.map(item => item.week),
+                datasets: [{
+                    label: 'Attendance',
+                    data: data.map(item => item.attendance),
+                    borderColor: 'rgb(54, 162, 235)',
+                    tension: 0.1
+                }, {
+                    label: 'Unique Attendees',
+                    data: data.map(item => item.unique_attendees),
+                    borderColor: 'rgb(255, 159, 64)',
+                    tension: 0.1
+                }]
+            },
+            options: {
+                responsive: true,
+                plugins: {
+                    title: {
+                        display: true,
+                        text: 'Weekly Attendance'
+                    },
+                    tooltip: {
+                        callbacks: {
+                            afterBody: items => {
+                                const change = data[items[0].dataIndex].change_pct;
+                                return change === null ? '' : `Week over week: ${change > 0 ? '+' : ''}${change}%`;
+                            }
+                        }
+                    }
+                }
+            }
+        });
+    }
+    
+    // /api/analytics/lateness: how many check-ins fell in each lateness bucket
+    static createLatenessChart(data, canvasId) {
+        const ctx = document.getElementById(canvasId).getContext('2d');
+        
+        return new Chart(ctx, {
+            type: 'bar',
+            data: {
+                labels: data.labels,
+                datasets: [{
+                    label: 'Check-ins',
+                    data: data.counts,
+                    backgroundColor: 'rgba(255, 99, 132, 0.5)'
+                }]
+            },
+            options: {
+                responsive: true,
+                plugins: {
+                    title: {
+                        display: true,
+                        text: data.median_minutes === null ? 'Lateness' : `Lateness (median ${data.median_minutes} min)`
+                    }
+                }
+            }
+        });
+    }
 }
\ No newline at end of file
@@ -6,19 +6,75 @@ class Config:
     DB_USER = os.getenv('DB_USER', 'root')
     DB_PASSWORD = os.getenv('DB_PASSWORD', '')
     DB_NAME = os.getenv('DB_NAME', 'membership_system')
+    DB_PORT = int(os.getenv('DB_PORT', 3306))
+    CLOCK_DB_NAME = os.getenv('CLOCK_DB_NAME', 'attendance_system')  # clock in/out database (mysql_integration.py), same server
     
     # Application Settings
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-here')
     UPLOAD_FOLDER = 'uploads'
     ALLOWED_EXTENSIONS = {'pdf', 'docx', 'xlsx', 'jpg', 'jpeg', 'png'}
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    MEMBERSHIP_NUMBER_BLOCK = int(os.getenv('MEMBERSHIP_NUMBER_BLOCK', 1))  # numbers each process reserves at a time; 1 keeps them gapless
     
     # Face Recognition Settings
     FACE_ENCODINGS_PATH = 'uploads/face_encodings'
     PROFILES_PATH = 'uploads/profiles'
     PLANS_PATH = 'uploads/plans'
     CONFIDENCE_THRESHOLD = 0.6
+    FRAME_DECODE_REDUCTION = int(os.getenv('FRAME_DECODE_REDUCTION', 1))  # 1, 2, 4 or 8; decode camera frames at reduced size
+    FACE_LANDMARK_MODEL = os.getenv('FACE_LANDMARK_MODEL', 'small')  # 'small' (5-point) or 'large' (68-point)
+    FACE_ENCODING_JITTERS = int(os.getenv('FACE_ENCODING_JITTERS', 1))
+    FACE_WARMUP = os.getenv('FACE_WARMUP', 'false').lower() == 'true'  # load models and gallery in the background at startup
+    ENCODING_CACHE_PATH = os.getenv('ENCODING_CACHE_PATH', 'uploads/encoding_cache')
+    ENCODING_CACHE_MAX_BYTES = int(os.getenv('ENCODING_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    ROSTER_CHECK_INTERVAL = float(os.getenv('ROSTER_CHECK_INTERVAL', 5))  # seconds a cached event roster is used before checking for edits
+    ENROLLMENT_POLL_INTERVAL = float(os.getenv('ENROLLMENT_POLL_INTERVAL', 5))  # seconds between queue checks
+    ENROLLMENT_STALE_AFTER = int(os.getenv('ENROLLMENT_STALE_AFTER', 300))  # seconds before a silent running job is requeued
+    PLAN_ANALYSIS_POLL_INTERVAL = float(os.getenv('PLAN_ANALYSIS_POLL_INTERVAL', 5))  # seconds between analysis queue checks
+    PLAN_ANALYSIS_STALE_AFTER = int(os.getenv('PLAN_ANALYSIS_STALE_AFTER', 900))  # seconds before a running analysis is requeued
+    PLAN_SEARCH_MAX_TERMS = int(os.getenv('PLAN_SEARCH_MAX_TERMS', 20000))  # distinct words indexed per plan (most frequent first)
+    PLAN_PDF_MAX_PAGES = int(os.getenv('PLAN_PDF_MAX_PAGES', 500))  # later pages are not analyzed
+    PLAN_PDF_PAGE_TIMEOUT = float(os.getenv('PLAN_PDF_PAGE_TIMEOUT', 30))  # seconds; a slower page is skipped (sequential extraction: main thread on Unix only)
+    PLAN_PDF_PARALLEL_PAGES = int(os.getenv('PLAN_PDF_PARALLEL_PAGES', 32))  # PDFs with at least this many pages are extracted in worker processes
+    PLAN_PDF_WORKERS = int(os.getenv('PLAN_PDF_WORKERS', min(4, os.cpu_count() or 1)))
     
+    # Attendance Dedup Settings
+    ATTENDANCE_DEDUP_TTL = int(os.getenv('ATTENDANCE_DEDUP_TTL', 12 * 60 * 60))  # seconds an idle event stays cached
+    ATTENDANCE_MIN_CONFIDENCE_GAIN = float(os.getenv('ATTENDANCE_MIN_CONFIDENCE_GAIN', 0.05))
+    ATTENDANCE_WRITE_BEHIND = os.getenv('ATTENDANCE_WRITE_BEHIND', 'false').lower() == 'true'  # buffer recognized attendance and write in batches
+    ATTENDANCE_FLUSH_INTERVAL_MS = int(os.getenv('ATTENDANCE_FLUSH_INTERVAL_MS', 500))
+    ATTENDANCE_FLUSH_ROWS = int(os.getenv('ATTENDANCE_FLUSH_ROWS', 200))
+    ATTENDANCE_JOURNAL_DIR = os.getenv('ATTENDANCE_JOURNAL_DIR', 'uploads/attendance_journal')
+    ATTENDANCE_JOURNAL_FSYNC = os.getenv('ATTENDANCE_JOURNAL_FSYNC', 'false').lower() == 'true'  # survive power loss, not just process crashes
+    
+    # Attendance Analytics Settings
+    ANALYTICS_REFRESH_INTERVAL = float(os.getenv('ANALYTICS_REFRESH_INTERVAL', 60))  # seconds cached frames are served before new rows are read
+    ANALYTICS_FULL_RELOAD = int(os.getenv('ANALYTICS_FULL_RELOAD', 3600))  # seconds between full reloads, which drop deleted rows
+    ANALYTICS_WATERMARK_OVERLAP = int(os.getenv('ANALYTICS_WATERMARK_OVERLAP', 300))  # re-read rows this far behind the watermark
+    ANALYTICS_WORKDAY_START = os.getenv('ANALYTICS_WORKDAY_START', '09:00')  # clock-ins after this are late
+    
+    # Production Server Settings (gunicorn.conf.py)
+    SERVER_BIND = os.getenv('SERVER_BIND', '0.0.0.0:8000')
+    SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', 2))
+    SERVER_THREADS = int(os.getenv('SERVER_THREADS', 4))
+    SERVER_TIMEOUT = int(os.getenv('SERVER_TIMEOUT', 60))
+    SERVER_GRACEFUL_TIMEOUT = int(os.getenv('SERVER_GRACEFUL_TIMEOUT', 30))  # seconds in-flight requests get on reload
+    SERVER_RELOAD_DELAY = float(os.getenv('SERVER_RELOAD_DELAY', 10))  # coalesce gallery changes into one reload; 0 disables
+    
+    # Profiling Settings
+    PROFILE_ALL_REQUESTS = os.getenv('PROFILE_ALL_REQUESTS', 'false').lower() == 'true'
+    PROFILE_HEADER = 'X-Profile'  # honoured for admin sessions, or with PROFILE_TOKEN as its value
+    PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')
+    PROFILE_SLOW_REQUEST_MS = float(os.getenv('PROFILE_SLOW_REQUEST_MS', 0))  # 0 disables slow-request sampling
+    PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', 0.005))  # seconds between stack samples
+    PROFILE_DIR = os.getenv('PROFILE_DIR', 'uploads/request_profiles')
+    PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', 200))
+    
+    # Query Instrumentation Settings
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))  # statements slower than this are logged
+    REQUEST_QUERY_WARNING = int(os.getenv('REQUEST_QUERY_WARNING', 50))  # warn when a request runs more queries; 0 disables
+    METRICS_QUEUE_DEPTH_MAX_AGE = float(os.getenv('METRICS_QUEUE_DEPTH_MAX_AGE', 15))  # seconds /metrics reuses a queue depth counted in the database
+
 class DevelopmentConfig(Config):
     DEBUG = True
     TESTING = False
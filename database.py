@@ -1,23 +1,52 @@
 import mysql.connector
 from mysql.connector import Error
 import config
+import db_metrics
+import report_rollups
 from datetime import date
 
-def get_db_connection():
-    """Create and return a MySQL database connection"""
+def get_db_connection(database_name=None):
+    """Create and return a MySQL database connection (to DB_NAME unless another database is given)"""
     try:
         connection = mysql.connector.connect(
             host=config.Config.DB_HOST,
-            database=config.Config.DB_NAME,
+            database=database_name or config.Config.DB_NAME,
             user=config.Config.DB_USER,
             password=config.Config.DB_PASSWORD,
             port=config.Config.DB_PORT
         )
-        return connection
+        return db_metrics.instrument(connection)
     except Error as e:
         print(f"Error connecting to MySQL: {e}")
         return None
 
+# Columns added to events after its first release
+EVENT_ROSTER_COLUMNS = [
+    ('roster_version', 'INT NOT NULL DEFAULT 0')
+]
+
+# Columns added to annual_plans after its first release, for databases created before then
+PLAN_ANALYSIS_COLUMNS = [
+    ('content_hash', 'CHAR(64)'),
+    ('analysis_hash', 'CHAR(64)'),
+    ('analyzer_version', 'VARCHAR(32)'),
+    ('analysis_status', "VARCHAR(20) NOT NULL DEFAULT 'pending'"),
+    ('analysis_error', 'TEXT'),
+    ('analysis_worker', 'VARCHAR(255)'),
+    ('analysis_started_at', 'TIMESTAMP NULL')
+]
+
+def add_missing_columns(cursor, table, columns):
+    """Add any of columns (name, definition) that table does not have yet"""
+    cursor.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s
+    """, (table,))
+    existing = {row[0].lower() for row in cursor.fetchall()}
+    for name, definition in columns:
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
 def init_db():
     """Initialize MySQL database tables"""
     conn = get_db_connection()
@@ -69,6 +98,14 @@ def init_db():
             )
         """)
         
+        # Create sequences table (membership numbers, see membership_numbers.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sequences (
+                name VARCHAR(50) PRIMARY KEY,
+                last_value BIGINT NOT NULL DEFAULT 0
+            )
+        """)
+        
         # Create events table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS events (
@@ -82,11 +119,13 @@ def init_db():
                 event_type VARCHAR(100),
                 created_by INT,
                 status VARCHAR(20) DEFAULT 'scheduled',
+                roster_version INT NOT NULL DEFAULT 0,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
                 FOREIGN KEY (created_by) REFERENCES users(id)
             )
         """)
+        add_missing_columns(cursor, 'events', EVENT_ROSTER_COLUMNS)
         
         # Create attendance table
         cursor.execute("""
@@ -105,6 +144,40 @@ def init_db():
             )
         """)
         
+        # Create event_roster table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS event_roster (
+                event_id INT NOT NULL,
+                member_id INT NOT NULL,
+                PRIMARY KEY (event_id, member_id),
+                FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
+                FOREIGN KEY (member_id) REFERENCES members(id) ON DELETE CASCADE
+            )
+        """)
+        
+        # Create enrollment_jobs table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS enrollment_jobs (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                member_id INT NOT NULL,
+                status VARCHAR(20) NOT NULL DEFAULT 'queued',
+                file_paths JSON NOT NULL,
+                total_files INT NOT NULL DEFAULT 0,
+                processed_files INT NOT NULL DEFAULT 0,
+                succeeded_files INT NOT NULL DEFAULT 0,
+                error TEXT,
+                worker VARCHAR(255),
+                created_by INT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                started_at TIMESTAMP NULL,
+                finished_at TIMESTAMP NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                INDEX idx_enrollment_jobs_status (status),
+                FOREIGN KEY (member_id) REFERENCES members(id) ON DELETE CASCADE,
+                FOREIGN KEY (created_by) REFERENCES users(id)
+            )
+        """)
+        
         # Create annual_plans table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS annual_plans (
@@ -118,9 +191,39 @@ def init_db():
                 uploaded_by INT,
                 uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 analyzed_at TIMESTAMP NULL,
+                content_hash CHAR(64),
+                analysis_hash CHAR(64),
+                analyzer_version VARCHAR(32),
+                analysis_status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                analysis_error TEXT,
+                analysis_worker VARCHAR(255),
+                analysis_started_at TIMESTAMP NULL,
+                INDEX idx_annual_plans_analysis_status (analysis_status),
+                INDEX idx_annual_plans_analysis_hash (analysis_hash),
                 FOREIGN KEY (uploaded_by) REFERENCES users(id)
             )
         """)
+        add_missing_columns(cursor, 'annual_plans', PLAN_ANALYSIS_COLUMNS)
+        
+        # Create plan search index tables (see plan_search.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS plan_documents (
+                plan_id INT PRIMARY KEY,
+                length INT NOT NULL,
+                indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (plan_id) REFERENCES annual_plans(id) ON DELETE CASCADE
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS plan_terms (
+                term VARCHAR(64) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+                plan_id INT NOT NULL,
+                tf INT NOT NULL,
+                PRIMARY KEY (term, plan_id),
+                INDEX idx_plan_terms_plan (plan_id),
+                FOREIGN KEY (plan_id) REFERENCES annual_plans(id) ON DELETE CASCADE
+            )
+        """)
         
         # Create member_activities table
         cursor.execute("""
@@ -136,6 +239,35 @@ def init_db():
             )
         """)
         
+        # Create report rollup tables (see report_rollups.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS member_growth_monthly (
+                month DATE PRIMARY KEY,
+                new_members INT NOT NULL DEFAULT 0
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS event_attendance_rollup (
+                event_id INT PRIMARY KEY,
+                total_attendance INT NOT NULL DEFAULT 0,
+                unique_members INT NOT NULL DEFAULT 0,
+                confidence_sum DECIMAL(14,4) NOT NULL DEFAULT 0,
+                confidence_count INT NOT NULL DEFAULT 0,
+                last_recognized_at TIMESTAMP NULL,
+                FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS member_attendance_rollup (
+                member_id INT PRIMARY KEY,
+                events_attended INT NOT NULL DEFAULT 0,
+                confidence_sum DECIMAL(14,4) NOT NULL DEFAULT 0,
+                confidence_count INT NOT NULL DEFAULT 0,
+                last_attendance TIMESTAMP NULL,
+                FOREIGN KEY (member_id) REFERENCES members(id) ON DELETE CASCADE
+            )
+        """)
+        
         # Insert default users
         cursor.execute("""
             INSERT IGNORE INTO users (username, password, fullname, role, email) 
@@ -160,6 +292,11 @@ def init_db():
                     VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
                 """, member)
         
+        # Fill the rollups once for databases created before they existed
+        cursor.execute("SELECT COUNT(*) FROM member_growth_monthly")
+        if cursor.fetchone()[0] == 0:
+            report_rollups.rebuild_rollups(cursor)
+        
         conn.commit()
         print("✅ MySQL database initialized successfully!")
         
@@ -0,0 +1,200 @@
+"""Query counting, timing and slow query logging.
+
+Connections from database.get_db_connection() and MySQLDatabase are wrapped
+with instrument(), so every cursor.execute/executemany is timed. Totals are
+kept per thread for whoever is tracking: the Flask request hooks, or a test
+holding query_budget():
+
+    with db_metrics.query_budget(3):
+        client.post('/api/process_attendance/frame?event_id=1', data=frame, content_type='image/jpeg')
+
+Timing covers execute() only; rows fetched later from an unbuffered cursor
+are not included.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+import metrics
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+query_seconds = metrics.registry.register(metrics.Histogram(
+    'db_query_seconds', 'Time spent executing SQL statements'))
+queries_per_request = metrics.registry.register(metrics.Histogram(
+    'db_queries_per_request', 'SQL statements executed per request by Flask endpoint', ['endpoint'],
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 1000)))
+slow_queries = metrics.registry.register(metrics.Counter(
+    'db_slow_queries_total', 'SQL statements slower than SLOW_QUERY_MS'))
+
+STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'")
+WHITESPACE = re.compile(r'\s+')
+
+def normalize_statement(statement):
+    """Single-line statement with inline string literals masked"""
+    if isinstance(statement, (bytes, bytearray)):
+        statement = statement.decode('utf-8', 'replace')
+    return STRING_LITERAL.sub("'?'", WHITESPACE.sub(' ', statement).strip())[:500]
+
+def redact_params(params):
+    """Describe parameters by type only, so values never reach the log"""
+    if params is None:
+        return '()'
+    if isinstance(params, dict):
+        return '{' + ', '.join(f"{key}: <{type(value).__name__}>" for key, value in params.items()) + '}'
+    return '(' + ', '.join(f"<{type(value).__name__}>" for value in params) + ')'
+
+class QueryStats:
+    def __init__(self, keep_statements=False):
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+        self.statements = [] if keep_statements else None
+
+    def add(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        if seconds >= self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+        if self.statements is not None:
+            self.statements.append(statement)
+
+    def as_dict(self):
+        return {
+            'queries': self.count,
+            'db_ms': round(self.seconds * 1000, 3),
+            'slowest_ms': round(self.slowest_seconds * 1000, 3),
+            'slowest_statement': self.slowest_statement
+        }
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+_local = threading.local()
+
+def _collectors():
+    collectors = getattr(_local, 'collectors', None)
+    if collectors is None:
+        collectors = _local.collectors = []
+    return collectors
+
+def record_query(statement, params, seconds, rows=None):
+    query_seconds.observe(seconds)
+    collectors = getattr(_local, 'collectors', None)
+    if not collectors and seconds * 1000 < Config.SLOW_QUERY_MS:
+        return
+
+    statement = normalize_statement(statement)
+    for stats in collectors or ():
+        stats.add(statement, seconds)
+
+    if seconds * 1000 >= Config.SLOW_QUERY_MS:
+        slow_queries.inc()
+        described = f"<{rows} rows>" if rows is not None else redact_params(params)
+        logger.warning("Slow query (%.1f ms): %s params=%s", seconds * 1000, statement, described)
+
+@contextmanager
+def track_queries(keep_statements=False):
+    """Collect stats for queries run by the current thread inside the block"""
+    stats = QueryStats(keep_statements)
+    collectors = _collectors()
+    collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        collectors.remove(stats)
+
+@contextmanager
+def query_budget(max_queries):
+    """Fail with QueryBudgetExceeded if the block runs more than max_queries statements"""
+    with track_queries(keep_statements=True) as stats:
+        yield stats
+    if stats.count > max_queries:
+        repeated = '\n'.join(f"  {count}x {statement}" for statement, count in Counter(stats.statements).most_common(5))
+        raise QueryBudgetExceeded(f"{stats.count} queries executed, budget is {max_queries}:\n{repeated}")
+
+def current_request():
+    """QueryStats of the current thread's request so far, or None outside a request"""
+    return getattr(_local, 'request_stats', None)
+
+def begin_request():
+    """Start tracking queries for the current thread's request"""
+    _local.request_stats = QueryStats()
+    _collectors().append(_local.request_stats)
+
+def end_request(endpoint=None):
+    """Stop tracking and return the request's QueryStats"""
+    stats = getattr(_local, 'request_stats', None)
+    _local.request_stats = None
+    if stats is None:
+        return None
+    collectors = _collectors()
+    if stats in collectors:
+        collectors.remove(stats)
+
+    if endpoint:
+        queries_per_request.observe(stats.count, endpoint=endpoint)
+        if Config.REQUEST_QUERY_WARNING and stats.count > Config.REQUEST_QUERY_WARNING:
+            logger.warning("%s ran %d queries (%.1f ms); slowest: %s", endpoint, stats.count,
+                           stats.seconds * 1000, stats.slowest_statement)
+    return stats
+
+def current_stats():
+    stats = getattr(_local, 'request_stats', None)
+    return stats.as_dict() if stats else None
+
+class InstrumentedCursor:
+    """Cursor proxy that times execute and executemany"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, operation, *args, **kwargs):
+        params = args[0] if args else kwargs.get('params')
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, *args, **kwargs)
+        finally:
+            record_query(operation, params, time.perf_counter() - started)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            rows = len(seq_params) if hasattr(seq_params, '__len__') else '?'
+            record_query(operation, None, time.perf_counter() - started, rows)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class InstrumentedConnection:
+    """Connection proxy whose cursors are instrumented"""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._connection.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+def instrument(connection):
+    if connection is None or isinstance(connection, InstrumentedConnection):
+        return connection
+    return InstrumentedConnection(connection)
\ No newline at end of file
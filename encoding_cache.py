@@ -0,0 +1,90 @@
+import hashlib
+import os
+import pickle
+import threading
+import config
+
+# dlib's default chip padding, which face_recognition.face_encodings always uses
+DEFAULT_PADDING = 0.25
+
+class EncodingCache:
+    """On-disk cache of face encodings and boxes keyed by image content and encoder settings"""
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = cache_dir or config.Config.ENCODING_CACHE_PATH
+        self.max_bytes = max_bytes if max_bytes is not None else config.Config.ENCODING_CACHE_MAX_BYTES
+        self.lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.total_bytes = sum(size for _, _, size in self.entries())
+
+    def make_key(self, image_bytes, model, num_jitters, padding=DEFAULT_PADDING):
+        """SHA-256 of the image bytes plus every parameter that changes the encoding"""
+        digest = hashlib.sha256(image_bytes)
+        digest.update(f"|model={model}|jitters={num_jitters}|padding={padding}".encode())
+        return digest.hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pkl")
+
+    def entries(self):
+        """Yield (path, last_used, size) for every cached entry"""
+        for root, _, files in os.walk(self.cache_dir):
+            for filename in files:
+                if filename.endswith('.pkl'):
+                    path = os.path.join(root, filename)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue  # evicted by another process
+                    yield path, stat.st_mtime, stat.st_size
+
+    def get(self, key):
+        """Return the cached {'locations', 'encodings'} dict, or None on a miss"""
+        path = self.path_for(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+            os.utime(path)  # mtime doubles as the LRU timestamp
+            return entry
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def put(self, key, locations, encodings):
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = pickle.dumps({'locations': list(locations), 'encodings': list(encodings)})
+
+        # Write then rename so readers in other workers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self.lock:
+            self.total_bytes += len(data)
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache is under 90% of its cap"""
+        entries = sorted(self.entries(), key=lambda entry: entry[1])
+        self.total_bytes = sum(size for _, _, size in entries)
+        target = self.max_bytes * 0.9
+
+        for path, _, size in entries:
+            if self.total_bytes <= target:
+                break
+            try:
+                os.remove(path)
+                self.total_bytes -= size
+            except OSError:
+                pass
+
+_cache = None
+
+def get_cache():
+    """Return the process-wide cache, creating it on first use"""
+    global _cache
+    if _cache is None:
+        _cache = EncodingCache()
+    return _cache
\ No newline at end of file
@@ -0,0 +1,263 @@
+"""Headless bulk face enrollment.
+
+Usage:
+    python enroll_faces.py photos/                 # photos/<membership_number>/*.jpg or photos/<membership_number>_*.jpg
+    python enroll_faces.py manifest.csv            # CSV with image_path,membership_number columns
+
+Images are encoded in a process pool using dlib's batch descriptor API, the
+encodings are written to known_faces/ and members.face_encoding_path is
+updated in bulk. Progress is appended to a state file so an interrupted run
+can be resumed by running the same command again; images that failed are
+retried then. Failures are appended to the error report after every batch,
+so the report covers every run, including interrupted ones.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+import config
+import database
+import encoding_cache
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+def collect_jobs(source):
+    """Return a list of (image_path, membership_number) pairs from a directory or CSV manifest"""
+    jobs = []
+
+    if os.path.isfile(source):
+        base_dir = os.path.dirname(os.path.abspath(source))
+        with open(source, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                image_path = row['image_path'].strip()
+                if not os.path.isabs(image_path):
+                    image_path = os.path.join(base_dir, image_path)
+                jobs.append((image_path, row['membership_number'].strip()))
+        return jobs
+
+    for root, _, files in os.walk(source):
+        for filename in sorted(files):
+            if not filename.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            if os.path.abspath(root) != os.path.abspath(source):
+                membership_number = os.path.basename(root)
+            else:
+                membership_number = os.path.splitext(filename)[0].split('_')[0]
+            jobs.append((os.path.join(root, filename), membership_number))
+
+    return jobs
+
+def load_state(state_path):
+    """Return the set of image paths a previous run enrolled; failed images are tried again"""
+    done = set()
+    if os.path.exists(state_path):
+        with open(state_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    if entry['status'] == 'ok':
+                        done.add(entry['image_path'])
+                except (ValueError, KeyError):
+                    continue  # partially written last line of an interrupted run
+    return done
+
+def append_errors(report_path, errors):
+    """Append (image_path, membership_number, error) rows to the report, writing its header once"""
+    if not errors:
+        return
+    new_file = not os.path.exists(report_path) or os.path.getsize(report_path) == 0
+    with open(report_path, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(['image_path', 'membership_number', 'error'])
+        writer.writerows(errors)
+
+def load_member_ids(membership_numbers):
+    """Map membership numbers to member ids with one query"""
+    conn = database.get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        numbers = list(membership_numbers)
+        placeholders = ', '.join(['%s'] * len(numbers))
+        cursor.execute(f"SELECT membership_number, id FROM members WHERE membership_number IN ({placeholders})", numbers)
+        return dict(cursor.fetchall())
+    finally:
+        cursor.close()
+        conn.close()
+
+def largest_face(locations, encodings):
+    """Enrollment photos should show one person; keep the biggest face"""
+    areas = [(bottom - top) * (right - left) for top, right, bottom, left in locations]
+    return list(encodings[areas.index(max(areas))])
+
+def encode_batch(batch, num_jitters):
+    """Encode one chunk of images in a worker process.
+
+    Images already in the encoding cache are answered from it. The rest are
+    detected and landmarked one by one, then all of their faces go through a
+    single compute_face_descriptor call.
+    """
+    import dlib
+    import face_recognition
+    from face_recognition import api
+
+    model = config.Config.FACE_LANDMARK_MODEL
+    pose_predictor = api.pose_predictor_68_point if model == 'large' else api.pose_predictor_5_point
+    cache = encoding_cache.get_cache()
+
+    results = []
+    images = []
+    shapes = []
+    pending = []
+
+    for image_path, membership_number in batch:
+        try:
+            with open(image_path, 'rb') as f:
+                image_bytes = f.read()
+            key = cache.make_key(image_bytes, model, num_jitters)
+            entry = cache.get(key)
+            if entry is not None:
+                if entry['encodings']:
+                    results.append((image_path, membership_number, largest_face(entry['locations'], entry['encodings']), None))
+                else:
+                    results.append((image_path, membership_number, None, 'no face found'))
+                continue
+
+            image = face_recognition.load_image_file(io.BytesIO(image_bytes))
+            detections = api.face_detector(image, 1)
+            if len(detections) == 0:
+                cache.put(key, [], [])
+                results.append((image_path, membership_number, None, 'no face found'))
+                continue
+
+            faces = dlib.full_object_detections()
+            for detection in detections:
+                faces.append(pose_predictor(image, detection))
+            locations = [(d.top(), d.right(), d.bottom(), d.left()) for d in detections]
+            images.append(image)
+            shapes.append(faces)
+            pending.append((image_path, membership_number, key, locations))
+        except Exception as e:
+            results.append((image_path, membership_number, None, str(e)))
+
+    if images:
+        try:
+            descriptors = api.face_encoder.compute_face_descriptor(images, shapes, num_jitters, encoding_cache.DEFAULT_PADDING)
+            for (image_path, membership_number, key, locations), image_descriptors in zip(pending, descriptors):
+                encodings = [[float(value) for value in descriptor] for descriptor in image_descriptors]
+                cache.put(key, locations, encodings)
+                results.append((image_path, membership_number, largest_face(locations, encodings), None))
+        except Exception as e:
+            results.extend((image_path, membership_number, None, str(e)) for image_path, membership_number, _, _ in pending)
+
+    return results
+
+ENCODING_ROW = "SELECT %s AS face_encoding_path, %s AS id"
+
+def save_encodings(pending_updates):
+    """Write face_encoding_path for a batch of (encoding_path, member_id) in one statement"""
+    if not pending_updates:
+        return
+
+    conn = database.get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        # mysql-connector runs an UPDATE executemany row by row, so the batch is joined in as a derived table
+        cursor.execute(f"""
+            UPDATE members m
+            JOIN ({' UNION ALL '.join([ENCODING_ROW] * len(pending_updates))}) u ON u.id = m.id
+            SET m.face_encoding_path = u.face_encoding_path
+        """, [value for row in pending_updates for value in row])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+def enroll(source, state_path, report_path, workers=None, batch_size=16, num_jitters=1, output_dir='known_faces'):
+    """Encode every image in source and register it against its member"""
+    import numpy as np
+
+    jobs = collect_jobs(source)
+    done = load_state(state_path)
+    jobs = [job for job in jobs if job[0] not in done]
+    print(f"📂 {len(jobs)} image(s) to process, {len(done)} already done")
+
+    if not jobs:
+        return
+
+    member_ids = load_member_ids({membership_number for _, membership_number in jobs})
+    os.makedirs(output_dir, exist_ok=True)
+
+    errors = [(image_path, membership_number, 'unknown membership number')
+              for image_path, membership_number in jobs if membership_number not in member_ids]
+    append_errors(report_path, errors)
+    failed = len(errors)
+    jobs = [job for job in jobs if job[1] in member_ids]
+
+    batches = [jobs[i:i + batch_size] for i in range(0, len(jobs), batch_size)]
+    enrolled_members = set()
+    processed = 0
+    started = time.time()
+
+    with open(state_path, 'a', encoding='utf-8') as state, ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(encode_batch, batch, num_jitters) for batch in batches]
+
+        for future in futures:
+            pending_updates = []
+            state_lines = []
+            errors = []
+
+            for image_path, membership_number, encoding, error in future.result():
+                processed += 1
+                if error:
+                    errors.append((image_path, membership_number, error))
+                    state_lines.append({'image_path': image_path, 'status': 'error'})
+                    continue
+
+                member_id = member_ids[membership_number]
+                if member_id not in enrolled_members:
+                    encoding_path = f"{output_dir}/member_{member_id}.pkl"
+                    with open(encoding_path, 'wb') as f:
+                        pickle.dump(np.array(encoding), f)
+                    pending_updates.append((encoding_path, member_id))
+                    enrolled_members.add(member_id)
+                state_lines.append({'image_path': image_path, 'status': 'ok'})
+
+            # Commit the database first so a resumed run never skips an image whose update was lost
+            save_encodings(pending_updates)
+            for line in state_lines:
+                state.write(json.dumps(line) + '\n')
+            state.flush()
+            append_errors(report_path, errors)
+            failed += len(errors)
+
+            elapsed = time.time() - started
+            print(f"⏳ {processed}/{len(jobs)} images, {processed / elapsed:.1f} img/s")
+
+    print(f"✅ Enrolled {len(enrolled_members)} member(s) from {processed} image(s)")
+    if failed:
+        print(f"⚠️  {failed} image(s) failed, see {report_path}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk enroll member face photos')
+    parser.add_argument('source', help='directory of photos or CSV manifest (image_path,membership_number)')
+    parser.add_argument('--state', default='enroll_state.jsonl', help='progress file used to resume interrupted runs')
+    parser.add_argument('--report', default='enroll_errors.csv', help='per-image error report, appended to by each run')
+    parser.add_argument('--workers', type=int, default=None, help='encoder processes (default: CPU count)')
+    parser.add_argument('--batch-size', type=int, default=16, help='images per descriptor batch')
+    parser.add_argument('--jitters', type=int, default=1, help='dlib num_jitters per face')
+    args = parser.parse_args()
+
+    enroll(args.source, args.state, args.report, args.workers, args.batch_size, args.jitters)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
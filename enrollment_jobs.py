@@ -0,0 +1,186 @@
+import json
+import os
+import socket
+import threading
+import database
+import config
+import face_utils
+import metrics
+
+class EnrollmentWorker(threading.Thread):
+    """Background thread that encodes uploaded face images for queued enrollment jobs.
+
+    Jobs live in the enrollment_jobs table, so a restart only loses the job
+    that was in flight, and that one is requeued once its heartbeat goes stale.
+    """
+
+    def __init__(self, poll_interval=None, stale_after=None):
+        super().__init__(name='enrollment-worker', daemon=True)
+        self.poll_interval = poll_interval or config.Config.ENROLLMENT_POLL_INTERVAL
+        self.stale_after = stale_after or config.Config.ENROLLMENT_STALE_AFTER
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.wakeup = threading.Event()
+
+    def run(self):
+        while True:
+            try:
+                self.requeue_stale_jobs()
+                job = self.claim_job()
+                if job:
+                    self.process_job(job)
+                    continue
+            except Exception as e:
+                print(f"❌ Enrollment worker error: {e}")
+
+            self.wakeup.wait(self.poll_interval)
+            self.wakeup.clear()
+
+    def requeue_stale_jobs(self):
+        """Put back jobs whose worker stopped updating them (crash or restart)"""
+        conn = database.get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("""
+                UPDATE enrollment_jobs SET status = 'queued', worker = NULL
+                WHERE status = 'running' AND updated_at < NOW() - INTERVAL %s SECOND
+            """, (self.stale_after,))
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def claim_job(self):
+        """Atomically take the oldest queued job, or return None"""
+        conn = database.get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+
+        try:
+            cursor.execute("""
+                UPDATE enrollment_jobs SET status = 'running', worker = %s, started_at = NOW()
+                WHERE status = 'queued'
+                ORDER BY id LIMIT 1
+            """, (self.worker_id,))
+            conn.commit()
+            if cursor.rowcount == 0:
+                return None
+
+            cursor.execute("""
+                SELECT j.id, j.member_id, j.file_paths, m.fullname, m.status AS member_status
+                FROM enrollment_jobs j
+                JOIN members m ON j.member_id = m.id
+                WHERE j.status = 'running' AND j.worker = %s
+                ORDER BY j.started_at DESC LIMIT 1
+            """, (self.worker_id,))
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def process_job(self, job):
+        file_paths = json.loads(job['file_paths'])
+        conn = database.get_db_connection()
+        cursor = conn.cursor()
+        success_count = 0
+        last_encoding_path = last_encoding = None
+        errors = []
+
+        try:
+            for processed, filepath in enumerate(file_paths, start=1):
+                try:
+                    encoding_path, face_encoding = face_utils.save_face_encoding(filepath, job['member_id'])
+                    if encoding_path:
+                        success_count += 1
+                        last_encoding_path, last_encoding = encoding_path, face_encoding
+                    else:
+                        errors.append(f"{os.path.basename(filepath)}: no face found")
+                        os.remove(filepath)
+                except Exception as e:
+                    errors.append(f"{os.path.basename(filepath)}: {e}")
+
+                # Progress doubles as the heartbeat that keeps the job from being requeued
+                cursor.execute("UPDATE enrollment_jobs SET processed_files = %s, succeeded_files = %s WHERE id = %s",
+                               (processed, success_count, job['id']))
+                conn.commit()
+
+            if last_encoding_path:
+                cursor.execute("UPDATE members SET face_encoding_path = %s WHERE id = %s", (last_encoding_path, job['member_id']))
+                if job['member_status'] == 'active':
+                    face_utils.update_member_encoding(job['member_id'], job['fullname'], last_encoding)
+
+            cursor.execute("""
+                UPDATE enrollment_jobs SET status = %s, error = %s, finished_at = NOW()
+                WHERE id = %s
+            """, ('completed' if success_count else 'failed', '\n'.join(errors) or None, job['id']))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            cursor.execute("UPDATE enrollment_jobs SET status = 'failed', error = %s, finished_at = NOW() WHERE id = %s",
+                           (str(e), job['id']))
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+_worker = None
+_worker_lock = threading.Lock()
+
+def start_worker():
+    """Start the background enrollment worker once per process"""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = EnrollmentWorker()
+            _worker.start()
+    return _worker
+
+def create_job(member_id, file_paths, created_by=None):
+    """Queue saved upload files for encoding and return the job id"""
+    conn = database.get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("""
+            INSERT INTO enrollment_jobs (member_id, status, file_paths, total_files, created_by)
+            VALUES (%s, 'queued', %s, %s, %s)
+        """, (member_id, json.dumps(file_paths), len(file_paths), created_by))
+        conn.commit()
+        job_id = cursor.lastrowid
+    finally:
+        cursor.close()
+        conn.close()
+
+    if _worker is not None:
+        _worker.wakeup.set()
+    return job_id
+
+def count_queued_jobs():
+    """Number of enrollment jobs waiting for the worker"""
+    conn = database.get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("SELECT COUNT(*) FROM enrollment_jobs WHERE status = 'queued'")
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+        conn.close()
+
+metrics.register_gauge('enrollment_queue_depth', 'Enrollment jobs waiting to be encoded', count_queued_jobs,
+                       config.Config.METRICS_QUEUE_DEPTH_MAX_AGE)
+
+def get_job(job_id):
+    """Return the job status row as a dict, or None"""
+    conn = database.get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        cursor.execute("""
+            SELECT id, member_id, status, total_files, processed_files, succeeded_files,
+                   error, created_at, started_at, finished_at
+            FROM enrollment_jobs WHERE id = %s
+        """, (job_id,))
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
\ No newline at end of file
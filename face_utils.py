@@ -1,37 +1,95 @@
-import face_recognition
 import cv2
 import numpy as np
 import pickle
 import os
+import io
+import threading
+import time
 from datetime import datetime
 import database
+import config
+import encoding_cache
+import metrics
+
+# cv2.imdecode flags for decoding JPEGs at 1/2, 1/4 or 1/8 size via DCT scaling
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8
+}
+
+_init_lock = threading.RLock()
+_models = None
+_face_system = None
+_gallery_listeners = []
+
+def get_models():
+    """Import face_recognition, which loads the dlib models, on first use"""
+    global _models
+    if _models is None:
+        with _init_lock:
+            if _models is None:
+                started = time.perf_counter()
+                import face_recognition
+                _models = face_recognition
+                print(f"✅ Face models loaded in {time.perf_counter() - started:.1f}s")
+    return _models
 
 class AdvancedFaceRecognition:
-    def __init__(self):
+    def __init__(self, load=True):
         self.known_face_encodings = []
         self.known_face_ids = []
         self.known_face_names = []
-        self.load_known_faces()
+        self.known_face_matrix = np.empty((0, 128))
+        self.known_face_norms = np.empty(0)
+        self.member_index = {}
+        self.event_galleries = {}
+        if load:
+            self.load_known_faces()
+    
+    def set_gallery(self, known_face_ids, known_face_names, known_face_encodings):
+        """Replace the whole gallery"""
+        matrix = np.array(known_face_encodings, dtype=np.float64).reshape(-1, 128)
+        self.known_face_encodings = list(known_face_encodings)
+        self.known_face_ids = list(known_face_ids)
+        self.known_face_names = list(known_face_names)
+        self.known_face_matrix = matrix
+        self.known_face_norms = np.einsum('ij,ij->i', matrix, matrix)
+        self.member_index = {member_id: index for index, member_id in enumerate(self.known_face_ids)}
+        # Roster indices point into the old matrix, so rebuild them lazily
+        self.event_galleries = {}
+        metrics.gallery_size.set(len(self.known_face_ids))
     
     def load_known_faces(self):
         """Load all known face encodings from database"""
+        started = time.perf_counter()
         conn = database.get_db_connection()
+        if not conn:
+            print("❌ Error loading known faces: no database connection")
+            return
         cursor = conn.cursor(dictionary=True)
         
         try:
             cursor.execute("SELECT id, fullname, face_encoding_path FROM members WHERE face_encoding_path IS NOT NULL AND status = 'active'")
             members = cursor.fetchall()
             
+            known_face_encodings = []
+            known_face_ids = []
+            known_face_names = []
+            
             for member in members:
                 encoding_path = member['face_encoding_path']
                 if os.path.exists(encoding_path):
                     with open(encoding_path, 'rb') as f:
                         face_encoding = pickle.load(f)
                     
-                    self.known_face_encodings.append(face_encoding)
-                    self.known_face_ids.append(member['id'])
-                    self.known_face_names.append(member['fullname'])
+                    known_face_encodings.append(face_encoding)
+                    known_face_ids.append(member['id'])
+                    known_face_names.append(member['fullname'])
             
+            self.set_gallery(known_face_ids, known_face_names, known_face_encodings)
+            metrics.gallery_reload_seconds.observe(time.perf_counter() - started)
             print(f"✅ Loaded {len(self.known_face_ids)} known faces")
         except Exception as e:
             print(f"❌ Error loading known faces: {e}")
@@ -39,57 +97,266 @@ class AdvancedFaceRecognition:
             cursor.close()
             conn.close()
     
-    def recognize_faces(self, image):
-        """Recognize faces in the given image with confidence scores"""
+    def get_event_gallery(self, event_id):
+        """Return gallery row indices for the event roster, or None if the event has no roster
+        
+        A cached roster is trusted for ROSTER_CHECK_INTERVAL seconds, then kept
+        only while the event's roster_version is unchanged, so roster edits made
+        in another worker are picked up without reloading the gallery.
+        """
+        cached = self.event_galleries.get(event_id)
+        if cached and time.monotonic() - cached[2] < config.Config.ROSTER_CHECK_INTERVAL:
+            return cached[0]
+        
+        conn = database.get_db_connection()
+        cursor = conn.cursor()
+        
         try:
-            rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            face_locations = face_recognition.face_locations(rgb_image, model="hog")
-            face_encodings = face_recognition.face_encodings(rgb_image, face_locations)
-            
-            recognized_members = []
+            cursor.execute("SELECT roster_version FROM events WHERE id = %s", (event_id,))
+            row = cursor.fetchone()
+            version = row[0] if row else None
+            if cached and cached[1] == version:
+                self.event_galleries[event_id] = (cached[0], version, time.monotonic())
+                return cached[0]
+            cursor.execute("SELECT member_id FROM event_roster WHERE event_id = %s", (event_id,))
+            roster = [row[0] for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"❌ Error loading event roster: {e}")
+            return None
+        finally:
+            cursor.close()
+            conn.close()
+        
+        if roster:
+            gallery = np.array([self.member_index[member_id] for member_id in roster if member_id in self.member_index], dtype=np.intp)
+        else:
+            gallery = None
+        
+        self.event_galleries[event_id] = (gallery, version, time.monotonic())
+        return gallery
+    
+    def invalidate_event_gallery(self, event_id=None):
+        """Drop the cached roster gallery for one event, or for all events"""
+        if event_id is None:
+            self.event_galleries = {}
+        else:
+            self.event_galleries.pop(event_id, None)
+    
+    def match_face(self, face_encoding, candidates=None):
+        """Return (member_id, confidence) of the closest known face, or None below the threshold"""
+        gallery = self.known_face_matrix if candidates is None else self.known_face_matrix[candidates]
+        if len(gallery) == 0:
+            return None
+        
+        face_distances = get_models().face_distance(gallery, face_encoding)
+        best_match_index = np.argmin(face_distances)
+        confidence = 1 - face_distances[best_match_index]
+        
+        if confidence <= config.Config.CONFIDENCE_THRESHOLD:
+            return None
+        
+        if candidates is not None:
+            best_match_index = candidates[best_match_index]
+        return self.known_face_ids[best_match_index], confidence
+    
+    def match_faces(self, face_encodings, candidates=None):
+        """Batch version of match_face: one matrix product scores every probe against the gallery"""
+        if len(face_encodings) == 0:
+            return []
+        
+        if candidates is None:
+            gallery, gallery_norms = self.known_face_matrix, self.known_face_norms
+        else:
+            gallery, gallery_norms = self.known_face_matrix[candidates], self.known_face_norms[candidates]
+        if len(gallery) == 0:
+            return [None] * len(face_encodings)
+        
+        probes = np.asarray(face_encodings, dtype=np.float64).reshape(-1, 128)
+        # |g - p|^2 = |g|^2 + |p|^2 - 2 g.p
+        squared = gallery_norms[None, :] + np.einsum('ij,ij->i', probes, probes)[:, None] - 2 * probes @ gallery.T
+        best_match_indices = np.argmin(squared, axis=1)
+        best_distances = np.sqrt(np.maximum(squared[np.arange(len(probes)), best_match_indices], 0))
+        
+        matches = []
+        for best_match_index, distance in zip(best_match_indices, best_distances):
+            confidence = 1 - distance
+            if confidence <= config.Config.CONFIDENCE_THRESHOLD:
+                matches.append(None)
+                continue
+            if candidates is not None:
+                best_match_index = candidates[best_match_index]
+            matches.append((self.known_face_ids[best_match_index], confidence))
+        return matches
+    
+    def update_member_encoding(self, member_id, fullname, face_encoding):
+        """Add or replace one member in the gallery without reloading every encoding"""
+        index = self.member_index.get(member_id)
+        
+        if index is None:
+            self.known_face_encodings = self.known_face_encodings + [face_encoding]
+            self.known_face_ids = self.known_face_ids + [member_id]
+            self.known_face_names = self.known_face_names + [fullname]
+            self.known_face_matrix = np.vstack([self.known_face_matrix, np.asarray(face_encoding).reshape(1, 128)])
+            self.known_face_norms = np.append(self.known_face_norms, np.dot(face_encoding, face_encoding))
+            self.member_index = {**self.member_index, member_id: len(self.known_face_ids) - 1}
+            metrics.gallery_size.set(len(self.known_face_ids))
+            # A new member may belong to rosters that were resolved without them
+            self.event_galleries = {}
+        else:
+            matrix = self.known_face_matrix.copy()
+            matrix[index] = face_encoding
+            norms = self.known_face_norms.copy()
+            norms[index] = np.dot(face_encoding, face_encoding)
+            self.known_face_matrix = matrix
+            self.known_face_norms = norms
+            self.known_face_encodings[index] = face_encoding
+            self.known_face_names[index] = fullname
+    
+    def get_member_name(self, member_id):
+        """Return the full name of a gallery member"""
+        index = self.member_index.get(member_id)
+        return self.known_face_names[index] if index is not None else None
+    
+    def recognize_faces(self, image, event_id=None):
+        """Recognize faces in the given BGR image with confidence scores"""
+        return self.recognize_rgb_faces(cv2.cvtColor(image, cv2.COLOR_BGR2RGB), event_id)
+    
+    def recognize_rgb_faces(self, rgb_image, event_id=None):
+        """Recognize faces in an image that is already in RGB order"""
+        try:
+            models = get_models()
+            with metrics.timed('detect'):
+                face_locations = models.face_locations(rgb_image, model="hog")
+            metrics.faces_detected.inc(len(face_locations))
+            with metrics.timed('encode'):
+                face_encodings = models.face_encodings(rgb_image, face_locations)
             
-            for face_encoding in face_encodings:
-                if len(self.known_face_encodings) == 0:
-                    continue
+            with metrics.timed('match'):
+                candidates = self.get_event_gallery(event_id) if event_id else None
+                matches = self.match_faces(face_encodings, candidates)
                 
-                face_distances = face_recognition.face_distance(self.known_face_encodings, face_encoding)
-                best_match_index = np.argmin(face_distances)
-                best_distance = face_distances[best_match_index]
-                confidence = 1 - best_distance
+                # Fall back to the whole gallery for walk-ins not on the roster
+                if candidates is not None:
+                    misses = [index for index, match in enumerate(matches) if match is None]
+                    if misses:
+                        fallback = self.match_faces([face_encodings[index] for index in misses])
+                        for index, match in zip(misses, fallback):
+                            matches[index] = match
                 
-                if confidence > 0.6:
-                    recognized_members.append((self.known_face_ids[best_match_index], confidence))
+                recognized_members = [match for match in matches if match]
             
+            metrics.faces_matched.inc(len(recognized_members))
+            metrics.faces_rejected.inc(len(face_encodings) - len(recognized_members))
             return recognized_members
         except Exception as e:
             print(f"❌ Error in face recognition: {e}")
             return []
 
-# Global instance
-face_system = AdvancedFaceRecognition()
+# Global instance, created on first use
+def get_face_system():
+    """Return the shared recognizer, loading the gallery on first call"""
+    global _face_system
+    if _face_system is None:
+        with _init_lock:
+            if _face_system is None:
+                _face_system = AdvancedFaceRecognition()
+    return _face_system
 
-def encode_and_save_face(image_path, member_id):
-    """Encode face from image and save encoding"""
-    try:
-        image = face_recognition.load_image_file(image_path)
-        face_encodings = face_recognition.face_encodings(image)
-        
-        if len(face_encodings) > 0:
-            encoding_path = f"known_faces/member_{member_id}.pkl"
-            with open(encoding_path, 'wb') as f:
-                pickle.dump(face_encodings[0], f)
-            
-            face_system.load_known_faces()
-            return encoding_path
-        else:
-            return None
-    except Exception as e:
-        print(f"❌ Error encoding face: {e}")
+def add_gallery_listener(callback):
+    """Call callback() whenever this process changes its gallery or rosters"""
+    _gallery_listeners.append(callback)
+
+def notify_gallery_changed():
+    for callback in _gallery_listeners:
+        try:
+            callback()
+        except Exception as e:
+            print(f"❌ Gallery listener error: {e}")
+
+def warm_up(background=True):
+    """Load models and gallery ahead of the first recognition request"""
+    def load():
+        try:
+            started = time.perf_counter()
+            get_models().face_locations(np.zeros((64, 64, 3), dtype=np.uint8))
+            get_face_system()
+            print(f"✅ Face recognition warmed up in {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            print(f"❌ Face recognition warm-up failed: {e}")
+    
+    if not background:
+        load()
         return None
+    thread = threading.Thread(target=load, name='face-warmup', daemon=True)
+    thread.start()
+    return thread
+
+def compute_face_encodings(image_bytes):
+    """Return (face_locations, face_encodings) for an encoded image, reusing cached results"""
+    cache = encoding_cache.get_cache()
+    key = cache.make_key(image_bytes, config.Config.FACE_LANDMARK_MODEL, config.Config.FACE_ENCODING_JITTERS)
+    entry = cache.get(key)
+    if entry is not None:
+        return entry['locations'], entry['encodings']
+    
+    models = get_models()
+    image = models.load_image_file(io.BytesIO(image_bytes))
+    face_locations = models.face_locations(image)
+    face_encodings = models.face_encodings(image, face_locations,
+                                           num_jitters=config.Config.FACE_ENCODING_JITTERS,
+                                           model=config.Config.FACE_LANDMARK_MODEL)
+    cache.put(key, face_locations, face_encodings)
+    return face_locations, face_encodings
+
+def save_face_encoding(image_path, member_id):
+    """Encode face from image and save encoding, returning (encoding_path, encoding)"""
+    with open(image_path, 'rb') as f:
+        image_bytes = f.read()
+    face_locations, face_encodings = compute_face_encodings(image_bytes)
+    
+    if len(face_encodings) == 0:
+        return None, None
+    
+    encoding_path = f"known_faces/member_{member_id}.pkl"
+    with open(encoding_path, 'wb') as f:
+        pickle.dump(face_encodings[0], f)
+    return encoding_path, face_encodings[0]
 
-def recognize_faces(image):
+def recognize_faces(image, event_id=None):
     """Recognize faces in image using the global system"""
-    return face_system.recognize_faces(image)
+    return get_face_system().recognize_faces(image, event_id)
+
+def recognize_rgb_faces(rgb_image, event_id=None):
+    """Recognize faces in an RGB image using the global system"""
+    return get_face_system().recognize_rgb_faces(rgb_image, event_id)
+
+def decode_image(image_buffer, reduce_factor=1):
+    """Decode JPEG/PNG bytes (or any buffer) straight into an RGB array.
+    
+    np.frombuffer wraps the buffer without copying and the BGR to RGB swap
+    is done in place, so the decoded pixels are the only allocation.
+    """
+    flags = REDUCED_DECODE_FLAGS.get(reduce_factor, cv2.IMREAD_COLOR)
+    with metrics.timed('imdecode'):
+        image = cv2.imdecode(np.frombuffer(image_buffer, np.uint8), flags)
+        if image is None:
+            return None
+        cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
+    return image
+
+def update_member_encoding(member_id, fullname, face_encoding):
+    """Add or replace a member encoding in the live gallery"""
+    get_face_system().update_member_encoding(member_id, fullname, face_encoding)
+    notify_gallery_changed()
+
+def get_member_name(member_id):
+    """Look up a member name from the loaded gallery"""
+    return get_face_system().get_member_name(member_id)
+
+def invalidate_event_gallery(event_id=None):
+    """Forget this process's cached roster galleries after a roster changes (other workers notice roster_version)"""
+    if _face_system is not None:
+        _face_system.invalidate_event_gallery(event_id)
 
 def allowed_file(filename):
     """Check if file type is allowed"""
@@ -0,0 +1,77 @@
+"""Production server configuration (Linux/macOS).
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+    python run.py                        # same thing
+
+The master imports the app, loads the dlib models and the face gallery, then
+forks SERVER_WORKERS workers with SERVER_THREADS threads each. Workers
+inherit the models and the gallery matrix copy-on-write instead of loading
+their own.
+
+Graceful reload (kill -HUP <master pid>) rebuilds the gallery in the master
+and replaces the workers. Old workers finish their in-flight requests within
+SERVER_GRACEFUL_TIMEOUT. A worker whose gallery changes, i.e. after an
+enrollment, asks the master for this reload itself after SERVER_RELOAD_DELAY
+seconds, so the other workers pick the new encodings up too. Roster edits
+need no reload: each worker re-reads a roster once its roster_version moves
+(see face_utils.get_event_gallery).
+"""
+import gc
+import os
+import signal
+import threading
+import time
+from config import Config
+
+bind = Config.SERVER_BIND
+workers = Config.SERVER_WORKERS
+threads = Config.SERVER_THREADS
+worker_class = 'gthread'
+timeout = Config.SERVER_TIMEOUT
+graceful_timeout = Config.SERVER_GRACEFUL_TIMEOUT
+preload_app = True
+
+def preload(server):
+    """Load models and gallery in the master and keep them out of the GC's way"""
+    import face_utils
+
+    started = time.perf_counter()
+    face_utils.get_models()
+    face_utils.get_face_system()
+    # Objects that survive to fork time are never collected, so the GC must not touch their pages
+    gc.collect()
+    gc.freeze()
+    server.log.info("Preloaded face models and gallery in %.1fs", time.perf_counter() - started)
+
+def when_ready(server):
+    preload(server)
+
+def on_reload(server):
+    import face_utils
+
+    gc.unfreeze()
+    face_utils.get_face_system().load_known_faces()
+    preload(server)
+
+def post_fork(server, worker):
+    import app
+    import face_utils
+
+    app.start_background_services()
+
+    if Config.SERVER_RELOAD_DELAY > 0:
+        master_pid = os.getppid()
+        pending = threading.Lock()
+
+        def request_reload():
+            # Several changes in quick succession become one reload
+            if not pending.acquire(blocking=False):
+                return
+            def send():
+                server.log.info("Worker %s: gallery changed, asking master to reload", worker.pid)
+                os.kill(master_pid, signal.SIGHUP)
+            timer = threading.Timer(Config.SERVER_RELOAD_DELAY, send)
+            timer.daemon = True
+            timer.start()
+
+        face_utils.add_gallery_listener(request_reload)
\ No newline at end of file
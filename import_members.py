@@ -0,0 +1,101 @@
+"""Bulk member registration from a CSV file.
+
+Usage:
+    python import_members.py members.csv
+    python import_members.py members.csv --status active --batch-size 500
+
+The CSV needs fullname and email columns and may have phone, address,
+date_of_birth, emergency_contact, membership_type and join_date
+(YYYY-MM-DD, default today). Rows without a name or email, or with an
+invalid join_date, are reported and skipped.
+
+Each batch takes a range of consecutive membership numbers from the counter
+with one UPDATE (see membership_numbers.py). It then inserts its members with
+one executemany and updates the report rollups, all in one transaction.
+"""
+import argparse
+import csv
+from collections import Counter
+from datetime import date
+import database
+import membership_numbers
+import report_rollups
+
+OPTIONAL_COLUMNS = ['phone', 'address', 'date_of_birth', 'emergency_contact', 'membership_type']
+
+def read_members(path, status):
+    """(valid rows ready to insert without a membership number, list of skipped line numbers)"""
+    rows = []
+    skipped = []
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for line, record in enumerate(csv.DictReader(f), start=2):
+            fullname = (record.get('fullname') or '').strip()
+            email = (record.get('email') or '').strip()
+            if not fullname or not email:
+                skipped.append(line)
+                continue
+            join_date = (record.get('join_date') or '').strip()
+            try:
+                join_date = date.fromisoformat(join_date) if join_date else date.today()
+            except ValueError:
+                skipped.append(line)
+                continue
+            optional = [(record.get(column) or '').strip() or None for column in OPTIONAL_COLUMNS]
+            rows.append((fullname, email, *optional, status, join_date))
+    return rows, skipped
+
+def insert_batch(batch):
+    """Number and insert one batch of members in a single transaction"""
+    conn = database.get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        numbers = membership_numbers.allocate_membership_numbers(cursor, len(batch))
+        cursor.executemany("""
+            INSERT INTO members (
+                fullname, email, phone, address, date_of_birth, emergency_contact, membership_type,
+                status, join_date, membership_number
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, [row + (number,) for row, number in zip(batch, numbers)])
+        for month, count in Counter(row[-1].replace(day=1) for row in batch).items():
+            report_rollups.add_members(cursor, month, count)
+        conn.commit()
+        return numbers
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+def import_members(path, status='pending', batch_size=1000):
+    rows, skipped = read_members(path, status)
+    imported = 0
+    first_number = last_number = None
+
+    for start in range(0, len(rows), batch_size):
+        numbers = insert_batch(rows[start:start + batch_size])
+        imported += len(numbers)
+        first_number = first_number or numbers[0]
+        last_number = numbers[-1]
+        print(f"⏳ {imported}/{len(rows)} members imported", end='\r')
+
+    if imported:
+        print(f"✅ Imported {imported} member(s), {first_number} to {last_number}")
+    else:
+        print("⚠️  No members imported")
+    if skipped:
+        print(f"⚠️  Skipped {len(skipped)} row(s) without a name, email or valid join_date (CSV lines {', '.join(map(str, skipped[:20]))}"
+              f"{', ...' if len(skipped) > 20 else ''})")
+
+def main():
+    parser = argparse.ArgumentParser(description='Register members in bulk from a CSV file')
+    parser.add_argument('source', help='CSV with fullname,email and optional member columns')
+    parser.add_argument('--status', choices=['pending', 'active'], default='pending', help='status of imported members')
+    parser.add_argument('--batch-size', type=int, default=1000, help='members per transaction')
+    args = parser.parse_args()
+
+    import_members(args.source, args.status, args.batch_size)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
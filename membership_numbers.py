@@ -0,0 +1,101 @@
+"""Membership number allocation from a counter in the sequences table.
+
+Numbers are MEM followed by at least six digits. The counter row holds the
+last number handed out and is advanced with one atomic
+UPDATE ... SET last_value = LAST_INSERT_ID(last_value + n), so concurrent
+registrations never get the same number and no count of members is needed.
+On first use the counter starts after the highest MEM number already in
+members.
+
+With MEMBERSHIP_NUMBER_BLOCK at 1, the number is taken inside the caller's
+transaction, so a rolled back registration gives its number back. With a
+larger block, each process reserves that many numbers at a time in a
+transaction of its own and hands them out from memory. Numbers then follow
+the order of reservation rather than registration, and any unused part of a
+block is skipped when the process exits.
+"""
+import os
+import threading
+import config
+import database
+
+SEQUENCE_NAME = 'membership_number'
+PREFIX = 'MEM'
+
+def format_number(value):
+    return f"{PREFIX}{value:06d}"
+
+def reserve(cursor, count):
+    """Advance the counter by count and return the last number of the reserved range; the caller commits"""
+    cursor.execute("UPDATE sequences SET last_value = LAST_INSERT_ID(last_value + %s) WHERE name = %s",
+                   (count, SEQUENCE_NAME))
+    if cursor.rowcount == 0:
+        # First allocation on this database: continue after existing numbers (INSERT IGNORE if another process won)
+        cursor.execute("""
+            INSERT IGNORE INTO sequences (name, last_value)
+            SELECT %s, COALESCE(MAX(CAST(SUBSTRING(membership_number, %s) AS UNSIGNED)), 0)
+            FROM members WHERE membership_number LIKE %s
+        """, (SEQUENCE_NAME, len(PREFIX) + 1, PREFIX + '%'))
+        cursor.execute("UPDATE sequences SET last_value = LAST_INSERT_ID(last_value + %s) WHERE name = %s",
+                       (count, SEQUENCE_NAME))
+    cursor.execute("SELECT LAST_INSERT_ID()")
+    return cursor.fetchone()[0]
+
+def reserve_committed(count):
+    """reserve() in a transaction of its own"""
+    conn = database.get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        last = reserve(cursor, count)
+        conn.commit()
+        return last
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+class MembershipNumberAllocator:
+    """Hands out membership numbers, optionally from a per-process block"""
+
+    def __init__(self, block_size=None):
+        self.block_size = max(1, block_size or config.Config.MEMBERSHIP_NUMBER_BLOCK)
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        self.next_value = 1
+        self.last_value = 0
+
+    def next_number(self, cursor):
+        """The next membership number; cursor (a plain, non-dictionary cursor) is the registration's transaction"""
+        if self.block_size == 1:
+            return format_number(reserve(cursor, 1))
+
+        with self.lock:
+            # A forked worker must not hand out what is left of its parent's block
+            if self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.next_value, self.last_value = 1, 0
+            if self.next_value > self.last_value:
+                self.last_value = reserve_committed(self.block_size)
+                self.next_value = self.last_value - self.block_size + 1
+            value = self.next_value
+            self.next_value += 1
+        return format_number(value)
+
+    def allocate_range(self, cursor, count):
+        """count consecutive membership numbers for a bulk import; the caller commits"""
+        if count <= 0:
+            return []
+        last = reserve(cursor, count)
+        return [format_number(value) for value in range(last - count + 1, last + 1)]
+
+# Global allocator instance
+allocator = MembershipNumberAllocator()
+
+def next_membership_number(cursor):
+    return allocator.next_number(cursor)
+
+def allocate_membership_numbers(cursor, count):
+    return allocator.allocate_range(cursor, count)
\ No newline at end of file
@@ -35,6 +35,12 @@ CREATE TABLE IF NOT EXISTS members (
     FOREIGN KEY (approved_by) REFERENCES users(id)
 );
 
+-- Sequences Table (last number handed out per counter, see membership_numbers.py)
+CREATE TABLE IF NOT EXISTS sequences (
+    name VARCHAR(50) PRIMARY KEY,
+    last_value BIGINT NOT NULL DEFAULT 0
+);
+
 -- Events Table
 CREATE TABLE IF NOT EXISTS events (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -47,6 +53,7 @@ CREATE TABLE IF NOT EXISTS events (
     event_type VARCHAR(100),
     created_by INT,
     status VARCHAR(20) DEFAULT 'scheduled',
+    roster_version INT NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (created_by) REFERENCES users(id)
@@ -67,6 +74,36 @@ CREATE TABLE IF NOT EXISTS attendance (
     FOREIGN KEY (marked_by) REFERENCES users(id)
 );
 
+-- Event Roster Table (expected attendees, used to narrow face matching)
+CREATE TABLE IF NOT EXISTS event_roster (
+    event_id INT NOT NULL,
+    member_id INT NOT NULL,
+    PRIMARY KEY (event_id, member_id),
+    FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE,
+    FOREIGN KEY (member_id) REFERENCES members(id) ON DELETE CASCADE
+);
+
+-- Enrollment Jobs Table (face uploads waiting to be encoded)
+CREATE TABLE IF NOT EXISTS enrollment_jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    member_id INT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    file_paths JSON NOT NULL,
+    total_files INT NOT NULL DEFAULT 0,
+    processed_files INT NOT NULL DEFAULT 0,
+    succeeded_files INT NOT NULL DEFAULT 0,
+    error TEXT,
+    worker VARCHAR(255),
+    created_by INT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP NULL,
+    finished_at TIMESTAMP NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_enrollment_jobs_status (status),
+    FOREIGN KEY (member_id) REFERENCES members(id) ON DELETE CASCADE,
+    FOREIGN KEY (created_by) REFERENCES users(id)
+);
+
 -- Annual Plans Table
 CREATE TABLE IF NOT EXISTS annual_plans (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -79,9 +116,32 @@ CREATE TABLE IF NOT EXISTS annual_plans (
     uploaded_by INT,
     uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     analyzed_at TIMESTAMP NULL,
+    content_hash CHAR(64),
+    analysis_hash CHAR(64),
+    analyzer_version VARCHAR(32),
+    analysis_status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    analysis_error TEXT,
+    analysis_worker VARCHAR(255),
+    analysis_started_at TIMESTAMP NULL,
     FOREIGN KEY (uploaded_by) REFERENCES users(id)
 );
 
+-- Plan Search Index Tables (see plan_search.py)
+CREATE TABLE IF NOT EXISTS plan_documents (
+    plan_id INT PRIMARY KEY,
+    length INT NOT NULL,
+    indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (plan_id) REFERENCES annual_plans(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS plan_terms (
+    term VARCHAR(64) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+    plan_id INT NOT NULL,
+    tf INT NOT NULL,
+    PRIMARY KEY (term, plan_id),
+    FOREIGN KEY (plan_id) REFERENCES annual_plans(id) ON DELETE CASCADE
+);
+
 -- Member Activities Table
 CREATE TABLE IF NOT EXISTS member_activities (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -94,6 +154,31 @@ CREATE TABLE IF NOT EXISTS member_activities (
     FOREIGN KEY (member_id) REFERENCES members(id) ON DELETE CASCADE
 );
 
+-- Report rollups, maintained by the application (see report_rollups.py)
+CREATE TABLE IF NOT EXISTS member_growth_monthly (
+    month DATE PRIMARY KEY,
+    new_members INT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS event_attendance_rollup (
+    event_id INT PRIMARY KEY,
+    total_attendance INT NOT NULL DEFAULT 0,
+    unique_members INT NOT NULL DEFAULT 0,
+    confidence_sum DECIMAL(14,4) NOT NULL DEFAULT 0,
+    confidence_count INT NOT NULL DEFAULT 0,
+    last_recognized_at TIMESTAMP NULL,
+    FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS member_attendance_rollup (
+    member_id INT PRIMARY KEY,
+    events_attended INT NOT NULL DEFAULT 0,
+    confidence_sum DECIMAL(14,4) NOT NULL DEFAULT 0,
+    confidence_count INT NOT NULL DEFAULT 0,
+    last_attendance TIMESTAMP NULL,
+    FOREIGN KEY (member_id) REFERENCES members(id) ON DELETE CASCADE
+);
+
 -- Create indexes for better query performance (with conditional checks)
 CREATE INDEX IF NOT EXISTS idx_members_status ON members(status);
 CREATE INDEX IF NOT EXISTS idx_members_email ON members(email);
@@ -104,31 +189,32 @@ CREATE INDEX IF NOT EXISTS idx_attendance_member_event ON attendance(member_id,
 CREATE INDEX IF NOT EXISTS idx_attendance_recognized ON attendance(recognized_at);
 CREATE INDEX IF NOT EXISTS idx_attendance_event ON attendance(event_id);
 CREATE INDEX IF NOT EXISTS idx_annual_plans_year ON annual_plans(year);
+CREATE INDEX IF NOT EXISTS idx_annual_plans_analysis_status ON annual_plans(analysis_status);
+CREATE INDEX IF NOT EXISTS idx_annual_plans_analysis_hash ON annual_plans(analysis_hash);
+CREATE INDEX IF NOT EXISTS idx_plan_terms_plan ON plan_terms(plan_id);
 CREATE INDEX IF NOT EXISTS idx_member_activities_member ON member_activities(member_id);
 CREATE INDEX IF NOT EXISTS idx_member_activities_date ON member_activities(activity_date);
 
--- Create Views
+-- Create Views (read the rollups instead of aggregating attendance on every query)
 CREATE OR REPLACE VIEW member_attendance_summary AS
 SELECT 
     m.id,
     m.fullname,
     m.membership_number,
-    COUNT(a.id) as total_events_attended,
-    AVG(a.confidence) as avg_confidence,
-    MAX(a.recognized_at) as last_attendance
+    COALESCE(r.events_attended, 0) as total_events_attended,
+    r.confidence_sum / NULLIF(r.confidence_count, 0) as avg_confidence,
+    r.last_attendance
 FROM members m
-LEFT JOIN attendance a ON m.id = a.member_id
-WHERE m.status = 'active'
-GROUP BY m.id, m.fullname, m.membership_number;
+LEFT JOIN member_attendance_rollup r ON m.id = r.member_id
+WHERE m.status = 'active';
 
 CREATE OR REPLACE VIEW event_attendance_stats AS
 SELECT 
     e.id,
     e.title,
     e.event_date,
-    COUNT(a.id) as total_attendance,
-    COUNT(DISTINCT a.member_id) as unique_members,
-    AVG(a.confidence) as avg_confidence
+    COALESCE(r.total_attendance, 0) as total_attendance,
+    COALESCE(r.unique_members, 0) as unique_members,
+    r.confidence_sum / NULLIF(r.confidence_count, 0) as avg_confidence
 FROM events e
-LEFT JOIN attendance a ON e.id = a.event_id
-GROUP BY e.id, e.title, e.event_date;
\ No newline at end of file
+LEFT JOIN event_attendance_rollup r ON e.id = r.event_id;
\ No newline at end of file
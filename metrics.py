@@ -0,0 +1,165 @@
+"""Process-local metrics with Prometheus text exposition.
+
+Stage timings recorded with timed() also go into a per-request dict when the
+current thread has called begin_request(), so API responses can echo them.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def format_labels(labelnames, labelvalues, extra=None):
+    pairs = list(zip(labelnames, labelvalues)) + (extra or [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+    
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+    
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            values = dict(self.values) or ({(): 0} if not self.labelnames else {})
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{format_labels(self.labelnames, key)} {value}")
+        return lines
+
+class Gauge:
+    def __init__(self, name, documentation, callback=None, max_age=0):
+        self.name = name
+        self.documentation = documentation
+        self.value = 0
+        self.callback = callback
+        self.max_age = max_age
+        self.computed_at = None
+        self.lock = threading.Lock()
+    
+    def set(self, value):
+        self.value = value
+    
+    def render(self):
+        if self.callback:
+            with self.lock:
+                # A callback that queries the database runs at most once per max_age, however often /metrics is scraped
+                if self.computed_at is None or time.monotonic() - self.computed_at >= self.max_age:
+                    try:
+                        self.value = self.callback()
+                    except Exception:
+                        self.value = float('nan')
+                    self.computed_at = time.monotonic()
+        value = self.value
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge", f"{self.name} {value}"]
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self.lock = threading.Lock()
+    
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+    
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            series = {key: dict(value, counts=list(value['counts'])) for key, value in self.series.items()}
+        for key, value in sorted(series.items()):
+            for bound, count in zip(self.buckets, value['counts']):
+                lines.append(f"{self.name}_bucket{format_labels(self.labelnames, key, [('le', bound)])} {count}")
+            lines.append(f"{self.name}_bucket{format_labels(self.labelnames, key, [('le', '+Inf')])} {value['count']}")
+            lines.append(f"{self.name}_sum{format_labels(self.labelnames, key)} {value['sum']}")
+            lines.append(f"{self.name}_count{format_labels(self.labelnames, key)} {value['count']}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+    
+    def register(self, metric):
+        with self.lock:
+            return self.metrics.setdefault(metric.name, metric)
+    
+    def render(self):
+        lines = []
+        with self.lock:
+            metrics = list(self.metrics.values())
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+registry = Registry()
+
+stage_seconds = registry.register(Histogram(
+    'recognition_stage_seconds', 'Time spent in each recognition pipeline stage', ['stage']))
+request_seconds = registry.register(Histogram(
+    'http_request_seconds', 'Request latency by Flask endpoint', ['endpoint']))
+gallery_reload_seconds = registry.register(Histogram(
+    'face_gallery_reload_seconds', 'Time to reload all known face encodings'))
+gallery_size = registry.register(Gauge(
+    'face_gallery_size', 'Number of face encodings in the loaded gallery'))
+faces_detected = registry.register(Counter('faces_detected_total', 'Faces found by the detector'))
+faces_matched = registry.register(Counter('faces_matched_total', 'Faces matched to a member above the threshold'))
+faces_rejected = registry.register(Counter('faces_rejected_total', 'Faces whose best match was below the threshold'))
+attendance_rows_written = registry.register(Counter('attendance_rows_written_total', 'Attendance rows inserted or updated'))
+
+_local = threading.local()
+
+def begin_request():
+    """Start collecting stage timings for the current thread"""
+    _local.timings = {}
+
+def end_request():
+    """Stop collecting and return the stage timings (ms) for the current thread"""
+    timings = getattr(_local, 'timings', None)
+    _local.timings = None
+    return timings
+
+def current_timings():
+    return getattr(_local, 'timings', None)
+
+def record_stage(stage, seconds):
+    stage_seconds.observe(seconds, stage=stage)
+    timings = getattr(_local, 'timings', None)
+    if timings is not None:
+        timings[stage] = round(timings.get(stage, 0) + seconds * 1000, 3)
+
+@contextmanager
+def timed(stage):
+    """Time a block as one recognition pipeline stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+def register_gauge(name, documentation, callback, max_age=0):
+    """Expose a value computed at scrape time, reused for max_age seconds"""
+    return registry.register(Gauge(name, documentation, callback, max_age))
+
+def render():
+    return registry.render()
\ No newline at end of file
@@ -3,6 +3,7 @@ from mysql.connector import Error
 import pandas as pd
 from datetime import datetime, date
 import logging
+import db_metrics
 
 class MySQLDatabase:
     def __init__(self, host='localhost', user='root', password='', database='attendance_system'):
@@ -17,14 +18,14 @@ class MySQLDatabase:
     def connect(self):
         """Establish database connection"""
         try:
-            self.connection = mysql.connector.connect(
+            self.connection = db_metrics.instrument(mysql.connector.connect(
                 host=self.host,
                 user=self.user,
                 password=self.password,
                 database=self.database,
                 charset='utf8mb4',
                 collation='utf8mb4_unicode_ci'
-            )
+            ))
             if self.connection.is_connected():
                 self.logger.info("Successfully connected to MySQL database")
                 return True
@@ -1,7 +1,6 @@
 import os
 import sys
 from datetime import datetime, timedelta
-import pandas as pd
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -13,9 +12,6 @@ class AttendanceMySQL:
     def __init__(self):
         self.db = MySQLDatabase()
         self.schema = MySQLSchema(self.db)
-        
-        # Initialize database
-        self.initialize_database()
 
     def initialize_database(self):
         """Initialize database tables and sample data"""
@@ -118,6 +114,7 @@ class AttendanceMySQL:
         data = self.db.execute_query(query, (start_date, end_date), fetch=True)
         
         if data:
+            import pandas as pd  # only exports need it; keeps app import fast
             df = pd.DataFrame(data)
             filename = filename or f"attendance_export_{start_date}_to_{end_date}.csv"
             df.to_csv(filename, index=False)
@@ -133,4 +130,8 @@ class AttendanceMySQL:
             return backup_file
         except Exception as e:
             print(f"Backup failed: {e}")
-            return None
\ No newline at end of file
+            return None
+
+if __name__ == "__main__":
+    # Schema setup runs here rather than whenever the app imports this module
+    AttendanceMySQL().initialize_database()
\ No newline at end of file
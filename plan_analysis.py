@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import socket
+import threading
+from collections import Counter
+import database
+import config
+import metrics
+import plan_search
+import report_analyzer
+
+class PlanAnalysisWorker(threading.Thread):
+    """Background thread that analyzes uploaded annual plans.
+    
+    The queue is the analysis_status column of annual_plans. A stored analysis
+    is reused, for the same plan or any other, whenever the file's SHA-256 and
+    report_analyzer.analyzer_version() match, so unchanged files are never
+    analyzed twice.
+    """
+    
+    def __init__(self, poll_interval=None, stale_after=None):
+        super().__init__(name='plan-analysis-worker', daemon=True)
+        self.poll_interval = poll_interval or config.Config.PLAN_ANALYSIS_POLL_INTERVAL
+        self.stale_after = stale_after or config.Config.PLAN_ANALYSIS_STALE_AFTER
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.wakeup = threading.Event()
+    
+    def run(self):
+        while True:
+            try:
+                self.requeue_stale_plans()
+                plan = self.claim_plan()
+                if plan:
+                    self.process_plan(plan)
+                    continue
+            except Exception as e:
+                print(f"❌ Plan analysis worker error: {e}")
+            
+            self.wakeup.wait(self.poll_interval)
+            self.wakeup.clear()
+    
+    def requeue_stale_plans(self):
+        """Put back analyses whose worker died before finishing"""
+        conn = database.get_db_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                UPDATE annual_plans SET analysis_status = 'queued', analysis_worker = NULL
+                WHERE analysis_status = 'running' AND analysis_started_at < NOW() - INTERVAL %s SECOND
+            """, (self.stale_after,))
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def claim_plan(self):
+        """Atomically take the oldest queued plan, or return None"""
+        conn = database.get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        
+        try:
+            cursor.execute("""
+                UPDATE annual_plans SET analysis_status = 'running', analysis_worker = %s, analysis_started_at = NOW()
+                WHERE analysis_status = 'queued'
+                ORDER BY id LIMIT 1
+            """, (self.worker_id,))
+            conn.commit()
+            if cursor.rowcount == 0:
+                return None
+            
+            cursor.execute("""
+                SELECT id, file_path FROM annual_plans
+                WHERE analysis_status = 'running' AND analysis_worker = %s
+                ORDER BY analysis_started_at DESC LIMIT 1
+            """, (self.worker_id,))
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
+    
+    def process_plan(self, plan):
+        # Analyze without holding a connection; large documents take a while
+        vocabulary = Counter()
+        source_plan_id = None
+        try:
+            content_hash = file_hash(plan['file_path'])
+            cached = find_cached_analysis(content_hash)
+            if cached:
+                source_plan_id, analysis = cached
+            else:
+                analysis = report_analyzer.analyze_document(plan['file_path'], vocabulary)
+            error = analysis.get('error')
+        except Exception as e:
+            content_hash, analysis, error = None, None, str(e)
+        
+        conn = database.get_db_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                UPDATE annual_plans
+                SET analysis_data = COALESCE(%s, analysis_data), analyzed_at = NOW(),
+                    content_hash = COALESCE(%s, content_hash), analysis_hash = %s, analyzer_version = %s,
+                    analysis_status = %s, analysis_error = %s, analysis_worker = NULL
+                WHERE id = %s AND analysis_worker = %s
+            """, (json.dumps(analysis) if analysis else None, content_hash, content_hash,
+                  report_analyzer.analyzer_version(), 'failed' if error else 'completed', error,
+                  plan['id'], self.worker_id))
+            # Skip the index if the plan was requeued and claimed by another worker meanwhile
+            if cursor.rowcount and not error:
+                if source_plan_id:
+                    plan_search.copy_index(cursor, source_plan_id, plan['id'])
+                else:
+                    plan_search.index_plan(cursor, plan['id'], vocabulary, analysis['word_count'])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+_worker = None
+_worker_lock = threading.Lock()
+
+def start_worker():
+    """Start the background plan analysis worker once per process"""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = PlanAnalysisWorker()
+            _worker.start()
+    return _worker
+
+def file_hash(file_path):
+    """SHA-256 of a file, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def find_cached_analysis(content_hash):
+    """(plan id, analysis) of a completed, search-indexed analysis of identical content by the current analyzer, or None"""
+    conn = database.get_db_connection()
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("""
+            SELECT p.id, p.analysis_data FROM annual_plans p
+            JOIN plan_documents d ON d.plan_id = p.id
+            WHERE p.analysis_hash = %s AND p.analyzer_version = %s AND p.analysis_status = 'completed'
+            LIMIT 1
+        """, (content_hash, report_analyzer.analyzer_version()))
+        row = cursor.fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+    finally:
+        cursor.close()
+        conn.close()
+
+def queue_analysis(plan_id, file_path):
+    """Reuse a cached analysis of this file's content, or queue the plan for the worker.
+    
+    Returns 'cached' or 'queued'.
+    """
+    content_hash = file_hash(file_path)
+    cached = find_cached_analysis(content_hash)
+    conn = database.get_db_connection()
+    cursor = conn.cursor()
+    
+    try:
+        if cached:
+            source_plan_id, analysis = cached
+            cursor.execute("""
+                UPDATE annual_plans
+                SET analysis_data = %s, analyzed_at = NOW(), content_hash = %s, analysis_hash = %s,
+                    analyzer_version = %s, analysis_status = 'completed', analysis_error = NULL
+                WHERE id = %s
+            """, (json.dumps(analysis), content_hash, content_hash, report_analyzer.analyzer_version(), plan_id))
+            plan_search.copy_index(cursor, source_plan_id, plan_id)
+        else:
+            cursor.execute("""
+                UPDATE annual_plans SET content_hash = %s, analysis_status = 'queued', analysis_worker = NULL
+                WHERE id = %s AND analysis_status <> 'running'
+            """, (content_hash, plan_id))
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    
+    if cached:
+        return 'cached'
+    if _worker is not None:
+        _worker.wakeup.set()
+    return 'queued'
+
+def is_stale(plan):
+    """True when a plan's stored analysis no longer matches its file or the analyzer"""
+    return (plan['analysis_hash'] != plan['content_hash'] or
+            plan['analyzer_version'] != report_analyzer.analyzer_version())
+
+def count_queued_plans():
+    """Number of plans waiting for the analysis worker"""
+    conn = database.get_db_connection()
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("SELECT COUNT(*) FROM annual_plans WHERE analysis_status = 'queued'")
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+        conn.close()
+
+metrics.register_gauge('plan_analysis_queue_depth', 'Annual plans waiting to be analyzed', count_queued_plans,
+                       config.Config.METRICS_QUEUE_DEPTH_MAX_AGE)
\ No newline at end of file
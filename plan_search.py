@@ -0,0 +1,125 @@
+"""Ranked full-text search over analyzed annual plans.
+
+The index is a pair of MySQL tables filled from the analyzer's word counts
+whenever a plan is analyzed: plan_terms holds one posting (term, plan, term
+frequency) per distinct word of a plan, and plan_documents holds each plan's
+length in words. search() scores plans with BM25, reading only the postings of
+the query's terms.
+"""
+import heapq
+import math
+import time
+import database
+import report_analyzer
+
+# BM25 parameters: term frequency saturation and document length normalization
+K1 = 1.2
+B = 0.75
+MAX_QUERY_TERMS = 20
+INSERT_BATCH = 1000
+
+def index_plan(cursor, plan_id, vocabulary, length):
+    """Replace a plan's postings with vocabulary (term -> count); the caller commits"""
+    cursor.execute("DELETE FROM plan_terms WHERE plan_id = %s", (plan_id,))
+    rows = [(term, plan_id, count) for term, count in vocabulary.items()]
+    for start in range(0, len(rows), INSERT_BATCH):
+        cursor.executemany("INSERT INTO plan_terms (term, plan_id, tf) VALUES (%s, %s, %s)",
+                           rows[start:start + INSERT_BATCH])
+    cursor.execute("""
+        INSERT INTO plan_documents (plan_id, length) VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE length = VALUES(length), indexed_at = NOW()
+    """, (plan_id, length))
+
+def copy_index(cursor, source_plan_id, plan_id):
+    """Give plan_id the postings of a plan with identical content; the caller commits"""
+    if source_plan_id == plan_id:
+        return
+    cursor.execute("DELETE FROM plan_terms WHERE plan_id = %s", (plan_id,))
+    cursor.execute("INSERT INTO plan_terms (term, plan_id, tf) SELECT term, %s, tf FROM plan_terms WHERE plan_id = %s",
+                   (plan_id, source_plan_id))
+    cursor.execute("""
+        INSERT INTO plan_documents (plan_id, length)
+        SELECT %s, length FROM plan_documents WHERE plan_id = %s
+        ON DUPLICATE KEY UPDATE length = VALUES(length), indexed_at = NOW()
+    """, (plan_id, source_plan_id))
+
+def query_terms(query):
+    """Distinct index terms of a query, in order, the way the analyzer tokenizes documents"""
+    terms = []
+    for token in report_analyzer.TOKEN_PATTERN.findall(query.lower()):
+        if token[0] not in '.!?' and 1 < len(token) <= report_analyzer.MAX_TERM_LENGTH and token not in terms:
+            terms.append(token)
+    return terms[:MAX_QUERY_TERMS]
+
+def search(query, year=None, plan_type=None, limit=20):
+    """Plans ranked by BM25 for query, best first, as dicts with score and matched_terms"""
+    terms = query_terms(query)
+    if not terms:
+        return []
+
+    conn = database.get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("SELECT COUNT(*), AVG(length) FROM plan_documents")
+        total_plans, average_length = cursor.fetchone()
+        if not total_plans:
+            return []
+        average_length = float(average_length) or 1.0
+
+        placeholders = ', '.join(['%s'] * len(terms))
+        cursor.execute(f"SELECT term, COUNT(*) FROM plan_terms WHERE term IN ({placeholders}) GROUP BY term", terms)
+        idf = {term: math.log(1 + (total_plans - plans + 0.5) / (plans + 0.5)) for term, plans in cursor.fetchall()}
+        if not idf:
+            return []
+
+        query_sql = f"""
+            SELECT t.plan_id, t.term, t.tf, d.length
+            FROM plan_terms t
+            JOIN plan_documents d ON d.plan_id = t.plan_id
+            JOIN annual_plans p ON p.id = t.plan_id
+            WHERE t.term IN ({', '.join(['%s'] * len(idf))})
+        """
+        params = list(idf)
+        if year:
+            query_sql += " AND p.year = %s"
+            params.append(year)
+        if plan_type:
+            query_sql += " AND p.plan_type = %s"
+            params.append(plan_type)
+        cursor.execute(query_sql, params)
+
+        scores = {}
+        matched = {}
+        for plan_id, term, tf, length in cursor.fetchall():
+            weight = idf[term] * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / average_length))
+            scores[plan_id] = scores.get(plan_id, 0) + weight
+            matched.setdefault(plan_id, []).append(term)
+
+        ranked = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        if not ranked:
+            return []
+
+        cursor.execute(f"""
+            SELECT id, title, description, plan_type, year
+            FROM annual_plans WHERE id IN ({', '.join(['%s'] * len(ranked))})
+        """, [plan_id for plan_id, _ in ranked])
+        plans = {row[0]: row for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+        conn.close()
+
+    results = []
+    for plan_id, score in ranked:
+        if plan_id in plans:
+            _, title, description, plan_type, year = plans[plan_id]
+            results.append({'id': plan_id, 'title': title, 'description': description, 'plan_type': plan_type,
+                            'year': year, 'score': round(score, 4),
+                            'matched_terms': [term for term in terms if term in matched[plan_id]]})
+    return results
+
+def timed_search(query, year=None, plan_type=None, limit=20):
+    """search() plus how long it took, in milliseconds"""
+    started = time.perf_counter()
+    results = search(query, year, plan_type, limit)
+    return results, round((time.perf_counter() - started) * 1000, 2)
\ No newline at end of file
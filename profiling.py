@@ -0,0 +1,228 @@
+"""Opt-in per-request profiling.
+
+Requests flagged for profiling (PROFILE_ALL_REQUESTS, or the X-Profile header
+from an admin) run under cProfile and are always saved as .prof files, which
+load with `python -m pstats` or snakeviz.
+
+When PROFILE_SLOW_REQUEST_MS is set, every other request is watched by one
+shared stack sampler thread. Samples are kept only if the request ends up
+slower than the threshold, and are saved as collapsed stacks (.folded) for
+flamegraph.pl or speedscope.
+
+Saved files live in PROFILE_DIR, which is capped at PROFILE_MAX_FILES by
+deleting the oldest profiles.
+"""
+import cProfile
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from config import Config
+
+class StackSampler(threading.Thread):
+    """Samples the stacks of watched threads at a fixed interval"""
+
+    def __init__(self, interval):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.watched = {}
+
+    def watch(self, thread_id):
+        with self.lock:
+            self.watched[thread_id] = Counter()
+
+    def unwatch(self, thread_id):
+        """Stop sampling a thread and return its stack counts"""
+        with self.lock:
+            return self.watched.pop(thread_id, None)
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            with self.lock:
+                if not self.watched:
+                    continue
+                frames = sys._current_frames()
+                for thread_id, stacks in self.watched.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[collapse_stack(frame)] += 1
+
+def collapse_stack(frame):
+    """Root-first 'file:function;...' string for one frame chain"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+class ProfileStore:
+    """Bounded directory of saved profiles"""
+
+    FILENAME = re.compile(r'^(\d{8}-\d{6}-\d{6})_([\w.-]+)_(\d+)ms\.(prof|folded)$')
+
+    def __init__(self, directory, max_files):
+        self.directory = directory
+        self.max_files = max_files
+        self.lock = threading.Lock()
+
+    def name(self, endpoint, elapsed_ms, extension):
+        endpoint = re.sub(r'[^\w.-]', '-', endpoint or 'unknown')
+        return f"{datetime.now():%Y%m%d-%H%M%S-%f}_{endpoint}_{int(elapsed_ms)}ms.{extension}"
+
+    def save(self, name, write):
+        """Write a profile with write(path) and rotate; returns the file name"""
+        os.makedirs(self.directory, exist_ok=True)
+        write(os.path.join(self.directory, name))
+        self.rotate()
+        return name
+
+    def rotate(self):
+        with self.lock:
+            names = sorted(name for name in os.listdir(self.directory) if self.FILENAME.match(name))
+            for name in names[:max(0, len(names) - self.max_files)]:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def list(self):
+        """Saved profiles, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            match = self.FILENAME.match(name)
+            if not match:
+                continue
+            profiles.append({
+                'name': name,
+                'captured_at': datetime.strptime(match.group(1), '%Y%m%d-%H%M%S-%f'),
+                'endpoint': match.group(2),
+                'duration_ms': int(match.group(3)),
+                'kind': 'cProfile' if match.group(4) == 'prof' else 'sampled',
+                'size_kb': round(os.path.getsize(os.path.join(self.directory, name)) / 1024, 1)
+            })
+        return profiles
+
+    def path(self, name):
+        """Absolute path of a saved profile, or None for unknown names"""
+        if not self.FILENAME.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+class RequestProfiler:
+    def __init__(self):
+        self.store = ProfileStore(Config.PROFILE_DIR, Config.PROFILE_MAX_FILES)
+        self.slow_request_ms = Config.PROFILE_SLOW_REQUEST_MS
+        self.sampler = None
+        self.sampler_lock = threading.Lock()
+        self.local = threading.local()
+
+    def get_sampler(self):
+        with self.sampler_lock:
+            if self.sampler is None:
+                self.sampler = StackSampler(Config.PROFILE_SAMPLE_INTERVAL)
+                self.sampler.start()
+            return self.sampler
+
+    def begin_request(self, explicit=False):
+        """Start profiling the current thread's request if asked or sampling is on"""
+        self.local.profile = None
+        self.local.sampled = False
+        self.local.name = None
+
+        if explicit:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+                self.local.profile = profile
+                return
+            except ValueError:
+                # Another profiler owns the interpreter; fall back to sampling
+                pass
+
+        if explicit or self.slow_request_ms > 0:
+            self.get_sampler().watch(threading.get_ident())
+            self.local.sampled = True
+
+    def capture_name(self, endpoint, elapsed_ms):
+        """Name end_request will save the capture under, or None if it will not be kept"""
+        if getattr(self.local, 'profile', None) is not None:
+            extension = 'prof'
+        elif getattr(self.local, 'sampled', False) and elapsed_ms >= self.slow_request_ms:
+            extension = 'folded'
+        else:
+            return None
+        self.local.name = self.store.name(endpoint, elapsed_ms, extension)
+        return self.local.name
+
+    def end_request(self, endpoint, elapsed_ms):
+        """Stop profiling and save the capture if kept; returns the file name or None"""
+        profile = getattr(self.local, 'profile', None)
+        sampled = getattr(self.local, 'sampled', False)
+        name = getattr(self.local, 'name', None)
+        self.local.profile = None
+        self.local.sampled = False
+        self.local.name = None
+
+        try:
+            if profile is not None:
+                profile.disable()
+                return self.store.save(name or self.store.name(endpoint, elapsed_ms, 'prof'), profile.dump_stats)
+
+            if sampled:
+                stacks = self.sampler.unwatch(threading.get_ident())
+                if stacks and elapsed_ms >= self.slow_request_ms:
+                    return self.store.save(name or self.store.name(endpoint, elapsed_ms, 'folded'),
+                                           lambda path: write_folded(path, stacks))
+        except Exception as e:
+            print(f"❌ Error saving request profile: {e}")
+        return None
+
+def write_folded(path, stacks):
+    with open(path, 'w', encoding='utf-8') as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+def summarize(path, limit=40):
+    """Plain-text summary of a saved profile for the admin page"""
+    if path.endswith('.prof'):
+        import io
+        import pstats
+        output = io.StringIO()
+        pstats.Stats(path, stream=output).sort_stats('cumulative').print_stats(limit)
+        return output.getvalue()
+
+    with open(path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    total = sum(int(line.rsplit(' ', 1)[1]) for line in lines) or 1
+    summary = [f"{total} samples"]
+    for line in lines[:limit]:
+        stack, count = line.rsplit(' ', 1)
+        summary.append(f"{int(count) * 100 / total:6.1f}%  {stack.split(';')[-1]}  <-  {stack}")
+    return '\n'.join(summary)
+
+# Global instance
+profiler = RequestProfiler()
+
+def begin_request(explicit=False):
+    profiler.begin_request(explicit)
+
+def capture_name(endpoint, elapsed_ms):
+    return profiler.capture_name(endpoint, elapsed_ms)
+
+def end_request(endpoint, elapsed_ms):
+    return profiler.end_request(endpoint, elapsed_ms)
+
+def list_profiles():
+    return profiler.store.list()
+
+def profile_path(name):
+    return profiler.store.path(name)
\ No newline at end of file
@@ -0,0 +1,227 @@
+"""Bulk re-analysis of annual plans.
+
+Usage:
+    python reanalyze_plans.py                           # every plan whose file or analyzer changed
+    python reanalyze_plans.py --year 2024 --type strategic
+    python reanalyze_plans.py --force                   # re-analyze unchanged plans too
+
+Plans are hashed and analyzed in a process pool. A plan is skipped when its
+file's SHA-256 and report_analyzer.analyzer_version() match its stored
+analysis and it is in the search index, so after tuning
+ReportAnalyzer.keywords only the analyses that are actually affected are
+redone. Results and search postings are written back in batches. Admins can
+start the same run from the plans page.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import database
+import plan_analysis
+import plan_search
+import report_analyzer
+
+def load_plans(year=None, plan_type=None):
+    """Plans matching the filters, with what is needed to decide whether to skip them"""
+    conn = database.get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        query = """
+            SELECT p.id, p.file_path, p.analysis_hash, p.analyzer_version, p.analysis_status,
+                   d.plan_id IS NOT NULL AS indexed
+            FROM annual_plans p
+            LEFT JOIN plan_documents d ON d.plan_id = p.id
+            WHERE 1 = 1
+        """
+        params = []
+        if year:
+            query += " AND p.year = %s"
+            params.append(year)
+        if plan_type:
+            query += " AND p.plan_type = %s"
+            params.append(plan_type)
+        cursor.execute(query + " ORDER BY p.id", params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+def analyze_plan(plan, analyzer_version, force):
+    """Hash one plan's file and analyze it unless its stored analysis is current (runs in a worker process)
+
+    Pool workers cannot start processes of their own, so PDFs are extracted
+    page by page here. Tasks run in the worker's main thread, where
+    report_analyzer.page_deadline bounds each page to PLAN_PDF_PAGE_TIMEOUT.
+    """
+    try:
+        size = os.path.getsize(plan['file_path'])
+        content_hash = plan_analysis.file_hash(plan['file_path'])
+        if (not force and plan['analysis_status'] == 'completed' and content_hash == plan['analysis_hash']
+                and plan['analyzer_version'] == analyzer_version and plan['indexed']):
+            return plan['id'], content_hash, None, None, None, size
+        vocabulary = Counter()
+        analysis = report_analyzer.analyze_document(plan['file_path'], vocabulary)
+        return plan['id'], content_hash, analysis, vocabulary, analysis.get('error'), size
+    except Exception as e:
+        return plan['id'], None, None, None, str(e), 0
+
+RESULT_ROW = ("SELECT %s AS analysis_data, %s AS content_hash, %s AS analysis_hash, %s AS analyzer_version, "
+              "%s AS analysis_status, %s AS analysis_error, %s AS id")
+
+def save_results(pending_updates, pending_index):
+    """Write a batch of analyses with one multi-row UPDATE, and their search postings, in one transaction
+
+    Returns the ids of the plans written. A plan the background worker is
+    analyzing right now is left alone, postings included, so it keeps the
+    worker's result.
+    """
+    if not pending_updates:
+        return set()
+
+    conn = database.get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        # Locking the rows keeps the worker from claiming a plan between this check and the writes below
+        plan_ids = sorted(row[-1] for row in pending_updates)
+        placeholders = ', '.join(['%s'] * len(plan_ids))
+        cursor.execute(f"""
+            SELECT id FROM annual_plans
+            WHERE id IN ({placeholders}) AND analysis_status <> 'running'
+            FOR UPDATE
+        """, plan_ids)
+        writable = {row[0] for row in cursor.fetchall()}
+        pending_updates = [row for row in pending_updates if row[-1] in writable]
+        pending_index = [entry for entry in pending_index if entry[0] in writable]
+        if not pending_updates:
+            conn.commit()
+            return writable
+
+        # mysql-connector runs an UPDATE executemany row by row, so the batch is joined in as a derived table
+        cursor.execute(f"""
+            UPDATE annual_plans p
+            JOIN ({' UNION ALL '.join([RESULT_ROW] * len(pending_updates))}) r ON r.id = p.id
+            SET p.analysis_data = COALESCE(r.analysis_data, p.analysis_data), p.analyzed_at = NOW(),
+                p.content_hash = COALESCE(r.content_hash, p.content_hash), p.analysis_hash = r.analysis_hash,
+                p.analyzer_version = r.analyzer_version, p.analysis_status = r.analysis_status,
+                p.analysis_error = r.analysis_error
+        """, [value for row in pending_updates for value in row])
+        for plan_id, vocabulary, length in pending_index:
+            plan_search.index_plan(cursor, plan_id, vocabulary, length)
+        conn.commit()
+        return writable
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+def reanalyze(year=None, plan_type=None, force=False, workers=None, batch_size=50, progress=None):
+    """Re-analyze matching plans and return a summary; progress(summary) is called after each batch"""
+    plans = load_plans(year, plan_type)
+    version = report_analyzer.analyzer_version()
+    summary = {'total': len(plans), 'processed': 0, 'analyzed': 0, 'skipped': 0, 'failed': 0, 'busy': 0,
+               'megabytes': 0.0, 'elapsed': 0.0, 'plans_per_second': 0.0, 'mb_per_second': 0.0}
+    started = time.time()
+    pending_updates = []
+    pending_index = []
+
+    def report():
+        written = save_results(pending_updates, pending_index)
+        for row in pending_updates:
+            if row[-1] not in written:
+                summary['busy'] += 1
+            else:
+                summary['failed' if row[4] == 'failed' else 'analyzed'] += 1
+        pending_updates.clear()
+        pending_index.clear()
+        summary['elapsed'] = round(time.time() - started, 1)
+        elapsed = max(time.time() - started, 1e-6)
+        summary['plans_per_second'] = round(summary['processed'] / elapsed, 2)
+        summary['mb_per_second'] = round(summary['megabytes'] / elapsed, 2)
+        if progress:
+            progress(dict(summary))
+
+    # spawn, not fork: the admin action runs inside a multi-threaded server process
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = [pool.submit(analyze_plan, plan, version, force) for plan in plans]
+
+        for future in as_completed(futures):
+            plan_id, content_hash, analysis, vocabulary, error, size = future.result()
+            summary['processed'] += 1
+            summary['megabytes'] += size / (1024 * 1024)
+            if analysis is None and error is None:
+                summary['skipped'] += 1
+            else:
+                pending_updates.append((json.dumps(analysis) if analysis else None, content_hash, content_hash,
+                                        version, 'failed' if error else 'completed', error, plan_id))
+                if not error:
+                    pending_index.append((plan_id, vocabulary, analysis['word_count']))
+
+            # Write every batch_size results, and report at least every 2s even when everything is skipped
+            if len(pending_updates) >= batch_size or time.time() - started - summary['elapsed'] >= 2:
+                report()
+
+    report()
+    return summary
+
+def print_progress(summary):
+    print(f"⏳ {summary['processed']}/{summary['total']} plans ({summary['analyzed']} analyzed, "
+          f"{summary['skipped']} unchanged, {summary['failed']} failed, {summary['busy']} left to the worker), "
+          f"{summary['plans_per_second']:.1f} plans/s, {summary['mb_per_second']:.1f} MB/s")
+
+# Admin-triggered runs: one at a time per process, progress kept for the plans page
+_run = None
+_run_lock = threading.Lock()
+
+def start_background(year=None, plan_type=None, force=False):
+    """Start reanalyze() in a thread; returns False if a run is already in progress"""
+    global _run
+    with _run_lock:
+        if _run is not None and _run['running']:
+            return False
+        _run = {'running': True, 'year': year, 'plan_type': plan_type, 'force': force,
+                'summary': None, 'error': None}
+        run = _run
+
+    def update(summary):
+        run['summary'] = summary
+
+    def target():
+        try:
+            reanalyze(year, plan_type, force, progress=update)
+        except Exception as e:
+            run['error'] = str(e)
+            print(f"❌ Plan re-analysis failed: {e}")
+        finally:
+            run['running'] = False
+
+    threading.Thread(target=target, name='plan-reanalysis', daemon=True).start()
+    return True
+
+def current_run():
+    """The latest admin-triggered run (running or finished), or None"""
+    return dict(_run) if _run is not None else None
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-analyze annual plans in bulk')
+    parser.add_argument('--year', type=int, help='only plans for this year')
+    parser.add_argument('--type', dest='plan_type', help='only plans of this type')
+    parser.add_argument('--force', action='store_true', help='re-analyze plans whose file and analyzer are unchanged')
+    parser.add_argument('--workers', type=int, default=None, help='analyzer processes (default: CPU count)')
+    parser.add_argument('--batch-size', type=int, default=50, help='plans per UPDATE batch')
+    args = parser.parse_args()
+
+    summary = reanalyze(args.year, args.plan_type, args.force, args.workers, args.batch_size, print_progress)
+    print(f"✅ Re-analyzed {summary['analyzed']} of {summary['total']} plan(s) in {summary['elapsed']}s "
+          f"({summary['skipped']} unchanged, {summary['failed']} failed, "
+          f"{summary['busy']} being analyzed by the background worker)")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
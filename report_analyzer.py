@@ -1,8 +1,160 @@
-import pandas as pd
+import csv
+import hashlib
+import itertools
+import multiprocessing
+import signal
+import threading
 import numpy as np
+from collections import Counter, deque
+from contextlib import contextmanager
 from datetime import datetime
 import json
 import re
+import config
+
+# Bump whenever analyze_document() output changes; stored plan analyses from an older version are redone.
+# Edits to the word lists are picked up by ReportAnalyzer.version() without a bump.
+ANALYZER_VERSION = 3
+
+# Words, plus runs of sentence-ending punctuation so readability needs no second pass
+TOKEN_PATTERN = re.compile(r'\w+|[.!?]+')
+
+# Documents are analyzed in chunks of about CHUNK_SIZE characters, cut after a
+# sentence end (or failing that, whitespace) so no word, goal or metric is split
+CHUNK_SIZE = 1024 * 1024
+SENTENCE_BREAK = re.compile(r'[.!?]+\s')
+
+MAX_GOALS = 10
+MAX_METRICS = 15
+MAX_TERM_LENGTH = 64  # longest word kept for the plan search index
+
+# Every repetition is bounded so one match costs at most a few hundred characters
+# of scanning, however long the unpunctuated run or digit string it lands in.
+MAX_GOAL_LENGTH = 200
+
+# Matched against lowercased text: case-sensitive alternations are much faster than IGNORECASE
+GOAL_PATTERNS = [
+    re.compile(r'(?:goal|objective|target|aim)\s{0,20}[:\-]\s{0,20}([^.]{1,%d})' % MAX_GOAL_LENGTH),
+    re.compile(r'(?:achieve|accomplish|reach)\s{1,20}([^.]{1,%d})' % MAX_GOAL_LENGTH)
+]
+
+# (?<!\d) anchors numbers at their first digit, so a long digit run is not retried from every position
+NUMBER = r'\d{1,15}(?:,\d{1,15}){0,10}(?:\.\d{1,15})?'
+METRIC_PATTERNS = [
+    re.compile(r'(?<!\d)(\d{1,15}%)'),
+    re.compile(r'(\$' + NUMBER + ')'),
+    re.compile(r'(?<![\d,.])(' + NUMBER + r'(?:\s{0,3}(?:units|members|events|%))?)')
+]
+
+def last_break(text, window=65536):
+    """Index just past the last safe cut point near the end of text, or 0"""
+    start = max(0, len(text) - window)
+    tail = text[start:]
+    match = None
+    for match in SENTENCE_BREAK.finditer(tail):
+        pass
+    if match:
+        return start + match.end()
+    index = max(tail.rfind(' '), tail.rfind('\n'))
+    return start + index + 1 if index >= 0 else 0
+
+def split_chunks(pieces, chunk_size=CHUNK_SIZE):
+    """Regroup text pieces into chunks that end on a sentence or word boundary"""
+    buffer = ''
+    for piece in pieces:
+        buffer += piece
+        if len(buffer) < chunk_size:
+            continue
+        cut = last_break(buffer)
+        if cut == 0:
+            # No whitespace at all; give up on a clean cut rather than grow without bound
+            if len(buffer) < 4 * chunk_size:
+                continue
+            cut = len(buffer)
+        yield buffer[:cut]
+        buffer = buffer[cut:]
+    if buffer:
+        yield buffer
+
+# Sequential PDF extraction gives up on a document after this many pages time out
+MAX_SLOW_PAGES = 3
+
+class PageTimeout(Exception):
+    pass
+
+@contextmanager
+def page_deadline(seconds):
+    """Raise PageTimeout in the block after seconds.
+    
+    Needs SIGALRM and the main thread, which pool workers such as bulk
+    re-analysis have; elsewhere (Windows, the background analysis thread) the
+    block is not bounded.
+    """
+    if not hasattr(signal, 'setitimer') or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+    
+    def expire(signum, frame):
+        raise PageTimeout()
+    
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+# Word XML namespace, for streaming paragraphs out of .docx files
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+_pdf_reader = None
+
+def open_pdf(file_path):
+    """Pool initializer: each worker process parses the PDF once"""
+    global _pdf_reader
+    from pypdf import PdfReader
+    
+    _pdf_reader = PdfReader(file_path)
+
+def extract_pdf_page(index):
+    return _pdf_reader.pages[index].extract_text() or ''
+
+class TextStats:
+    """Running totals for one document; the size does not grow with the document"""
+    
+    def __init__(self, terms, vocabulary_limit=0):
+        self.words = 0
+        self.letters = 0
+        self.sentence_breaks = 0
+        self.terms = dict.fromkeys(terms, 0)
+        self.goals = [[] for _ in GOAL_PATTERNS]
+        self.metrics = []
+        # Word counts for the plan search index, capped at the vocabulary_limit most frequent words
+        self.vocabulary_limit = vocabulary_limit
+        self.vocabulary = Counter() if vocabulary_limit else None
+    
+    def add_counts(self, counts):
+        for token, count in counts.items():
+            if token[0] in '.!?':
+                self.sentence_breaks += count
+            else:
+                self.words += count
+                self.letters += len(token) * count
+                if self.vocabulary is not None and 1 < len(token) <= MAX_TERM_LENGTH:
+                    self.vocabulary[token] += count
+        for term in self.terms:
+            self.terms[term] += counts.get(term, 0)
+        
+        # Pruning only when well over the limit keeps it cheap; rare words may be undercounted
+        if self.vocabulary is not None and len(self.vocabulary) > 2 * self.vocabulary_limit:
+            self.vocabulary = Counter(dict(self.vocabulary.most_common(self.vocabulary_limit)))
+    
+    def detected_goals(self):
+        return [goal for goals in self.goals for goal in goals][:MAX_GOALS]
+    
+    def detected_metrics(self):
+        return self.metrics[:MAX_METRICS]
 
 class ReportAnalyzer:
     def __init__(self):
@@ -13,9 +165,23 @@ class ReportAnalyzer:
             'budget': ['budget', 'cost', 'expense', 'funding', 'financial'],
             'risk': ['risk', 'challenge', 'issue', 'problem', 'concern']
         }
+        self.positive_words = ['success', 'achieve', 'growth', 'improve', 'positive', 'excellent', 'good']
+        self.negative_words = ['challenge', 'risk', 'issue', 'problem', 'negative', 'poor', 'difficult']
+        
+        # Every term is a single word, so term counts come straight from the token counts
+        self.terms = sorted({word for words in self.keywords.values() for word in words} |
+                            set(self.positive_words) | set(self.negative_words))
+    
+    def version(self):
+        """ANALYZER_VERSION plus a digest of the word lists, stored with each plan analysis"""
+        word_lists = json.dumps([self.keywords, self.positive_words, self.negative_words], sort_keys=True)
+        return f"{ANALYZER_VERSION}-{hashlib.sha1(word_lists.encode()).hexdigest()[:12]}"
     
-    def analyze_document(self, file_path):
-        """Analyze uploaded document for key information"""
+    def analyze_document(self, file_path, vocabulary=None):
+        """Analyze uploaded document for key information.
+        
+        If vocabulary (a Counter) is given, the document's word counts are added to it for the search index.
+        """
         analysis = {
             'file_type': file_path.split('.')[-1].upper(),
             'analysis_date': datetime.now().isoformat(),
@@ -29,90 +195,228 @@ class ReportAnalyzer:
         }
         
         try:
-            if file_path.endswith('.csv'):
-                content = self.read_csv(file_path)
-            elif file_path.endswith(('.xlsx', '.xls')):
-                content = self.read_excel(file_path)
-            else:
-                content = self.read_text_file(file_path)
+            vocabulary_limit = config.Config.PLAN_SEARCH_MAX_TERMS if vocabulary is not None else 0
+            try:
+                stats = self.scan(self.read_chunks(file_path, 'utf-8'), vocabulary_limit)
+            except UnicodeDecodeError:
+                stats = self.scan(self.read_chunks(file_path, 'latin-1'), vocabulary_limit)
+            if vocabulary is not None:
+                vocabulary.update(stats.vocabulary)
             
-            analysis['word_count'] = self.count_words(content)
-            analysis['keyword_frequency'] = self.analyze_keywords(content)
-            analysis['detected_goals'] = self.extract_goals(content)
-            analysis['detected_metrics'] = self.extract_metrics(content)
-            analysis['sentiment_score'] = self.analyze_sentiment(content)
-            analysis['readability_score'] = self.calculate_readability(content)
+            analysis['word_count'] = self.count_words(stats)
+            analysis['keyword_frequency'] = self.analyze_keywords(stats)
+            analysis['detected_goals'] = stats.detected_goals()
+            analysis['detected_metrics'] = stats.detected_metrics()
+            analysis['sentiment_score'] = self.analyze_sentiment(stats)
+            analysis['readability_score'] = self.calculate_readability(stats)
         except Exception as e:
             analysis['error'] = str(e)
         
         return analysis
     
-    def read_csv(self, file_path):
-        df = pd.read_csv(file_path)
-        return df.to_string()
+    def scan(self, pieces, vocabulary_limit=0):
+        """Feed a document through the analyzer chunk by chunk"""
+        stats = TextStats(self.terms, vocabulary_limit)
+        for chunk in split_chunks(pieces):
+            chunk_lower = chunk.lower()
+            stats.add_counts(self.count_tokens(chunk_lower))
+            self.extract_goals(chunk, stats.goals, chunk_lower)
+            self.extract_metrics(chunk, stats.metrics)
+        return stats
+    
+    def read_chunks(self, file_path, encoding):
+        extension = file_path.rsplit('.', 1)[-1].lower()
+        if extension == 'csv':
+            return self.read_csv(file_path, encoding)
+        elif extension == 'xlsx':
+            return self.read_excel(file_path)
+        elif extension == 'xls':
+            return self.read_legacy_excel(file_path)
+        elif extension == 'pdf':
+            return self.read_pdf(file_path)
+        elif extension == 'docx':
+            return self.read_docx(file_path)
+        elif extension == 'doc':
+            raise ValueError('Legacy .doc files cannot be analyzed; save the plan as .docx or PDF')
+        else:
+            return self.read_text_file(file_path, encoding)
+    
+    def read_csv(self, file_path, encoding='utf-8'):
+        with open(file_path, 'r', encoding=encoding, newline='') as file:
+            yield from self.join_rows(csv.reader(file))
     
     def read_excel(self, file_path):
+        from openpyxl import load_workbook
+        
+        # Read-only mode streams rows from the sheet XML instead of building the workbook
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            for sheet in workbook.worksheets:
+                yield from self.join_rows(sheet.iter_rows(values_only=True))
+        finally:
+            workbook.close()
+    
+    def read_legacy_excel(self, file_path):
+        import pandas as pd  # .xls has no row-streaming reader, but rows still skip to_string()
+        
         df = pd.read_excel(file_path)
-        return df.to_string()
+        yield from self.join_rows(itertools.chain([list(df.columns)], df.itertuples(index=False, name=None)))
     
-    def read_text_file(self, file_path):
+    def read_pdf(self, file_path):
+        from pypdf import PdfReader
+        
+        reader = PdfReader(file_path)
+        page_count = min(len(reader.pages), config.Config.PLAN_PDF_MAX_PAGES)
+        if page_count < len(reader.pages):
+            print(f"⚠️ {file_path}: analyzing the first {page_count} of {len(reader.pages)} pages")
+        
+        # A pool worker (e.g. bulk re-analysis) cannot start processes of its own
+        if page_count >= config.Config.PLAN_PDF_PARALLEL_PAGES and multiprocessing.parent_process() is None:
+            yield from self.read_pdf_parallel(file_path, page_count)
+            return
+        
+        # A page that fails or times out is skipped, as in the parallel path
+        timeout = config.Config.PLAN_PDF_PAGE_TIMEOUT
+        timeouts = 0
+        for index in range(page_count):
+            try:
+                with page_deadline(timeout):
+                    text = reader.pages[index].extract_text() or ''
+            except PageTimeout:
+                print(f"⚠️ {file_path}: page {index + 1} took over {timeout}s, skipped")
+                timeouts += 1
+                if timeouts >= MAX_SLOW_PAGES:
+                    print(f"⚠️ {file_path}: giving up after {timeouts} slow pages")
+                    return
+                continue
+            except Exception as e:
+                print(f"⚠️ {file_path}: page {index + 1} could not be read, skipped: {e}")
+                continue
+            yield text + '\n'
+    
+    def read_pdf_parallel(self, file_path, page_count):
+        """Extract pages in worker processes, yielding them in order; a page that times out is skipped"""
+        timeout = config.Config.PLAN_PDF_PAGE_TIMEOUT
+        workers = config.Config.PLAN_PDF_WORKERS
+        pool = multiprocessing.get_context('spawn').Pool(workers, initializer=open_pdf, initargs=(file_path,))
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read()
-        except:
-            with open(file_path, 'r', encoding='latin-1') as file:
-                return file.read()
-    
-    def count_words(self, text):
-        words = re.findall(r'\b\w+\b', text.lower())
-        return len(words)
-    
-    def analyze_keywords(self, text):
-        keyword_freq = {}
-        text_lower = text.lower()
-        
-        for category, words in self.keywords.items():
-            freq = 0
-            for word in words:
-                freq += len(re.findall(r'\b' + re.escape(word) + r'\b', text_lower))
-            keyword_freq[category] = freq
-        
-        return keyword_freq
-    
-    def extract_goals(self, text):
-        goals = []
-        goal_patterns = [
-            r'(?:goal|objective|target|aim)\s*[:\-]\s*([^.]+)',
-            r'(?:achieve|accomplish|reach)\s+([^.]+)'
-        ]
-        
-        for pattern in goal_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            goals.extend(matches)
-        
-        return goals[:10]
-    
-    def extract_metrics(self, text):
-        metrics = []
-        metric_patterns = [
-            r'(\d+%)',
-            r'(\$\d+(?:,\d+)*(?:\.\d+)?)',
-            r'(\d+(?:,\d+)*(?:\.\d+)?\s*(?:units|members|events|%)?)'
-        ]
-        
-        for pattern in metric_patterns:
-            matches = re.findall(pattern, text)
-            metrics.extend(matches)
-        
-        return list(set(metrics))[:15]
-    
-    def analyze_sentiment(self, text):
-        positive_words = ['success', 'achieve', 'growth', 'improve', 'positive', 'excellent', 'good']
-        negative_words = ['challenge', 'risk', 'issue', 'problem', 'negative', 'poor', 'difficult']
-        
-        text_lower = text.lower()
-        positive_count = sum(len(re.findall(r'\b' + re.escape(word) + r'\b', text_lower)) for word in positive_words)
-        negative_count = sum(len(re.findall(r'\b' + re.escape(word) + r'\b', text_lower)) for word in negative_words)
+            pending = deque()
+            next_page = 0
+            timeouts = 0
+            while next_page < page_count or pending:
+                # Only a few pages per worker in flight, so extracted text does not pile up
+                while next_page < page_count and len(pending) < workers * 4:
+                    pending.append((next_page, pool.apply_async(extract_pdf_page, (next_page,))))
+                    next_page += 1
+                
+                index, result = pending.popleft()
+                try:
+                    yield result.get(timeout) + '\n'
+                except multiprocessing.TimeoutError:
+                    print(f"⚠️ {file_path}: page {index + 1} took over {timeout}s, skipped")
+                    timeouts += 1
+                    if timeouts >= workers:
+                        # Every worker may now be stuck on a page; stop rather than time out on the rest
+                        print(f"⚠️ {file_path}: giving up after {timeouts} slow pages")
+                        return
+                except Exception as e:
+                    print(f"⚠️ {file_path}: page {index + 1} could not be read, skipped: {e}")
+        finally:
+            # terminate() also kills workers still stuck on a page
+            pool.terminate()
+    
+    def read_docx(self, file_path):
+        """Paragraphs streamed from word/document.xml, without building the whole document tree"""
+        import zipfile
+        from xml.etree import ElementTree
+        
+        def paragraphs(document):
+            parts = []
+            for _, element in ElementTree.iterparse(document):
+                if element.tag == WORD_NAMESPACE + 't':
+                    parts.append(element.text or '')
+                elif element.tag == WORD_NAMESPACE + 'tab':
+                    parts.append(' ')
+                elif element.tag == WORD_NAMESPACE + 'br':
+                    parts.append('\n')
+                elif element.tag == WORD_NAMESPACE + 'p':
+                    yield [''.join(parts)]
+                    parts = []
+                    element.clear()
+        
+        with zipfile.ZipFile(file_path) as archive, archive.open('word/document.xml') as document:
+            yield from self.join_rows(paragraphs(document))
+    
+    def read_text_file(self, file_path, encoding='utf-8'):
+        with open(file_path, 'r', encoding=encoding) as file:
+            while True:
+                chunk = file.read(CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+    
+    def join_rows(self, rows):
+        """Turn table rows into lines of text, yielded in CHUNK_SIZE batches"""
+        lines = []
+        size = 0
+        for row in rows:
+            # cell == cell drops pandas NaN
+            line = ' '.join(str(cell) for cell in row if cell is not None and cell != '' and cell == cell)
+            lines.append(line)
+            size += len(line) + 1
+            if size >= CHUNK_SIZE:
+                yield '\n'.join(lines) + '\n'
+                lines = []
+                size = 0
+        if lines:
+            yield '\n'.join(lines) + '\n'
+    
+    def count_tokens(self, text_lower):
+        """Counter of the words and sentence breaks in already lowercased text"""
+        return Counter(TOKEN_PATTERN.findall(text_lower))
+    
+    def count_words(self, stats):
+        return stats.words
+    
+    def analyze_keywords(self, stats):
+        return {category: sum(stats.terms[word] for word in words) for category, words in self.keywords.items()}
+    
+    def extract_goals(self, text, found=None, text_lower=None):
+        """Goals in text, added to found (one list per pattern) until each holds MAX_GOALS"""
+        found = found if found is not None else [[] for _ in GOAL_PATTERNS]
+        text_lower = text_lower if text_lower is not None else text.lower()
+        # Goals keep their original case when lowercasing kept every offset in place
+        source = text if len(text_lower) == len(text) else text_lower
+        
+        for pattern, goals in zip(GOAL_PATTERNS, found):
+            if len(goals) >= MAX_GOALS:
+                continue
+            for match in pattern.finditer(text_lower):
+                goals.append(source[match.start(1):match.end(1)])
+                if len(goals) >= MAX_GOALS:
+                    break
+        
+        return [goal for goals in found for goal in goals][:MAX_GOALS]
+    
+    def extract_metrics(self, text, found=None):
+        """Distinct metrics in text, added to found until it holds MAX_METRICS"""
+        found = found if found is not None else []
+        
+        for pattern in METRIC_PATTERNS:
+            if len(found) >= MAX_METRICS:
+                break
+            for match in pattern.finditer(text):
+                metric = match.group(1)
+                if metric not in found:
+                    found.append(metric)
+                    if len(found) >= MAX_METRICS:
+                        break
+        
+        return found[:MAX_METRICS]
+    
+    def analyze_sentiment(self, stats):
+        positive_count = sum(stats.terms[word] for word in self.positive_words)
+        negative_count = sum(stats.terms[word] for word in self.negative_words)
         
         total = positive_count + negative_count
         if total == 0:
@@ -120,15 +424,15 @@ class ReportAnalyzer:
         
         return positive_count / total
     
-    def calculate_readability(self, text):
-        sentences = re.split(r'[.!?]+', text)
-        words = re.findall(r'\b\w+\b', text)
+    def calculate_readability(self, stats):
+        # Text split on n runs of sentence-ending punctuation gives n + 1 sentences
+        sentences = stats.sentence_breaks + 1
         
-        if len(sentences) == 0 or len(words) == 0:
+        if stats.words == 0:
             return 0
         
-        avg_sentence_length = len(words) / len(sentences)
-        avg_word_length = sum(len(word) for word in words) / len(words)
+        avg_sentence_length = stats.words / sentences
+        avg_word_length = stats.letters / stats.words
         
         readability = 100 - (avg_sentence_length * 0.5 + avg_word_length * 10)
         return max(0, min(100, readability))
@@ -136,5 +440,8 @@ class ReportAnalyzer:
 # Global instance
 analyzer = ReportAnalyzer()
 
-def analyze_document(file_path):
-    return analyzer.analyze_document(file_path)
\ No newline at end of file
+def analyze_document(file_path, vocabulary=None):
+    return analyzer.analyze_document(file_path, vocabulary)
+
+def analyzer_version():
+    return analyzer.version()
\ No newline at end of file
@@ -0,0 +1,168 @@
+"""Precomputed aggregates behind the reports page and the reporting views.
+
+Usage:
+    python report_rollups.py          # rebuild every rollup from members and attendance
+
+Three tables are kept up to date by the code that writes members and
+attendance, inside the same transaction:
+
+- member_growth_monthly: new members per join month. It is adjusted by +1 or
+  -1 as members are registered or deleted.
+- event_attendance_rollup: attendance count, unique members, confidence and
+  last recognition time for each event.
+- member_attendance_rollup: the same figures for each member.
+
+Every change is applied as a delta: +1 for an inserted attendance row, the
+confidence gained when a row is improved, and -1 for a deleted row. The
+write path never re-reads attendance, so it takes no locks beyond the rows
+it writes and the rollup rows it adjusts. Rebuild after loading data
+behind the application's back, such as with benchmarks.seed_data.
+"""
+import argparse
+import time
+import database
+
+EVENT_ROLLUP_SQL = """
+    INSERT INTO event_attendance_rollup
+        (event_id, total_attendance, unique_members, confidence_sum, confidence_count, last_recognized_at)
+    SELECT event_id, COUNT(*), COUNT(DISTINCT member_id), COALESCE(SUM(confidence), 0), COUNT(confidence),
+           MAX(recognized_at)
+    FROM attendance
+    WHERE {where}
+    GROUP BY event_id
+"""
+
+MEMBER_ROLLUP_SQL = """
+    INSERT INTO member_attendance_rollup
+        (member_id, events_attended, confidence_sum, confidence_count, last_attendance)
+    SELECT member_id, COUNT(*), COALESCE(SUM(confidence), 0), COUNT(confidence), MAX(recognized_at)
+    FROM attendance
+    WHERE {where}
+    GROUP BY member_id
+"""
+
+EVENT_DELTA_SQL = """
+    INSERT INTO event_attendance_rollup
+        (event_id, total_attendance, unique_members, confidence_sum, confidence_count, last_recognized_at)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        total_attendance = total_attendance + VALUES(total_attendance),
+        unique_members = unique_members + VALUES(unique_members),
+        confidence_sum = confidence_sum + VALUES(confidence_sum),
+        confidence_count = confidence_count + VALUES(confidence_count),
+        last_recognized_at = COALESCE(GREATEST(last_recognized_at, VALUES(last_recognized_at)),
+                                      last_recognized_at, VALUES(last_recognized_at))
+"""
+
+MEMBER_DELTA_SQL = """
+    INSERT INTO member_attendance_rollup
+        (member_id, events_attended, confidence_sum, confidence_count, last_attendance)
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        events_attended = events_attended + VALUES(events_attended),
+        confidence_sum = confidence_sum + VALUES(confidence_sum),
+        confidence_count = confidence_count + VALUES(confidence_count),
+        last_attendance = COALESCE(GREATEST(last_attendance, VALUES(last_attendance)),
+                                   last_attendance, VALUES(last_attendance))
+"""
+
+def add_members(cursor, join_date, count=1):
+    """Count members joining (or, with a negative count, removed) in join_date's month; the caller commits"""
+    if join_date is None:
+        return
+    cursor.execute("""
+        INSERT INTO member_growth_monthly (month, new_members) VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE new_members = new_members + VALUES(new_members)
+    """, (join_date.replace(day=1), count))
+
+def attendance_changed(cursor, changes):
+    """Apply attendance deltas to the event and member rollups; the caller commits
+
+    changes are (member_id, event_id, recognized_at, rows, confidence_sum,
+    confidence_count) where rows is 1 for an inserted attendance row, -1 for a
+    deleted one and 0 for a row whose confidence was raised. recognized_at only
+    counts for inserted rows.
+    """
+    events = {}
+    members = {}
+    for member_id, event_id, recognized_at, rows, confidence_sum, confidence_count in changes:
+        for totals, key in ((events, event_id), (members, member_id)):
+            total = totals.setdefault(key, [0, 0.0, 0, None])
+            total[0] += rows
+            total[1] += confidence_sum
+            total[2] += confidence_count
+            if rows > 0 and (total[3] is None or recognized_at > total[3]):
+                total[3] = recognized_at
+
+    # Sorted, so concurrent writers lock rollup rows in the same order
+    if events:
+        cursor.executemany(EVENT_DELTA_SQL, [(event_id, rows, rows, confidence_sum, confidence_count, last)
+                                             for event_id, (rows, confidence_sum, confidence_count, last) in sorted(events.items())])
+    if members:
+        cursor.executemany(MEMBER_DELTA_SQL, [(member_id, rows, confidence_sum, confidence_count, last)
+                                              for member_id, (rows, confidence_sum, confidence_count, last) in sorted(members.items())])
+
+def member_removed(cursor, member_id, join_date):
+    """Take a member who is about to be deleted out of the rollups; the caller deletes the member and commits"""
+    add_members(cursor, join_date, -1)
+    cursor.execute("SELECT event_id, confidence FROM attendance WHERE member_id = %s FOR UPDATE", (member_id,))
+    rows = cursor.fetchall()
+    if not rows:
+        return
+
+    # The member's own rollup row is deleted with the member (ON DELETE CASCADE)
+    attendance_changed(cursor, [(member_id, event_id, None, -1, -float(confidence or 0), -int(confidence is not None))
+                                for event_id, confidence in rows])
+
+    # A maximum cannot be decremented; read the latest remaining recognition of each event instead
+    event_ids = sorted(event_id for event_id, _ in rows)
+    placeholders = ', '.join(['%s'] * len(event_ids))
+    cursor.execute(f"""
+        SELECT event_id, MAX(recognized_at) FROM attendance
+        WHERE event_id IN ({placeholders}) AND member_id <> %s
+        GROUP BY event_id
+    """, event_ids + [member_id])
+    latest = dict(cursor.fetchall())
+    cursor.executemany("UPDATE event_attendance_rollup SET last_recognized_at = %s WHERE event_id = %s",
+                       [(latest.get(event_id), event_id) for event_id in event_ids])
+
+def rebuild_rollups(cursor):
+    """Recompute every rollup from scratch; the caller commits"""
+    cursor.execute("DELETE FROM member_growth_monthly")
+    cursor.execute("""
+        INSERT INTO member_growth_monthly (month, new_members)
+        SELECT join_date - INTERVAL (DAYOFMONTH(join_date) - 1) DAY AS month, COUNT(*)
+        FROM members
+        WHERE join_date IS NOT NULL
+        GROUP BY month
+    """)
+    cursor.execute("DELETE FROM event_attendance_rollup")
+    cursor.execute(EVENT_ROLLUP_SQL.format(where="event_id IS NOT NULL"))
+    cursor.execute("DELETE FROM member_attendance_rollup")
+    cursor.execute(MEMBER_ROLLUP_SQL.format(where="member_id IS NOT NULL"))
+
+def rebuild():
+    """Rebuild every rollup in one transaction"""
+    conn = database.get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        rebuild_rollups(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild the report rollup tables from members and attendance')
+    parser.parse_args()
+
+    started = time.time()
+    rebuild()
+    print(f"✅ Report rollups rebuilt in {time.time() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
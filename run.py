@@ -1,9 +1,35 @@
-from app import create_app
+"""Start the production server.
+
+    python run.py
+
+Runs gunicorn with gunicorn.conf.py (preforked workers sharing the preloaded
+face models). Gunicorn does not run on Windows, where this falls back to a
+single threaded server process instead.
+"""
 import os
+import sys
+from config import Config
+
+def main():
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    try:
+        from gunicorn.app.wsgiapp import run
+    except ImportError:
+        run = None
+
+    if run is not None:
+        sys.argv = [sys.argv[0], '-c', 'gunicorn.conf.py', 'wsgi:application'] + sys.argv[1:]
+        print(f"🚀 Starting Membership System on {Config.SERVER_BIND} "
+              f"({Config.SERVER_WORKERS} workers x {Config.SERVER_THREADS} threads)")
+        run()
+        return
 
-app = create_app()
+    print("⚠️  gunicorn is not available; running a single process without preforking")
+    from app import app, start_background_services
+    start_background_services()
+    host, port = Config.SERVER_BIND.rsplit(':', 1)
+    app.run(host=host, port=int(port), threaded=True, debug=False)
 
 if __name__ == '__main__':
-    print("🚀 Starting Membership System...")
-    print("📊 Access the application at: http://localhost:80")
-    app.run(debug=True, host='127.0.0.1', port=3306)
\ No newline at end of file
+    main()
\ No newline at end of file
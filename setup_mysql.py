@@ -1,6 +1,7 @@
 import mysql.connector
 from mysql.connector import Error
 import os
+import sys
 import time
 
 class DatabaseSetup:
@@ -72,6 +73,18 @@ class DatabaseSetup:
                 conn.close()
                 print("\n🔒 Database connection closed.")
 
+def initialize_attendance_database():
+    """Create the clock-in attendance tables (mysql_integration.py), which the app no longer creates on first use"""
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'module'))
+    try:
+        from mysql_integration import AttendanceMySQL
+    except ImportError as e:
+        print(f"⚠️  MySQL attendance modules not available, skipping attendance tables: {e}")
+        return
+    
+    print("\n🕒 Creating attendance tables...")
+    AttendanceMySQL().initialize_database()
+
 def main():
     print("=" * 50)
     print("      MEMBERSHIP SYSTEM DATABASE SETUP")
@@ -87,6 +100,7 @@ def main():
     
     # Run setup
     db_setup.setup_database()
+    initialize_attendance_database()
     
     print("\n✅ Setup complete! You can now run the application.")
     print("💡 Run: python run.py")
@@ -0,0 +1,93 @@
+"""Crash recovery of the write-behind attendance buffer.
+
+Uses the in-memory attendance tables from test_attendance_queries.py and a
+temporary journal directory. The flusher thread is never started; tests
+call flush() themselves:
+
+    python -m pytest -q test_attendance_buffer.py
+"""
+import json
+import os
+from datetime import datetime
+import pytest
+import attendance_buffer
+from test_attendance_queries import db
+
+# Above any Linux pid_max, so process_alive() reports it dead
+DEAD_PID = 999999999
+EVENT_ID = 7
+
+def journal_line(member_id, confidence, recognized_at='2024-05-01T09:00:00'):
+    return json.dumps({'member_id': member_id, 'event_id': EVENT_ID,
+                       'recognized_at': recognized_at, 'confidence': confidence}) + '\n'
+
+def journal_files(journal_dir):
+    return sorted(os.listdir(journal_dir))
+
+@pytest.fixture
+def journal_dir(tmp_path):
+    return str(tmp_path / 'journal')
+
+def make_buffer(journal_dir):
+    return attendance_buffer.AttendanceBuffer(journal_dir, flush_interval_ms=60000, flush_rows=1000, fsync=False)
+
+def test_dead_process_journals_are_replayed_once(db, journal_dir, monkeypatch):
+    os.makedirs(journal_dir)
+    # The crashed process was mid-flush: one batch renamed to .flushing, newer rows in the live journal
+    with open(os.path.join(journal_dir, f'attendance-{DEAD_PID}.jsonl.flushing'), 'w') as f:
+        f.write(journal_line(1, 0.8) + journal_line(2, 0.7))
+    with open(os.path.join(journal_dir, f'attendance-{DEAD_PID}.jsonl'), 'w') as f:
+        f.write(journal_line(1, 0.9, '2024-05-01T09:05:00') + '{"member_id": 3, "ev')
+
+    buffer = make_buffer(journal_dir)
+    # Repeats are merged the way the database write would: first sighting, best confidence
+    assert buffer.pending == {(1, EVENT_ID): (datetime(2024, 5, 1, 9, 0), 0.9),
+                              (2, EVENT_ID): (datetime(2024, 5, 1, 9, 0), 0.7)}
+    # The adopted files are gone and their rows live on in this process's journal
+    assert journal_files(journal_dir) == [os.path.basename(buffer.journal_path)]
+    with open(buffer.journal_path) as f:
+        assert len(f.readlines()) == 2
+
+    # Another process starting now leaves the journal of this live one alone
+    with monkeypatch.context() as patch:
+        patch.setattr(attendance_buffer.os, 'getpid', lambda: DEAD_PID - 1)
+        other = make_buffer(journal_dir)
+        assert other.pending == {}
+        other.stop()
+
+    assert buffer.flush() == 2
+    assert db.committed == {(1, EVENT_ID): ('present', 0.9), (2, EVENT_ID): ('present', 0.7)}
+    buffer.stop()
+    assert journal_files(journal_dir) == []
+
+def test_failed_flush_keeps_rows_journaled(db, journal_dir):
+    buffer = make_buffer(journal_dir)
+    buffer.add(1, EVENT_ID, datetime(2024, 5, 1, 9, 0), 0.9)
+    buffer.add(2, EVENT_ID, datetime(2024, 5, 1, 9, 1), 0.8)
+
+    db.fail_commits = True
+    assert buffer.flush() == 0
+    assert db.committed == {}
+    assert set(buffer.pending) == {(1, EVENT_ID), (2, EVENT_ID)}
+    # The batch is back in the live journal, so a crash now would still replay it
+    assert journal_files(journal_dir) == [os.path.basename(buffer.journal_path)]
+    with open(buffer.journal_path) as f:
+        assert {json.loads(line)['member_id'] for line in f} == {1, 2}
+
+    db.fail_commits = False
+    assert buffer.flush() == 2
+    assert set(db.committed) == {(1, EVENT_ID), (2, EVENT_ID)}
+    buffer.stop()
+
+def test_successful_flush_deletes_the_journal(db, journal_dir):
+    buffer = make_buffer(journal_dir)
+    buffer.add(1, EVENT_ID, datetime(2024, 5, 1, 9, 0), 0.9)
+    assert os.path.getsize(buffer.journal_path) > 0
+
+    assert buffer.flush() == 1
+    assert db.committed == {(1, EVENT_ID): ('present', 0.9)}
+    assert not os.path.exists(buffer.flushing_path)
+    assert os.path.getsize(buffer.journal_path) == 0
+
+    buffer.stop()
+    assert journal_files(journal_dir) == []
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""Query budgets for recording attendance from camera frames.
+
+Runs /api/process_attendance/frame against an in-memory stand-in for the
+attendance tables and a stubbed face system, so it needs neither MySQL nor
+the dlib models:
+
+    python -m pytest -q test_attendance_queries.py
+"""
+import pytest
+import app as webapp
+import attendance_tracker
+import database
+import db_metrics
+import face_utils
+
+EVENT_ID = 7
+FRAME = b'\xff\xd8 not decoded by the stubbed face system'
+
+class FakeDatabase:
+    """attendance rows keyed by (member_id, event_id), plus whether each commit should fail"""
+
+    def __init__(self):
+        self.attendance = {}
+        self.committed = {}
+        self.fail_commits = False
+
+    def connect(self):
+        return db_metrics.instrument(FakeConnection(self))
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self.db)
+
+    def commit(self):
+        if self.db.fail_commits:
+            raise RuntimeError("commit failed")
+        self.db.committed = dict(self.db.attendance)
+
+    def rollback(self):
+        self.db.attendance = dict(self.db.committed)
+
+    def close(self):
+        pass
+
+class FakeCursor:
+    """Understands only the statements the attendance write path runs"""
+
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+        self.rowcount = 0
+
+    def execute(self, operation, params=()):
+        statement = ' '.join(operation.split())
+        if statement.startswith('SELECT member_id, confidence FROM attendance WHERE event_id'):
+            self.rows = [(member_id, confidence) for (member_id, event_id), (_, confidence) in self.db.attendance.items()
+                         if event_id == params[0]]
+        elif statement.startswith('INSERT IGNORE INTO attendance'):
+            self.rowcount = 0
+            for start in range(0, len(params), 4):
+                member_id, event_id, _, confidence = params[start:start + 4]
+                if (member_id, event_id) not in self.db.attendance:
+                    self.db.attendance[(member_id, event_id)] = ('present', confidence)
+                    self.rowcount += 1
+        elif statement.startswith('SELECT status, confidence FROM attendance'):
+            row = self.db.attendance.get(tuple(params))
+            self.rows = [row] if row else []
+        elif statement.startswith('UPDATE attendance SET'):
+            confidence, member_id, event_id = params
+            self.db.attendance[(member_id, event_id)] = ('present', confidence)
+        else:
+            raise AssertionError(f"unexpected statement: {statement}")
+
+    def executemany(self, operation, seq_params):
+        # Rollup deltas; their arithmetic is not under test here
+        assert 'attendance_rollup' in operation
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDatabase()
+    monkeypatch.setattr(database, 'get_db_connection', lambda database_name=None: fake.connect())
+    return fake
+
+@pytest.fixture
+def recognized(monkeypatch):
+    """The (member_id, confidence) pairs the stubbed face system finds in every frame"""
+    faces = [(1, 0.9), (2, 0.8)]
+    monkeypatch.setattr(face_utils, 'decode_image', lambda image_buffer, reduce_factor=1: object())
+    monkeypatch.setattr(face_utils, 'recognize_rgb_faces', lambda image, event_id=None: list(faces))
+    monkeypatch.setattr(face_utils, 'get_member_name', lambda member_id: f"Member {member_id}")
+    monkeypatch.setattr(attendance_tracker, 'tracker', attendance_tracker.AttendanceTracker(ttl=3600, min_improvement=0.05))
+    monkeypatch.setattr(webapp.config.Config, 'ATTENDANCE_WRITE_BEHIND', False)
+    return faces
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setitem(webapp.app.config, 'TESTING', True)
+    monkeypatch.setattr(webapp.app, 'secret_key', 'test')
+    with webapp.app.test_client() as client:
+        with client.session_transaction() as session:
+            session['user_role'] = 'manager'
+        yield client
+
+def post_frame(client):
+    response = client.post(f'/api/process_attendance/frame?event_id={EVENT_ID}', data=FRAME, content_type='image/jpeg')
+    return response.get_json()
+
+def test_repeat_captures_run_no_queries(db, recognized, client):
+    # First capture: load the event's attendance, one insert, two rollup upserts
+    with db_metrics.query_budget(4):
+        result = post_frame(client)
+    assert result['count'] == 2
+    assert set(db.committed) == {(1, EVENT_ID), (2, EVENT_ID)}
+
+    for _ in range(3):
+        with db_metrics.query_budget(0):
+            result = post_frame(client)
+        assert result['count'] == 0
+        assert all(member['already_marked'] for member in result['recognized_members'])
+
+def test_clearly_better_confidence_is_written(db, recognized, client):
+    post_frame(client)
+
+    recognized[0] = (1, 0.97)
+    with db_metrics.query_budget(6):
+        result = post_frame(client)
+    assert result['count'] == 1
+    assert db.committed[(1, EVENT_ID)] == ('present', 0.97)
+
+def test_failed_commit_is_retried_on_next_capture(db, recognized, client):
+    db.fail_commits = True
+    result = post_frame(client)
+    assert result['success'] is False
+    assert db.committed == {}
+
+    # Nothing was cached as present, so the next capture writes again
+    db.fail_commits = False
+    result = post_frame(client)
+    assert result['count'] == 2
+    assert set(db.committed) == {(1, EVENT_ID), (2, EVENT_ID)}
\ No newline at end of file
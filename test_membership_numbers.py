@@ -0,0 +1,116 @@
+"""Membership number allocation against an in-memory sequences table.
+
+The fake cursor implements the three statements membership_numbers.py runs,
+including MySQL's LAST_INSERT_ID(expr), which later SELECT LAST_INSERT_ID()
+calls on the same connection return:
+
+    python -m pytest -q test_membership_numbers.py
+"""
+import re
+import pytest
+import database
+import membership_numbers
+
+class FakeDatabase:
+    def __init__(self, numbers=()):
+        self.members = list(numbers)
+        self.sequences = {}
+        self.reservations = 0
+
+    def connect(self):
+        return FakeConnection(self)
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+        self.last_insert_id = 0
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.db = conn.db
+        self.rowcount = 0
+        self.row = None
+
+    def execute(self, operation, params=()):
+        statement = ' '.join(operation.split())
+        if statement.startswith('UPDATE sequences SET last_value = LAST_INSERT_ID(last_value + %s)'):
+            count, name = params
+            self.rowcount = int(name in self.db.sequences)
+            if self.rowcount:
+                self.db.sequences[name] += count
+                self.conn.last_insert_id = self.db.sequences[name]
+                self.db.reservations += 1
+        elif statement.startswith('INSERT IGNORE INTO sequences'):
+            name, start, pattern = params
+            # CAST(SUBSTRING(number, start) AS UNSIGNED): the leading digits, or 0
+            values = [int(re.match(r'\d*', number[start - 1:]).group() or 0)
+                      for number in self.db.members if number.startswith(pattern.rstrip('%'))]
+            self.db.sequences.setdefault(name, max(values, default=0))
+        elif statement == 'SELECT LAST_INSERT_ID()':
+            self.row = (self.conn.last_insert_id,)
+        else:
+            raise AssertionError(f"unexpected statement: {statement}")
+
+    def fetchone(self):
+        return self.row
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDatabase(['MEM000041', 'MEM000007', 'OLD-0099'])
+    monkeypatch.setattr(database, 'get_db_connection', lambda database_name=None: fake.connect())
+    return fake
+
+def test_first_use_continues_after_existing_numbers(db):
+    allocator = membership_numbers.MembershipNumberAllocator(block_size=1)
+    cursor = db.connect().cursor()
+
+    assert allocator.next_number(cursor) == 'MEM000042'
+    assert allocator.next_number(cursor) == 'MEM000043'
+    assert db.sequences == {membership_numbers.SEQUENCE_NAME: 43}
+
+def test_empty_database_starts_at_one():
+    fake = FakeDatabase()
+    allocator = membership_numbers.MembershipNumberAllocator(block_size=1)
+    assert allocator.next_number(fake.connect().cursor()) == 'MEM000001'
+
+def test_numbers_grow_past_six_digits():
+    fake = FakeDatabase(['MEM999999'])
+    allocator = membership_numbers.MembershipNumberAllocator(block_size=1)
+    assert allocator.next_number(fake.connect().cursor()) == 'MEM1000000'
+    assert membership_numbers.format_number(5) == 'MEM000005'
+
+def test_blocks_are_reserved_once_per_block_size(db, monkeypatch):
+    allocator = membership_numbers.MembershipNumberAllocator(block_size=10)
+
+    numbers = [allocator.next_number(None) for _ in range(12)]
+    assert numbers == [f'MEM{value:06d}' for value in range(42, 54)]
+    assert db.reservations == 2
+    assert db.sequences[membership_numbers.SEQUENCE_NAME] == 61
+
+    # A forked worker reserves a block of its own instead of reusing the rest of its parent's
+    monkeypatch.setattr(membership_numbers.os, 'getpid', lambda: allocator.pid + 1)
+    assert allocator.next_number(None) == 'MEM000062'
+
+def test_allocate_range_is_consecutive(db):
+    allocator = membership_numbers.MembershipNumberAllocator(block_size=1)
+    cursor = db.connect().cursor()
+
+    assert allocator.allocate_range(cursor, 3) == ['MEM000042', 'MEM000043', 'MEM000044']
+    assert allocator.allocate_range(cursor, 0) == []
+    assert allocator.next_number(cursor) == 'MEM000045'
\ No newline at end of file
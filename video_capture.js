@@ -60,25 +60,21 @@ class VideoAttendance {
         const context = canvas.getContext('2d');
         
         context.drawImage(this.video, 0, 0, canvas.width, canvas.height);
-        const imageData = canvas.toDataURL('image/jpeg', 0.8);
-        
-        this.processAttendance(imageData);
+        // Send the JPEG bytes as-is; a data URL costs a base64 round trip on both ends
+        canvas.toBlob(blob => this.processAttendance(blob), 'image/jpeg', 0.8);
     }
     
-    async processAttendance(imageData) {
+    async processAttendance(imageBlob) {
         this.showMessage('Processing face recognition...', 'info');
         this.captureBtn.disabled = true;
         
         try {
-            const response = await fetch('/api/process_attendance', {
+            const response = await fetch(`/api/process_attendance/frame?event_id=${encodeURIComponent(this.eventId)}`, {
                 method: 'POST',
                 headers: {
-                    'Content-Type': 'application/json',
+                    'Content-Type': 'image/jpeg',
                 },
-                body: JSON.stringify({
-                    event_id: this.eventId,
-                    image: imageData
-                })
+                body: imageBlob
             });
             
             const data = await response.json();
@@ -143,6 +139,7 @@ class VideoAttendance {
                 <i class="fas fa-user-check text-success"></i>
                 <strong>${memberData.name}</strong>
                 <span class="text-muted">(${memberData.confidence}%)</span>
+                ${memberData.already_marked ? '<span class="badge bg-secondary">already marked</span>' : ''}
                 <span class="text-muted float-end">${timestamp}</span>
             </small>
         `;
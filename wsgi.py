@@ -1,15 +1,14 @@
-import sys
+"""WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+See gunicorn.conf.py for model preloading, worker settings and reload.
+"""
 import os
+import sys
 
-# Add your project directory to the Python path
-project_dir = r'C:\xampp\htdocs\attendance'
+project_dir = os.path.dirname(os.path.abspath(__file__))
 if project_dir not in sys.path:
     sys.path.insert(0, project_dir)
 
-# Set environment variables
-os.environ['PYTHONPATH'] = project_dir
-
-from app import app as application
-
-if __name__ == "__main__":
-    application.run()
\ No newline at end of file
+from app import app as application
\ No newline at end of file